@@ -0,0 +1,6 @@
+"""Performance benchmarks for settling.
+
+Each module can be run on its own, for example:
+
+    python -m benchmarks.bench_hexagon_arrays
+"""
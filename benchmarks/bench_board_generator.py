@@ -0,0 +1,66 @@
+"""Compare ways of generating fair random boards.
+
+The naive way builds a Board with random_standard_board and throws it
+away unless is_fair accepts it. BoardGenerator checks shuffles in bulk
+on arrays, and builds only the boards it keeps. Each is given about
+--seconds per set of constraints, and their boards per second shown.
+
+    python -m benchmarks.bench_board_generator [--seconds S]
+"""
+
+import argparse
+import random
+import time
+
+from settling.board import random_standard_board
+from settling.board_generator import BoardGenerator, Constraints, is_fair
+
+CONSTRAINTS = [
+    Constraints(False, None, None),
+    Constraints(True, None, None),
+    Constraints(),
+    Constraints(True, 1, 11),
+    Constraints(True, 0, 11),
+]
+
+
+def naive(constraints, seconds):
+    """Return boards per second by building boards until one is fair.
+    """
+    rng = random.Random(0)
+    boards = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        if is_fair(random_standard_board(rng), constraints):
+            boards += 1
+    return boards / (time.perf_counter() - start)
+
+
+def generated(constraints, seconds):
+    """Return boards per second from a BoardGenerator.
+    """
+    generator = BoardGenerator(constraints, seed=0)
+    for _ in generator.boards():
+        if generator.stats.elapsed >= seconds:
+            break
+    return generator.stats.boards_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    args = parser.parse_args()
+
+    print('{0:<40}{1:>12}{2:>12}{3:>10}'.format(
+        'constraints (red, same, pips)', 'naive/s', 'generator/s',
+        'speedup'))
+    for constraints in CONSTRAINTS:
+        slow = naive(constraints, args.seconds)
+        fast = generated(constraints, args.seconds)
+        speedup = '{0:.0f}x'.format(fast / slow) if slow else '-'
+        print('{0:<40}{1:>12,.1f}{2:>12,.0f}{3:>10}'.format(
+            str(tuple(constraints)), slow, fast, speedup))
+
+
+if __name__ == '__main__':
+    main()
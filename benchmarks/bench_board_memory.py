@@ -0,0 +1,129 @@
+"""Measure the memory held by each board, before and after the move to
+array backed storage.
+
+The "before" figures come from rebuilding the same position in the
+layout boards used to have: a list of Tile objects with their own
+attribute dicts, and dicts keyed by (hexagon, corner) tuples.
+
+    python -m benchmarks.bench_board_memory [--boards N]
+"""
+
+import argparse
+import sys
+
+from settling import board
+from settling import game_constants
+from settling.board_geometry import StandardBoard
+
+
+class LegacyTile:
+    def __init__(self, tile_type, number, has_robber=False):
+        self.tile_type = tile_type
+        self.number = number
+        self.has_robber = has_robber
+
+
+def legacy_state(b):
+    """Return the pre-array representation of a board's position.
+    """
+    topology = b._topology
+    tiles = [LegacyTile(t.tile_type, t.number, t.has_robber)
+             for t in b._tiles]
+    vertices = {tuple(topology.vertex_aliases[k][0]): v
+                for k, v in b._vertices.items()}
+    edges = {tuple(topology.edge_aliases[k][0]): v
+             for k, v in b._edges.items()}
+    ports = {}
+    for hexagon, port_type, v1, v2 in b._port_map:
+        ports[(hexagon, v1)] = port_type
+        ports[(hexagon, v2)] = port_type
+    return {'_tiles': tiles, '_vertices': vertices, '_edges': edges,
+            '_ports': ports, '_tile_order': list(b._tile_order),
+            '_number_order': list(b._number_order)}
+
+
+def deep_size(obj, shared):
+    """Return the bytes reachable from obj, skipping shared objects.
+    """
+    seen = set(id(o) for o in shared)
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        if hasattr(current, '__dict__'):
+            stack.append(current.__dict__)
+        for slot in getattr(type(current), '__slots__', ()):
+            if hasattr(current, slot):
+                stack.append(getattr(current, slot))
+    return total
+
+
+def populated_board():
+    b = board.Board(
+        game_constants.STANDARD_TILE_ORDER,
+        game_constants.STANDARD_NUMBER_ORDER,
+        game_constants.STANDARD_PORT_MAP,
+        StandardBoard(),
+    )
+    placements = [((0, 0, 0), 0), ((0, 0, 0), 3), ((2, 0, -2), 1),
+                  ((-2, 2, 0), 3), ((0, -2, 2), 5), ((-1, -1, 2), 0)]
+    for i, (hexagon, corner) in enumerate(placements):
+        player = 'player{0}'.format(i % 4)
+        b.add_town(hexagon, corner, player)
+        b.add_road(hexagon, corner, player)
+    b.upgrade_town((0, 0, 0), 0, 'player0')
+    return b
+
+
+def shared_objects(b):
+    """Return the objects shared by every board of b's layout, which
+    are not counted against any one.
+    """
+    shared = [b._board_geometry, b._topology, game_constants,
+              game_constants.STANDARD_TILE_ORDER,
+              game_constants.STANDARD_NUMBER_ORDER,
+              game_constants.STANDARD_PORT_MAP]
+    shared.extend(game_constants.TILE_TYPES)
+    shared.extend(game_constants.PORT_TYPES)
+    shared.extend(b._player_names[1:])
+    # Boards with the same layout share what is derived from it.
+    shared.append(b._layout)
+    shared.extend([b._land_vertices, b._land_edges, b._ports,
+                   b._vertex_table])
+    return shared
+
+
+def board_size(b):
+    """Return the bytes held by board b alone.
+    """
+    state = dict(b.__dict__)
+    state['_tile_order'] = list(b._tile_order)
+    state['_number_order'] = list(b._number_order)
+    return deep_size(state, shared_objects(b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--boards', type=int, default=10000)
+    args = parser.parse_args()
+
+    b = populated_board()
+    after = board_size(b)
+    before = deep_size(legacy_state(b), shared_objects(b))
+    print('bytes per board, before: {0:,}'.format(before))
+    print('bytes per board, after:  {0:,}'.format(after))
+    print('{0:,} boards: {1:,.1f} MB -> {2:,.1f} MB'.format(
+        args.boards, before * args.boards / 1e6, after * args.boards / 1e6))
+
+
+if __name__ == '__main__':
+    main()
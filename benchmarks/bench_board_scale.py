@@ -0,0 +1,107 @@
+"""Show that board operations cost the same however large the board.
+
+Boards of each radius are built with random_hexagonal_board, given a
+few players' towns and roads near the center, and then each operation
+is timed on them. Building a board is linear in its tiles, but every
+operation after that should take about as long at radius 40 as on the
+standard board.
+
+    python -m benchmarks.bench_board_scale [--radius R ...] [--number N]
+"""
+
+import argparse
+import random
+import time
+import timeit
+
+from settling.board import random_hexagonal_board
+
+
+def populated(radius):
+    """Return a board of radius with three players' towns and roads.
+    """
+    b = random_hexagonal_board(radius, random.Random(0))
+    for i, hexagon in enumerate([(0, 0, 0), (1, -1, 0), (-1, 1, 0)]):
+        player = 'player{0}'.format(i)
+        b.add_town(hexagon, 0, player)
+        b.add_road(hexagon, 0, player)
+        b.add_road(hexagon, 1, player)
+    return b
+
+
+def operations(b):
+    """Return (name, function) for each operation to time on b.
+    """
+    geometry = b._board_geometry
+    radius = geometry.radius
+    edge_tile = (radius - 1, 0, 1 - radius)
+    outside = (radius + 1, 0, -radius - 1)
+    road = b.legal_roads('player0')[0]
+    site = (edge_tile, 1)
+    robber_to = (1, 0, -1)
+
+    def town_and_undo():
+        mark = b.undo_mark()
+        b.add_town(site[0], site[1], 'player1')
+        b.undo_to(mark)
+
+    def road_and_undo():
+        mark = b.undo_mark()
+        b.add_road(road[0], road[1], 'player0')
+        b.undo_to(mark)
+
+    def robber_and_undo():
+        mark = b.undo_mark()
+        b.move_robber(robber_to)
+        b.undo_to(mark)
+
+    return [
+        ('has_hexagon', lambda: geometry.has_hexagon(outside)),
+        ('hexagon_neighbors', lambda: geometry.hexagon_neighbors(edge_tile)),
+        ('vertex_synonyms', lambda: geometry.vertex_synonyms(edge_tile, 1)),
+        ('edge_synonyms (off board)',
+         lambda: geometry.edge_synonyms(outside, 3)),
+        ('ordinal_from_hexagon',
+         lambda: geometry.ordinal_from_hexagon(edge_tile)),
+        ('add_town + undo', town_and_undo),
+        ('add_road + undo', road_and_undo),
+        ('move_robber + undo', robber_and_undo),
+        ('legal_roads', lambda: b.legal_roads('player0')),
+        ('victory_points', b.victory_points),
+        ('pieces', lambda: b.pieces('player0')),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--radius', type=int, nargs='+',
+                        default=[3, 10, 20, 40])
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    boards = []
+    build_times = []
+    for radius in args.radius:
+        start = time.perf_counter()
+        boards.append(populated(radius))
+        build_times.append(time.perf_counter() - start)
+
+    header = '{0:<28}'.format('radius')
+    header += ''.join('{0:>10}'.format(r) for r in args.radius)
+    print(header)
+    print('{0:<28}'.format('tiles') + ''.join(
+        '{0:>10}'.format(len(b._tile_order)) for b in boards))
+    print('{0:<28}'.format('build (ms)') + ''.join(
+        '{0:>10.1f}'.format(t * 1e3) for t in build_times))
+    table = [operations(b) for b in boards]
+    for row in zip(*table):
+        line = '{0:<28}'.format(row[0][0] + ' (us)')
+        for _, function in row:
+            best = min(timeit.repeat(function, number=args.number,
+                                     repeat=3))
+            line += '{0:>10.2f}'.format(best / args.number * 1e6)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
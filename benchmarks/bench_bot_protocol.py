@@ -0,0 +1,124 @@
+"""Time decisions made through RemotePlayer by bots in other processes.
+
+The bots are echo bots: they keep their board up to date from every
+request's delta, like any bot, but answer at once with the first legal
+town site or the end of the turn. What is timed is then the protocol
+itself. Each round a road or town goes on the board, so the requests
+carry deltas, and every player is asked to act.
+
+Sequential decisions wait for each reply before the next request.
+Pipelined ones come from --sessions players spread over --workers
+bots, all asked at once from an AsyncGame-style event loop.
+
+    python -m benchmarks.bench_bot_protocol [--rounds N] [--workers N]
+                                            [--sessions N]
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import random
+import sys
+import time
+
+from settling import bot_protocol
+from settling import player_action
+from settling import serialization
+from settling.board import random_standard_board
+from settling.bot_protocol import BotProcess, RemotePlayer
+from settling.hand import Hand
+from settling.player import Player
+
+ECHO_BOT = [sys.executable, '-m', 'benchmarks.bench_bot_protocol', '--echo']
+
+
+class EchoPlayer(Player):
+    def starting_town(self, board):
+        return board.legal_town_sites(self.name, setup=True)[0]
+
+    def play_action_card(self, board, hand):
+        return None
+
+    def act(self, board, hand):
+        return player_action.EndTurn()
+
+
+def growing_board(rounds):
+    """Yield a board after each of rounds changes to it.
+    """
+    board = random_standard_board(random.Random(0))
+    names = ['player{0}'.format(i) for i in range(4)]
+    for name in names:
+        board.add_town(*board.legal_town_sites(name, setup=True)[0], name)
+    players = itertools.cycle(names)
+    for _ in range(rounds):
+        name = next(players)
+        roads = board.legal_roads(name)
+        if roads:
+            board.add_road(*roads[0], name)
+        yield board
+
+
+def sequential(rounds):
+    hand = Hand(['wood', 'brick'])
+    with BotProcess(ECHO_BOT) as bot:
+        player = RemotePlayer('player0', bot)
+        start = time.perf_counter()
+        for board in growing_board(rounds):
+            player.act(board, hand)
+        seconds = time.perf_counter() - start
+    return bot.requests, seconds, bot.bytes_sent
+
+
+async def pipelined_rounds(players, rounds):
+    hand = Hand(['wood', 'brick'])
+    for board in growing_board(rounds):
+        await asyncio.gather(*[player.act(board, hand)
+                               for player in players])
+
+
+def pipelined(rounds, workers, sessions):
+    bots = [BotProcess(ECHO_BOT) for _ in range(workers)]
+    try:
+        players = [RemotePlayer('player{0}'.format(i % 4),
+                                bots[i % workers], asynchronous=True)
+                   for i in range(sessions)]
+        start = time.perf_counter()
+        asyncio.run(pipelined_rounds(players, rounds))
+        seconds = time.perf_counter() - start
+    finally:
+        for bot in bots:
+            bot.close()
+    return (sum(bot.requests for bot in bots), seconds,
+            sum(bot.bytes_sent for bot in bots))
+
+
+def report(label, requests, seconds, bytes_sent):
+    print('{0:<24}{1:>10,} decisions {2:>10,.0f}/s {3:>8.1f} bytes '
+          'each'.format(label, requests, requests / seconds,
+                        bytes_sent / requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--echo', action='store_true',
+                        help='run as an echo bot on stdin and stdout')
+    args = parser.parse_args()
+    if args.echo:
+        bot_protocol.serve(lambda name, options: EchoPlayer(name))
+        return
+
+    board = next(growing_board(1))
+    full = len(base64.b64encode(serialization.encode_board(board)))
+    print('a whole board is {0:,} bytes of base64'.format(full))
+    report('sequential', *sequential(args.rounds))
+    report('pipelined x{0}'.format(args.sessions),
+           *pipelined(args.rounds // 10, args.workers, args.sessions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Play thousands of games at once against simulated remote bots.
+
+Every bot is a random player that answers each decision after a
+latency drawn around --latency seconds, as a remote service might.
+One bot in every --stuck-every games never answers, and is timed out
+after --timeout seconds on each decision. The server's metrics are
+printed at the end, along with how much bot latency the games spent
+waiting on against the wall time taken.
+
+    python -m benchmarks.bench_game_server [--games N] [--concurrency N]
+                                           [--latency S] [--timeout S]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from settling.board import random_standard_board
+from settling.game_server import AsyncGame, GameServer
+from settling.player import RandomPlayer
+
+
+class RemoteBot(RandomPlayer):
+    def __init__(self, name, rng, latency, stuck=False):
+        super().__init__(name, rng)
+        self.latency = latency
+        self.stuck = stuck
+
+    async def _wait(self):
+        if self.stuck:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.latency)
+
+    async def starting_town(self, board):
+        await self._wait()
+        return super().starting_town(board)
+
+    async def act(self, board, hand):
+        await self._wait()
+        return super().act(board, hand)
+
+
+def games(count, latency, timeout, stuck_every, max_turns):
+    for seed in range(count):
+        rng = random.Random(seed)
+        players = [RemoteBot('player{0}'.format(i),
+                             random.Random(rng.getrandbits(64)), latency,
+                             stuck=(i == 0 and seed % stuck_every == 0))
+                   for i in range(4)]
+        yield AsyncGame(random_standard_board(rng), players,
+                        lambda rng=rng: rng.randint(1, 6) + rng.randint(1, 6),
+                        max_turns=max_turns, decision_timeout=timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--timeout', type=float, default=0.1)
+    parser.add_argument('--stuck-every', type=int, default=100)
+    parser.add_argument('--max-turns', type=int, default=100)
+    args = parser.parse_args()
+
+    server = GameServer(args.concurrency)
+    start = time.perf_counter()
+    asyncio.run(server.run(games(args.games, args.latency, args.timeout,
+                                 args.stuck_every, args.max_turns)))
+    wall = time.perf_counter() - start
+    print(server.metrics.to_json(indent=2))
+    waited = server.metrics.decision_seconds.total
+    print('{0:,} games in {1:.1f}s, {2:.0f}s of bot latency overlapped '
+          '{3:.0f}x'.format(args.games, wall, waited, waited / wall))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Compare the batch hexagon conversions to the scalar ones.
+
+    python -m benchmarks.bench_hexagon_arrays [--count N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from settling import hexagon_arrays as hxa
+from settling import hexagon_utils as hx
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def scalar_hexagons(ordinals):
+    return [hx.hexagon_from_ordinal(o) for o in ordinals]
+
+
+def scalar_ordinals(hexagons):
+    return [hx.ordinal_from_hexagon(h) for h in hexagons]
+
+
+def scalar_neighbors(hexagons):
+    return [hx.neighbors(h) for h in hexagons]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=10 ** 6)
+    args = parser.parse_args()
+
+    ordinals = np.arange(args.count, dtype=np.int64)
+    ordinal_list = ordinals.tolist()
+    hexagons, _ = timed(hxa.hexagons_from_ordinals, ordinals)
+    hexagon_list = [tuple(h) for h in hexagons.tolist()]
+
+    cases = [
+        ('hexagon_from_ordinal',
+         (scalar_hexagons, ordinal_list),
+         (hxa.hexagons_from_ordinals, ordinals)),
+        ('ordinal_from_hexagon',
+         (scalar_ordinals, hexagon_list),
+         (hxa.ordinals_from_hexagons, hexagons)),
+        ('neighbors',
+         (scalar_neighbors, hexagon_list),
+         (hxa.neighbors, hexagons)),
+    ]
+    print('{0:,} coordinates'.format(args.count))
+    row = '{0:<22} {1:>10.3f}s {2:>10.3f}s {3:>9.1f}x'
+    print('{0:<22} {1:>11} {2:>11} {3:>10}'.format(
+        'conversion', 'scalar', 'batch', 'speedup'))
+    for name, scalar_case, batch_case in cases:
+        _, scalar_time = timed(*scalar_case)
+        _, batch_time = timed(*batch_case)
+        print(row.format(name, scalar_time, batch_time,
+                         scalar_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Stress the incremental longest road engine on adversarial layouts.
+
+Each layout places a sequence of roads and towns, and the time for the
+whole sequence is compared with recomputing every player's longest
+road from scratch after each placement.
+
+    python -m benchmarks.bench_longest_road [--repeat N]
+"""
+
+import argparse
+import time
+
+from settling import board
+from settling import game_constants
+from settling.board_geometry import StandardBoard
+from settling.longest_road import LongestRoad
+
+
+def new_board():
+    return board.Board(game_constants.STANDARD_TILE_ORDER,
+                       game_constants.STANDARD_NUMBER_ORDER,
+                       game_constants.STANDARD_PORT_MAP,
+                       StandardBoard())
+
+
+def tile_loop(hexagon, player):
+    return [('road', hexagon, edge, player) for edge in range(6)]
+
+
+def without_repeats(placements):
+    """Drop roads on edges an earlier placement already covers.
+    """
+    topology = StandardBoard().topology
+    seen = set()
+    unique = []
+    for kind, hexagon, corner, player in placements:
+        if kind == 'road':
+            edge_id = topology.edge_id(hexagon, corner)
+            if edge_id in seen:
+                continue
+            seen.add(edge_id)
+        unique.append((kind, hexagon, corner, player))
+    return unique
+
+
+def honeycomb():
+    """One player's roads around the center and its neighbors: a dense
+    lattice of cycles, the worst case for trail search.
+    """
+    placements = tile_loop((0, 0, 0), 'player1')
+    for hexagon in [(1, 0, -1), (0, 1, -1), (-1, 1, 0)]:
+        placements.extend(tile_loop(hexagon, 'player1'))
+    return without_repeats(placements)
+
+
+def flower():
+    """Loops around the center and all six of its neighbors: 30 roads,
+    twice what a player may build, all in one component.
+    """
+    placements = tile_loop((0, 0, 0), 'player1')
+    for hexagon in [(1, 0, -1), (0, 1, -1), (-1, 1, 0),
+                    (-1, 0, 1), (0, -1, 1), (1, -1, 0)]:
+        placements.extend(tile_loop(hexagon, 'player1'))
+    return without_repeats(placements)
+
+
+def broken_honeycomb():
+    """The honeycomb, with an opponent's towns cutting it apart.
+    """
+    placements = honeycomb()
+    for hexagon, vertex in [((0, 0, 0), 1), ((0, 0, 0), 4),
+                            ((1, 0, -1), 1), ((0, 1, -1), 3)]:
+        placements.append(('town', hexagon, vertex, 'player2'))
+    return placements
+
+
+def four_players():
+    """Four players each close a loop on adjacent tiles, and cut each
+    other's roads with towns.
+    """
+    hexagons = [(0, 0, 0), (2, 0, -2), (-2, 2, 0), (0, -2, 2)]
+    placements = []
+    for i, hexagon in enumerate(hexagons):
+        placements.extend(tile_loop(hexagon, 'player{0}'.format(i)))
+    placements.extend([
+        ('town', (0, 0, 0), 0, 'player1'),
+        ('town', (2, 0, -2), 3, 'player2'),
+        ('town', (-2, 2, 0), 5, 'player3'),
+        ('town', (0, -2, 2), 1, 'player0'),
+    ])
+    return without_repeats(placements)
+
+
+def place(b, placements, after=None):
+    for kind, hexagon, corner, player in placements:
+        if kind == 'road':
+            b.add_road(hexagon, corner, player)
+        else:
+            b.add_town(hexagon, corner, player)
+        if after is not None:
+            after(b)
+
+
+def recompute_from_scratch(b):
+    """Measure every player's roads with a fresh engine.
+    """
+    engine = LongestRoad(b._topology)
+    engine.add_roads(list(b._edges), b._vertex_state, b._edge_state)
+    engine.measure()
+
+
+def time_layout(placements, repeat, after=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        place(new_board(), placements, after)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    layouts = [('honeycomb', honeycomb()),
+               ('broken honeycomb', broken_honeycomb()),
+               ('flower', flower()),
+               ('four players', four_players())]
+    print('{0:<18} {1:>10} {2:>14} {3:>14} {4:>9}'.format(
+        'layout', 'placements', 'incremental', 'from scratch', 'speedup'))
+    for name, placements in layouts:
+        incremental = time_layout(placements, args.repeat)
+        naive = time_layout(placements, args.repeat, recompute_from_scratch)
+        print('{0:<18} {1:>10} {2:>12.2f}ms {3:>12.2f}ms {4:>8.1f}x'.format(
+            name, len(placements), incremental * 1e3, naive * 1e3,
+            naive / incremental))
+
+
+if __name__ == '__main__':
+    main()
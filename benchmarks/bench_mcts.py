@@ -0,0 +1,66 @@
+"""Measure the throughput of the MCTS player at a fixed budget.
+
+Plays games of one MCTS player against random players and reports the
+MCTS player's decisions and rollouts per second of thinking time, and
+how often it won, for each number of rollout workers.
+
+    python -m benchmarks.bench_mcts [--budget S] [--games N] [--workers N ...]
+"""
+
+import argparse
+import random
+
+from settling import board
+from settling.game import Game
+from settling.mcts import MCTSPlayer
+from settling.player import RandomPlayer
+
+
+def play(seed, budget, workers, rollout_turns):
+    rng = random.Random(seed)
+    player = MCTSPlayer('mcts', budget=budget, workers=workers,
+                        rollout_turns=rollout_turns,
+                        rng=random.Random(seed))
+    players = [player] + [RandomPlayer('random{0}'.format(i),
+                                       random.Random(seed + i))
+                          for i in range(1, 4)]
+    game = Game(board.random_standard_board(rng), players,
+                lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                max_turns=1000)
+    try:
+        winner = game.game_loop()
+    finally:
+        player.close()
+    return winner == 'mcts', player
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=0.05,
+                        help='seconds per decision')
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--rollout-turns', type=int, default=40)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2])
+    args = parser.parse_args()
+
+    print('budget {0}s per decision, {1} games'.format(
+        args.budget, args.games))
+    print('{0:>7} {1:>12} {2:>12} {3:>6}'.format(
+        'workers', 'decisions/s', 'rollouts/s', 'wins'))
+    for workers in args.workers:
+        decisions = rollouts = wins = 0
+        seconds = 0.0
+        for seed in range(args.games):
+            won, player = play(seed, args.budget, workers,
+                               args.rollout_turns)
+            wins += won
+            decisions += player.decisions
+            rollouts += player.rollouts
+            seconds += player.thinking_time
+        print('{0:>7} {1:>12,.1f} {2:>12,.1f} {3:>6}'.format(
+            workers, decisions / seconds, rollouts / seconds,
+            '{0}/{1}'.format(wins, args.games)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Compare ranking openings from the vertex table with walking tiles.
+
+The walking version scores each legal site the way bots used to: by
+looking up the tiles around it through the board, one at a time.
+
+    python -m benchmarks.bench_openings [--boards N]
+"""
+
+import argparse
+import random
+import time
+
+from settling import board
+from settling.vertex_table import DIVERSITY_BONUS, PIPS, PORT_BONUS
+
+
+def walked_ranking(b, player):
+    def score(site):
+        tiles = [t for t in b.vertex_tiles(*site) if t.number]
+        pips = sum(int(PIPS[t.number]) for t in tiles)
+        resources = len(set(t.tile_type for t in tiles))
+        has_port = b.port(*site) is not None
+        return pips + DIVERSITY_BONUS * resources + PORT_BONUS * has_port
+    return sorted(b.legal_town_sites(player, setup=True), key=score,
+                  reverse=True)
+
+
+def timed(rank, boards):
+    start = time.perf_counter()
+    for b in boards:
+        rank(b, 'player1')
+    return (time.perf_counter() - start) / len(boards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--boards', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    boards = [board.random_standard_board(rng) for _ in range(args.boards)]
+
+    walked = timed(walked_ranking, boards)
+    table = timed(lambda b, p: b.rank_openings(p), boards)
+    print('{0:,} boards'.format(args.boards))
+    print('walking tiles: {0:8.1f} us per ranking'.format(walked * 1e6))
+    print('vertex table:  {0:8.1f} us per ranking'.format(table * 1e6))
+    print('speedup:       {0:8.1f}x'.format(walked / table))
+
+
+if __name__ == '__main__':
+    main()
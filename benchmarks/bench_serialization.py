@@ -0,0 +1,93 @@
+"""Compare the binary position format with pickle.
+
+Positions are taken after every turn of a few seeded games, and each
+is encoded and decoded both ways. Decoding the binary records is also
+timed straight out of an mmap of the concatenated records.
+
+    python -m benchmarks.bench_serialization [--games N] [--turns N]
+"""
+
+import argparse
+import mmap
+import pickle
+import random
+import tempfile
+import time
+
+from settling import board
+from settling import serialization
+from settling.game import Game
+from settling.player import RandomPlayer
+
+
+def positions(games, turns):
+    """Return (board, hands, turns) after every turn of games games.
+    """
+    result = []
+    for seed in range(games):
+        rng = random.Random(seed)
+        players = [RandomPlayer('player{0}'.format(i), random.Random(i))
+                   for i in range(4)]
+        game = Game(board.random_standard_board(rng), players,
+                    lambda: rng.randint(1, 6) + rng.randint(1, 6))
+        game._board_set_up()
+        for turn in range(turns):
+            game._player_turn(players[turn % len(players)])
+            game.turns += 1
+            hands = {name: hand.copy() for name, hand in game.hands.items()}
+            result.append((game.board.snapshot(), hands, game.turns))
+    return result
+
+
+def timed(function, items, repeat=3):
+    """Return the best seconds per item over repeat runs.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=50)
+    args = parser.parse_args()
+
+    states = positions(args.games, args.turns)
+    pickles = [pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+               for state in states]
+    records = [serialization.encode_position(*state) for state in states]
+
+    rows = [
+        ('pickle', pickles,
+         timed(lambda s: pickle.dumps(s, pickle.HIGHEST_PROTOCOL), states),
+         timed(pickle.loads, pickles)),
+        ('binary', records,
+         timed(lambda s: serialization.encode_position(*s), states),
+         timed(serialization.decode_position, records)),
+    ]
+    print('{0:,} positions'.format(len(states)))
+    print('{0:<8} {1:>10} {2:>12} {3:>12}'.format(
+        'format', 'bytes', 'encode us', 'decode us'))
+    for name, data, encode, decode in rows:
+        print('{0:<8} {1:>10.0f} {2:>12.1f} {3:>12.1f}'.format(
+            name, sum(map(len, data)) / len(data), encode * 1e6,
+            decode * 1e6))
+
+    with tempfile.TemporaryFile() as f:
+        f.write(b''.join(records))
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            start = time.perf_counter()
+            count = sum(1 for _ in serialization.iter_positions(m))
+            seconds = time.perf_counter() - start
+    print('binary from mmap: {0:.1f} us per position'.format(
+        seconds / count * 1e6))
+
+
+if __name__ == '__main__':
+    main()
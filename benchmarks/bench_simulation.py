@@ -0,0 +1,49 @@
+"""Measure how self-play throughput scales with worker processes.
+
+Plays the same games with 1, 2, 4, ... processes up to the number of
+cores, and reports games per second and the parallel efficiency: the
+speedup over one process divided by the number of processes.
+
+    python -m benchmarks.bench_simulation [--games N] [--max-processes N]
+"""
+
+import argparse
+import os
+import time
+
+from settling import simulation
+
+
+def games_per_second(games, processes):
+    start = time.perf_counter()
+    for _ in simulation.simulate(games, processes=processes):
+        pass
+    return games / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--max-processes', type=int,
+                        default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    counts = [1]
+    while counts[-1] * 2 <= args.max_processes:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != args.max_processes:
+        counts.append(args.max_processes)
+
+    print('{0:,} games'.format(args.games))
+    print('{0:>9} {1:>12} {2:>11}'.format(
+        'processes', 'games/s', 'efficiency'))
+    baseline = None
+    for processes in counts:
+        rate = games_per_second(args.games, processes)
+        baseline = baseline or rate
+        print('{0:>9} {1:>12,.1f} {2:>10.0%}'.format(
+            processes, rate, rate / (baseline * processes)))
+
+
+if __name__ == '__main__':
+    main()
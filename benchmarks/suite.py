@@ -0,0 +1,301 @@
+"""Time the hot paths, save baselines and flag regressions.
+
+Each case times one operation and reports the best time per call over
+several repeats, and size cases report the bytes a structure holds.
+Results can be saved as a JSON baseline, and later runs compared with
+it: any case slower or larger than its baseline by more than the
+threshold is flagged, and the run exits with status 1.
+
+    python -m benchmarks.suite [--save FILE] [--compare FILE]
+                               [--threshold FRACTION] [--filter TEXT]
+                               [--repeat N]
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from copy import deepcopy
+
+from benchmarks import bench_board_memory
+from settling import board
+from settling import board_topology
+from settling import game_constants
+from settling import hexagon_utils as hx
+from settling.board_geometry import StandardBoard
+from settling.game import Game
+from settling.player import RandomPlayer
+
+# name -> (setup, calls per timing). setup returns the function to time.
+CASES = {}
+# name -> function returning the bytes measured.
+SIZES = {}
+
+
+def case(name, number):
+    def register(setup):
+        CASES[name] = (setup, number)
+        return setup
+    return register
+
+
+def size_case(name):
+    def register(measure):
+        SIZES[name] = measure
+        return measure
+    return register
+
+
+def new_board():
+    return board.Board(game_constants.STANDARD_TILE_ORDER,
+                       game_constants.STANDARD_NUMBER_ORDER,
+                       game_constants.STANDARD_PORT_MAP,
+                       StandardBoard())
+
+
+def populated_board():
+    """A board part way through a game: eight towns, a city and roads.
+    """
+    b = new_board()
+    rng = random.Random(0)
+    for i in range(8):
+        player = 'player{0}'.format(i % 4)
+        site = rng.choice(b.legal_town_sites(player, setup=True))
+        b.add_town(site[0], site[1], player)
+        for _ in range(2):
+            road = rng.choice(b.legal_roads(player))
+            b.add_road(road[0], road[1], player)
+    b.upgrade_town(site[0], site[1], player)
+    return b
+
+
+@case('hexagon_utils.hexagon_from_ordinal', 10000)
+def hexagon_from_ordinal():
+    return lambda: [hx.hexagon_from_ordinal(o) for o in range(37)]
+
+
+@case('hexagon_utils.ordinal_from_hexagon', 10000)
+def ordinal_from_hexagon():
+    hexagons = [hx.hexagon_from_ordinal(o) for o in range(37)]
+    return lambda: [hx.ordinal_from_hexagon(h) for h in hexagons]
+
+
+@case('hexagon_utils.rso_from_hexagon', 10000)
+def rso_from_hexagon():
+    hexagons = [hx.hexagon_from_ordinal(o) for o in range(37)]
+    return lambda: [hx.rso_from_hexagon(h) for h in hexagons]
+
+
+@case('StandardBoard.vertex_synonyms (cold)', 20)
+def vertex_synonyms_cold():
+    """Build the shared topology from scratch before the query.
+    """
+    def query():
+        board_topology._shared_topologies.clear()
+        StandardBoard().vertex_synonyms((0, 0, 0), 0)
+    return query
+
+
+@case('StandardBoard.vertex_synonyms (warm)', 10000)
+def vertex_synonyms_warm():
+    geometry = StandardBoard()
+    geometry.vertex_synonyms((0, 0, 0), 0)
+    return lambda: [geometry.vertex_synonyms((1, -1, 0), v)
+                    for v in range(6)]
+
+
+@case('StandardBoard.edge_synonyms (warm)', 10000)
+def edge_synonyms_warm():
+    geometry = StandardBoard()
+    return lambda: [geometry.edge_synonyms((1, -1, 0), e) for e in range(6)]
+
+
+@case('Board.add_town', 2000)
+def add_town():
+    empty = new_board()
+
+    def build():
+        b = empty.snapshot()
+        b.add_town((0, 0, 0), 0, 'player1')
+    return build
+
+
+@case('Board.has_road', 10000)
+def has_road():
+    b = populated_board()
+    return lambda: [b.has_road((0, 0, 0), e, 'player1') for e in range(6)]
+
+
+@case('Board.__deepcopy__', 10000)
+def board_deepcopy():
+    b = populated_board()
+    return lambda: deepcopy(b)
+
+
+@case('Board copy and first write', 2000)
+def copy_and_write():
+    b = populated_board()
+    road = b.legal_roads('player0')[0]
+
+    def copy_and_write():
+        copied = deepcopy(b)
+        copied.add_road(road[0], road[1], 'player0')
+    return copy_and_write
+
+
+@case('Board write and undo', 2000)
+def write_and_undo():
+    """The in-place alternative to copying a board for each move.
+    """
+    b = populated_board()
+    road = b.legal_roads('player0')[0]
+
+    def write_and_undo():
+        mark = b.undo_mark()
+        b.add_road(road[0], road[1], 'player0')
+        b.undo_to(mark)
+    return write_and_undo
+
+
+@case('random_standard_board', 200)
+def random_standard_board():
+    rng = random.Random(0)
+    return lambda: board.random_standard_board(rng)
+
+
+@case('Game.game_loop', 5)
+def game_loop():
+    """A full four player game with seeded players and dice, so every
+    run plays the same game.
+    """
+    def play():
+        rng = random.Random(0)
+        players = [RandomPlayer('player{0}'.format(i), random.Random(i))
+                   for i in range(4)]
+        game = Game(board.random_standard_board(rng), players,
+                    lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                    max_turns=1000)
+        game.game_loop()
+    return play
+
+
+@size_case('Board bytes per board')
+def board_bytes():
+    """The memory held by one board part way through a game, counted as
+    bench_board_memory counts it, so index work cannot quietly undo the
+    compact storage.
+    """
+    return bench_board_memory.board_size(
+        bench_board_memory.populated_board())
+
+
+def run(names, repeat):
+    """Return the best seconds per call of each named case, and the
+    bytes of each named size case.
+    """
+    results = {}
+    for name in names:
+        if name in SIZES:
+            results[name] = SIZES[name]()
+            continue
+        setup, number = CASES[name]
+        function = setup()
+        times = timeit.repeat(function, number=number, repeat=repeat)
+        results[name] = min(times) / number
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline, result, ratio, flag) rows.
+
+    flag is 'slower' or 'faster' beyond the threshold, 'larger' or
+    'smaller' for size cases, and otherwise ''.
+    """
+    rows = []
+    for name, value in results.items():
+        before = baseline.get(name)
+        if before is None:
+            rows.append((name, None, value, None, 'new'))
+            continue
+        if name in SIZES:
+            worse, better = 'larger', 'smaller'
+        else:
+            worse, better = 'slower', 'faster'
+        ratio = value / before
+        if ratio > 1 + threshold:
+            flag = worse
+        elif ratio < 1 - threshold:
+            flag = better
+        else:
+            flag = ''
+        rows.append((name, before, value, ratio, flag))
+    return rows
+
+
+def format_time(seconds):
+    if seconds is None:
+        return '-'
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{0:.2f}{1}'.format(seconds / scale, unit)
+    return '{0:.0f}ns'.format(seconds / 1e-9)
+
+
+def format_value(name, value):
+    if value is not None and name in SIZES:
+        return '{0:,}B'.format(value)
+    return format_time(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--save', help='write the results to FILE')
+    parser.add_argument('--compare', help='compare with a baseline FILE')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='flag cases slower or larger by this '
+                        'fraction')
+    parser.add_argument('--filter', default='',
+                        help='only run cases whose name contains TEXT')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    names = [name for name in list(CASES) + list(SIZES)
+             if args.filter in name]
+    results = run(names, args.repeat)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    rows = compare(results, baseline, args.threshold)
+    width = max(len(name) for name in names)
+    print('{0:<{w}} {1:>10} {2:>10} {3:>7}'.format(
+        'case', 'baseline', 'result', 'ratio', w=width))
+    for name, before, value, ratio, flag in rows:
+        print('{0:<{w}} {1:>10} {2:>10} {3:>7} {4}'.format(
+            name, format_value(name, before), format_value(name, value),
+            '-' if ratio is None else '{0:.2f}x'.format(ratio), flag,
+            w=width))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+
+    regressions = [row[0] for row in rows if row[4] in ('slower', 'larger')]
+    if regressions:
+        print('{0} regression(s) beyond {1:.0%}: {2}'.format(
+            len(regressions), args.threshold, ', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
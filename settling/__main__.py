@@ -0,0 +1,165 @@
+"""Command line entry point.
+
+    python -m settling simulate [--games N] [--processes N] ...
+    python -m settling replay FILE [--game N] [--turn N]
+    python -m settling bot
+    python -m settling tournament --bot NAME=MODULE:CLASS ... [--rounds N]
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from settling import action_log
+from settling import bot_protocol
+from settling import simulation
+from settling import tournament
+from settling.instrumentation import Instrumentation
+from settling.player import RandomPlayer
+
+
+def simulate(args):
+    summary = simulation.Summary()
+    instrumentation = Instrumentation() if args.profile else None
+    output = open(args.output, 'w') if args.output else None
+    log_file = open(args.log, 'wb') if args.log else None
+    log = action_log.ActionLog(log_file) if log_file else None
+    try:
+        results = simulation.simulate(
+            args.games, seed=args.seed, processes=args.processes,
+            chunksize=args.chunksize, players=args.players,
+            max_turns=args.max_turns, instrumentation=instrumentation,
+            log=log,
+        )
+        for result in results:
+            summary.add(result)
+            if output is not None:
+                output.write(json.dumps(result._asdict()) + '\n')
+            if args.progress and summary.games % args.progress == 0:
+                print('{0:,} games, {1:,.1f} games/s'.format(
+                    summary.games, summary.games_per_second),
+                    file=sys.stderr)
+    finally:
+        if output is not None:
+            output.close()
+        if log_file is not None:
+            log_file.close()
+    print(summary.report())
+    if instrumentation is not None:
+        with open(args.profile, 'w') as f:
+            f.write(instrumentation.to_json(indent=2))
+
+
+def replay(args):
+    games = action_log.read_games(action_log.map_file(args.file))
+    if args.game is None:
+        for number, game in enumerate(games):
+            print('game {0}: {1} turns, winner {2}'.format(
+                number, game.turns, game.winner))
+        return
+    game = games[args.game]
+    turn = game.turns if args.turn is None else args.turn
+    position = game.position(turn)
+    print('game {0}, start of turn {1}, {2} to move'.format(
+        args.game, position.turns, game.players[position.current]))
+    points = position.board.victory_points()
+    for player in game.players:
+        print('{0}: {1} points, cards {2}'.format(
+            player, points.get(player, 0),
+            ' '.join(sorted(position.hands[player].cards))))
+
+
+def bot(args):
+    def make_player(name, options):
+        return RandomPlayer(name, random.Random(options.get('seed')))
+    bot_protocol.serve(make_player)
+
+
+def play_tournament(args):
+    bots = [tournament.parse_bot(bot) for bot in args.bot]
+    t = tournament.Tournament(
+        bots, seats=args.seats, rounds=args.rounds, seed=args.seed,
+        max_turns=args.max_turns, processes=args.processes,
+        checkpoint=args.checkpoint, confidence=args.confidence,
+        early_stop=not args.play_all)
+    for result in t.run():
+        if args.progress and t.played % args.progress == 0:
+            print(t.report(), file=sys.stderr)
+    print(t.report())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m settling')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    sim = commands.add_parser('simulate', help='run self-play games',
+                              description=simulation.__doc__)
+    sim.add_argument('--games', type=int, default=1000)
+    sim.add_argument('--seed', type=int, default=0,
+                     help='seed of the first game')
+    sim.add_argument('--processes', type=int, default=None,
+                     help='worker processes (default: one per core)')
+    sim.add_argument('--chunksize', type=int, default=None,
+                     help='games handed to a worker at a time')
+    sim.add_argument('--players', type=int,
+                     default=simulation.DEFAULT_PLAYERS)
+    sim.add_argument('--max-turns', type=int,
+                     default=simulation.DEFAULT_MAX_TURNS)
+    sim.add_argument('--output', help='write each result as a JSON line')
+    sim.add_argument('--progress', type=int, default=0,
+                     help='report progress every N games')
+    sim.add_argument('--profile',
+                     help='time each phase and player, in one process, '
+                          'and write the timings to FILE as JSON')
+    sim.add_argument('--log',
+                     help='record every game, in one process, to FILE')
+    sim.set_defaults(run=simulate)
+
+    rep = commands.add_parser('replay', help='look through a game log',
+                              description=action_log.__doc__)
+    rep.add_argument('file')
+    rep.add_argument('--game', type=int,
+                     help='show a position from game N (default: list '
+                          'the games)')
+    rep.add_argument('--turn', type=int,
+                     help='show the start of turn N (default: the end)')
+    rep.set_defaults(run=replay)
+
+    serve = commands.add_parser('bot', help='serve random moves to a '
+                                'RemotePlayer over stdin and stdout',
+                                description=bot_protocol.__doc__)
+    serve.set_defaults(run=bot)
+
+    tour = commands.add_parser('tournament', help='rate bots against '
+                               'each other', description=tournament.__doc__,
+                               formatter_class=argparse.RawTextHelpFormatter)
+    tour.add_argument('--bot', action='append', required=True,
+                      help='a bot, as name=module:attribute[,key=value...]')
+    tour.add_argument('--seats', type=int, default=2,
+                      help='players in each game')
+    tour.add_argument('--rounds', type=int, default=100)
+    tour.add_argument('--seed', type=int, default=0,
+                      help='seed of the first round')
+    tour.add_argument('--max-turns', type=int,
+                      default=tournament.DEFAULT_MAX_TURNS)
+    tour.add_argument('--processes', type=int, default=None,
+                      help='worker processes (default: one per core)')
+    tour.add_argument('--checkpoint',
+                      help='save progress to FILE, and resume from it')
+    tour.add_argument('--confidence', type=float, default=0.95,
+                      help='of the rating intervals')
+    tour.add_argument('--play-all', action='store_true',
+                      help='play every round, even once the standings '
+                           'are settled')
+    tour.add_argument('--progress', type=int, default=0,
+                      help='report standings every N games')
+    tour.set_defaults(run=play_tournament)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
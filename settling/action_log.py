@@ -0,0 +1,363 @@
+"""An append-only log of everything that changes a game, and its replay.
+
+A Game given an ActionLog writes to it, as they happen:
+  - every road, town and city placed;
+  - every roll, and every move of the robber;
+  - every card taken into or out of a hand;
+  - the start of every turn, and the end of the game.
+
+A log is a header naming the players, followed by fixed size EVENT
+records. Every snapshot_every turns, and when the log begins, it also
+writes a SNAPSHOT event followed by a serialization position record of
+the whole game. Any number of games can be written one after another
+to the same file.
+
+Headers and snapshots are padded to a whole number of events, so a
+file is an array of events with a few stretches of other data in it.
+read_games indexes a whole file with a handful of NumPy passes over
+that array, and Python only steps from one snapshot or game to the
+next. The position at the start of any turn is then rebuilt from the
+nearest snapshot before it, plus the events since.
+
+    with open('games.log', 'wb') as f:
+        Game(board, players, roll, log=ActionLog(f)).game_loop()
+    for replay in read_games(map_file('games.log')):
+        position = replay.position(50)
+"""
+
+import bisect
+import mmap
+import struct
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from settling import game_constants
+from settling import serialization
+
+VERSION = 1
+MAGIC = b'STLG'
+
+# magic, version, player count. The player names follow, each as a
+# length byte and UTF-8 bytes, padded to a whole number of events.
+HEADER = struct.Struct('<4sBB')
+# kind, seat, value, count
+EVENT = struct.Struct('<BBHI')
+EVENT_DTYPE = np.dtype([('kind', 'u1'), ('seat', 'u1'),
+                        ('value', '<u2'), ('count', '<u4')])
+
+# Event kinds, with the meaning of their value and count.
+TURN = 1        # -, the turn number
+ROLL = 2        # the number rolled, -
+ROBBER = 3      # the robber's new ordinal, -
+ROAD = 4        # edge id, -
+TOWN = 5        # vertex id, -
+CITY = 6        # vertex id, -
+GRANT = 7       # index in RESOURCE_TILE_TYPES, cards given
+SPEND = 8       # index in RESOURCE_TILE_TYPES, cards taken
+SNAPSHOT = 9    # -, size of the unpadded record that follows
+END = 10        # -, turns played; seat is the winner
+
+# The seat of events that belong to no player, and of a game without a
+# winner.
+NO_SEAT = 255
+
+Event = namedtuple('Event', ['kind', 'seat', 'value', 'count'])
+
+_RESOURCE_CODES = {r: i for i, r in
+                   enumerate(game_constants.RESOURCE_TILE_TYPES)}
+_BUILD_EVENTS = {'road': ROAD, 'town': TOWN, 'city': CITY}
+
+
+class ActionLog:
+    """Write a game's events to a binary file object, as it is played.
+
+    Events are buffered and written out at the start of each turn and
+    at the end of the game.
+    """
+    def __init__(self, file, snapshot_every=20):
+        self.file = file
+        self.snapshot_every = snapshot_every
+        self.started = False
+        self._seats = {}
+        self._buffer = bytearray()
+        self._snapshot_turn = None
+
+    def begin(self, game):
+        """Start a game's log with its players and a snapshot.
+        """
+        names = [player.name for player in game.players]
+        self._seats = {name: seat for seat, name in enumerate(names)}
+        self._buffer += HEADER.pack(MAGIC, VERSION, len(names))
+        for name in names:
+            serialization.write_name(self._buffer, name)
+        _pad(self._buffer)
+        self._snapshot(game, 0)
+        self.started = True
+
+    def turn(self, game, seat):
+        """Record the start of a turn, taking a snapshot if one is due.
+        """
+        turns = game.turns
+        if turns % self.snapshot_every == 0 and \
+                turns != self._snapshot_turn:
+            self._snapshot(game, seat)
+        self._event(TURN, seat, 0, turns)
+        self.flush()
+
+    def roll(self, number):
+        self._event(ROLL, NO_SEAT, number, 0)
+
+    def robber(self, board):
+        self._event(ROBBER, NO_SEAT, board._robber, 0)
+
+    def build(self, board, piece, hexagon_coord, corner, player):
+        """Record a road, town or city placed by player.
+        """
+        topology = board._topology
+        if piece == 'road':
+            value = topology.edge_id(hexagon_coord, corner)
+        else:
+            value = topology.vertex_id(hexagon_coord, corner)
+        self._event(_BUILD_EVENTS[piece], self._seats[player], value, 0)
+
+    def grant(self, player, cards):
+        self._cards(GRANT, player, cards)
+
+    def spend(self, player, cards):
+        self._cards(SPEND, player, cards)
+
+    def end(self, game, winner):
+        seat = NO_SEAT if winner is None else self._seats[winner]
+        self._event(END, seat, 0, game.turns)
+        self.flush()
+        self.started = False
+
+    def flush(self):
+        self.file.write(self._buffer)
+        self._buffer.clear()
+
+    def _cards(self, kind, player, cards):
+        seat = self._seats[player]
+        for card, count in Counter(cards).items():
+            self._event(kind, seat, _RESOURCE_CODES[card], count)
+
+    def _event(self, kind, seat, value, count):
+        self._buffer += EVENT.pack(kind, seat, value, count)
+
+    def _snapshot(self, game, seat):
+        record = serialization.encode_position(game.board, game.hands,
+                                               game.turns, seat)
+        self._event(SNAPSHOT, seat, 0, len(record))
+        self._buffer += record
+        _pad(self._buffer)
+        self._snapshot_turn = game.turns
+
+
+class Replay:
+    """One game from a log, as found by read_games.
+
+    buffer can be bytes, a memoryview or an mmap.
+    """
+    def __init__(self, buffer, offset, players, turn_offsets, snapshots,
+                 end, finished, winner):
+        self.buffer = buffer
+        self.offset = offset
+        self.players = players
+        self.end = end
+        self.finished = finished
+        self.winner = winner
+        # turn -> offset of its TURN event
+        self._turn_offsets = turn_offsets
+        # turn each snapshot was taken at, and offsets of their records
+        self._snapshot_turns = [turn for turn, _ in snapshots]
+        self._snapshot_offsets = [offset for _, offset in snapshots]
+
+    @property
+    def turns(self):
+        """Return the number of turns in the log.
+        """
+        return max(self._turn_offsets, default=-1) + 1
+
+    def position(self, turn):
+        """Return the serialization.Position at the start of turn.
+
+        For a finished game, turn can also be the number of turns
+        played, for the position the game ended in.
+        """
+        stop = self._turn_offsets.get(turn)
+        if stop is None:
+            if not (self.finished and turn == self.turns):
+                raise ValueError("No turn {0} in the log.".format(turn))
+            stop = self.end - EVENT.size
+        index = bisect.bisect_right(self._snapshot_turns, turn) - 1
+        position, offset = serialization.read_position(
+            self.buffer, self._snapshot_offsets[index])
+        position = self._apply(position, _padded(offset), stop)
+        if turn in self._turn_offsets:
+            current = EVENT.unpack_from(self.buffer, stop)[1]
+        else:
+            current = (position.current + 1) % len(self.players)
+        return position._replace(turns=turn, current=current)
+
+    def events(self):
+        """Yield every Event in the game, in order.
+
+        Snapshots are skipped over, though their SNAPSHOT events are
+        included.
+        """
+        buffer = self.buffer
+        offset = _read_header(buffer, self.offset)[1]
+        while offset < self.end:
+            event = Event(*EVENT.unpack_from(buffer, offset))
+            offset += EVENT.size
+            if event.kind == SNAPSHOT:
+                offset += _padded(event.count)
+            yield event
+
+    def _apply(self, position, offset, stop):
+        """Play the events from offset up to stop onto position.
+        """
+        board, hands, turns, current = position
+        names = self.players
+        topology = board._topology
+        resources = game_constants.RESOURCE_TILE_TYPES
+        for kind, seat, value, count in EVENT.iter_unpack(
+                self.buffer[offset:stop]):
+            if kind == TURN:
+                turns, current = count, seat
+            elif kind == ROBBER:
+                board.move_robber(topology.hexagons[value])
+            elif kind == ROAD:
+                board.add_road(*topology.edge_aliases[value][0],
+                               player=names[seat])
+            elif kind == TOWN:
+                board.add_town(*topology.vertex_aliases[value][0],
+                               player=names[seat])
+            elif kind == CITY:
+                board.upgrade_town(*topology.vertex_aliases[value][0],
+                                   player=names[seat])
+            elif kind == GRANT:
+                hands[names[seat]].add_resources([resources[value]] * count)
+            elif kind == SPEND:
+                hands[names[seat]].remove_resources(
+                    [resources[value]] * count)
+            elif kind != ROLL:
+                raise ValueError("Unexpected event kind {0}.".format(kind))
+        return serialization.Position(board, hands, turns, current)
+
+
+def read_games(buffer):
+    """Return a Replay for each game written one after another in buffer.
+
+    Every game in buffer is indexed at once: the whole buffer is viewed
+    as an array of events, the candidate TURN, SNAPSHOT and END events
+    are picked out with NumPy, and then those that fall inside headers
+    and snapshot records are thrown away.
+    """
+    size = EVENT.size
+    if len(buffer) % size:
+        raise ValueError("Log is truncated.")
+    events = np.frombuffer(buffer, dtype=EVENT_DTYPE)
+    games, skip_starts, skip_ends = _find_games(buffer, events)
+
+    turns = np.flatnonzero(events['kind'] == TURN)
+    inside = np.searchsorted(skip_starts, turns, 'right') - 1
+    turns = turns[turns >= np.asarray(skip_ends)[inside]]
+    turn_numbers = events['count'][turns].tolist()
+    turn_offsets = (turns * size).tolist()
+    first = np.searchsorted(turns, [game[0] for game in games]).tolist()
+    last = np.searchsorted(turns, [game[3] for game in games]).tolist()
+    replays = []
+    for (start, players, snapshots, end, finished, winner), i, j in zip(
+            games, first, last):
+        snapshots = [(serialization.POSITION_HEADER.unpack_from(
+                      buffer, offset)[2], offset) for offset in snapshots]
+        replays.append(Replay(
+            buffer, start * size, players,
+            dict(zip(turn_numbers[i:j], turn_offsets[i:j])), snapshots,
+            end * size, finished, winner))
+    return replays
+
+
+def _find_games(buffer, events):
+    """Step through the games in events, from one SNAPSHOT or END event
+    to the next.
+
+    Return [start, players, snapshot offsets, end, finished, winner]
+    for each game, with start and end as event indexes. Also return the
+    event indexes where each stretch of other data starts and ends.
+    """
+    size = EVENT.size
+    kinds = events['kind']
+    marks = np.flatnonzero((kinds == SNAPSHOT) | (kinds == END))
+    mark_kinds = kinds[marks].tolist()
+    mark_seats = events['seat'][marks].tolist()
+    mark_counts = events['count'][marks].tolist()
+    marks = marks.tolist()
+    games = []
+    skip_starts = []
+    skip_ends = []
+    index = 0
+    mark = 0
+    while index < len(events):
+        players, header_end = _read_header(buffer, index * size)
+        game = [index, players, [], len(events), False, None]
+        games.append(game)
+        skip_starts.append(index)
+        index = header_end // size
+        skip_ends.append(index)
+        while True:
+            mark = bisect.bisect_left(marks, index, mark)
+            if mark == len(marks):
+                index = len(events)
+                break
+            index = marks[mark] + 1
+            if mark_kinds[mark] == END:
+                seat = mark_seats[mark]
+                game[3:] = [index, True,
+                            None if seat == NO_SEAT else players[seat]]
+                break
+            game[2].append(index * size)
+            skip_starts.append(index)
+            index += _padded(mark_counts[mark]) // size
+            skip_ends.append(index)
+    return games, skip_starts, skip_ends
+
+
+def map_file(path):
+    """Return a read-only memory map of the file at path.
+    """
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _padded(size):
+    """Return size rounded up to a whole number of events.
+    """
+    return -(-size // EVENT.size) * EVENT.size
+
+
+def _pad(out):
+    out += bytes(_padded(len(out)) - len(out))
+
+
+def _read_header(buffer, offset):
+    """Return the player names of the log at offset, and the offset just
+    past its padded header.
+    """
+    if offset + HEADER.size > len(buffer):
+        raise ValueError("Log is truncated.")
+    magic, version, count = HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC:
+        raise ValueError("Not a game log.")
+    if version != VERSION:
+        msg = "Unsupported log version {0}."
+        raise ValueError(msg.format(version))
+    start = offset
+    offset += HEADER.size
+    names = []
+    for _ in range(count):
+        name, offset = serialization.read_name(buffer, offset)
+        names.append(name)
+    return names, start + _padded(offset - start)
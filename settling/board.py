@@ -1,9 +1,43 @@
 import random
-from copy import deepcopy
+import weakref
+from copy import copy
 
-from settling.exceptions import GameRuleViolation
-from settling.board_geometry import StandardBoard
+import numpy as np
+
+from settling.exceptions import GameRuleViolation, ReadOnlyBoardError
+from settling.board_geometry import HexagonalBoard, StandardBoard
 from settling import game_constants
+from settling import hexagon_utils as hx
+from settling import zobrist
+from settling.longest_road import LongestRoad
+from settling.placements import PlacementIndex
+from settling import vertex_table
+from settling.production import ProductionIndex
+
+
+# Tiles types are stored as their index in TILE_TYPES.
+_TILE_CODES = {t: i for i, t in enumerate(game_constants.TILE_TYPES)}
+_WATER = _TILE_CODES['water']
+
+# Older standard port maps put a port on the hexagon (0, -2, -2), which
+# is not on the board. It belongs on (0, -2, 2).
+_LEGACY_PORT_HEXAGONS = {(0, -2, -2): (0, -2, 2)}
+
+# Each vertex is stored in one byte as `player_slot * 2 + is_city`,
+# with 0 meaning empty, which leaves room for 127 players.
+MAX_PLAYERS = 127
+
+# Boards with the same layout share one _Layout, keyed by (topology,
+# layout key), for as long as any board holds it.
+_shared_layouts = weakref.WeakValueDictionary()
+
+
+class _Layout:
+    """What is derived from a board's layout alone: the land masks,
+    ports and vertex table. None of it changes once built.
+    """
+    __slots__ = ('land_vertices', 'land_edges', 'ports', 'vertex_table',
+                 '__weakref__')
 
 
 class Tile:
@@ -13,11 +47,28 @@ class Tile:
 
     Possible Numbers:
        1-6, 8-12
+
+    Tiles are values, built on demand from the board's arrays, so
+    their attributes are read only.
     """
+    __slots__ = ('_tile_type', '_number', '_has_robber')
+
     def __init__(self, tile_type, number, has_robber=False):
-        self.tile_type = tile_type
-        self.number = number
-        self.has_robber = has_robber
+        self._tile_type = tile_type
+        self._number = number
+        self._has_robber = has_robber
+
+    @property
+    def tile_type(self):
+        return self._tile_type
+
+    @property
+    def number(self):
+        return self._number
+
+    @property
+    def has_robber(self):
+        return self._has_robber
 
     def __repr__(self):
         rep = "Tile(tile_type={t!r}, number={n!r}, has_robber={r!r})"
@@ -25,12 +76,34 @@ class Tile:
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
+            return self._fields() == other._fields()
         else:
             return False
 
+    def _fields(self):
+        return (self._tile_type, self._number, self._has_robber)
+
+    def __getstate__(self):
+        return self._fields()
+
+    def __setstate__(self, state):
+        # Tiles pickled before __slots__ carry their attribute dict.
+        if isinstance(state, dict):
+            state = tuple(state.get(key, state.get('_' + key))
+                          for key in ('tile_type', 'number', 'has_robber'))
+        self._tile_type, self._number, self._has_robber = state
+
 
 class Board:
+    # Mutable state that snapshots share until one of them writes.
+    _COPY_ON_WRITE = ('_vertex_state', '_edge_state',
+                      '_player_names', '_player_slots', '_production',
+                      '_longest_road', '_placements')
+    # Everything derived from the arrays, which is rebuilt on unpickling
+    # rather than stored.
+    _INDEXES = ('_hash', '_production', '_robber_candidates',
+                '_longest_road', '_placements')
+
     def __init__(self, tile_order, number_order, port_map, board_geometry):
         """Set up a board from order of tiles/numbers/port/geometry.
 
@@ -47,89 +120,472 @@ class Board:
         self._number_order = number_order
         self._port_map = port_map
         self._board_geometry = board_geometry
-        self._vertices = {}
-        self._edges = {}
+        self._topology = board_geometry.topology
+
+        # Buildings and roads are stored in byte arrays indexed by
+        # canonical vertex and edge id, so every occupancy check is a
+        # single index. Players are stored by slot number:
+        #   - self._vertex_state holds player_slot * 2 + is_city
+        #   - self._edge_state holds player_slot
+        #   - self._player_names[slot] is the player in that slot
+        self._vertex_state = bytearray(self._topology.vertex_count)
+        self._edge_state = bytearray(self._topology.edge_count)
+        self._player_names = [None]
+        self._player_slots = {}
+        self._shared = False
+        self._undo_marks = 0
 
         # Take care of additional setup tasks, creating:
-        #   - self._tiles
-        #   - self._ports
+        #   - self._tile_types, self._tile_numbers and self._robber
+        #   - self._land_vertices, self._land_edges, self._ports and
+        #     self._vertex_table, shared by boards with the same layout
+        #   - the derived indexes: self._hash, self._production,
+        #     self._robber_candidates, self._longest_road and
+        #     self._placements
+        #   - self._history, the undo records of changes made while
+        #     self._undo_marks are held
         self._set_up()
 
     def _set_up(self):
-        # Set up tiles
-        number_index = 0
-        tiles = []
-        for tile in self._tile_order:
-            if tile in game_constants.RESOURCE_TILE_TYPES:
-                # Resource tiles have a number
-                tiles.append(Tile(tile, self._number_order[number_index]))
-                number_index += 1
-            else:
-                # Non-resource tiles have no number.
-                tiles.append(Tile(tile, None))
-        self._tiles = tiles
-
-        # Set up ports
-        ports = {}
-        for hexagon_coord, port_type, vertex_1, vertex_2 in self._port_map:
-            ports[(hexagon_coord, vertex_1)] = port_type
-            ports[(hexagon_coord, vertex_2)] = port_type
-        self._ports = ports
-
+        self._set_up_layout()
         # Place the robber initially
-        desert_filter = lambda tile: tile.tile_type == 'desert'
-        dessert_tile = filter(desert_filter, self._tiles).__next__()
-        dessert_tile.has_robber = True
+        self._robber = self._tile_order.index('desert')
+        self._rebuild_indexes()
 
-    def __deepcopy__(self, memo):
-        # Create a brand new blank board, with the same configuration.
-        new_board = type(self)(
-            tile_order=deepcopy(self._tile_order, memo),
-            number_order=deepcopy(self._number_order, memo),
-            port_map=deepcopy(self._port_map, memo),
-            board_geometry=self._board_geometry
+    def _set_up_layout(self):
+        # Set up tiles. Resource tiles have a number, non-resource
+        # tiles are stored with 0.
+        numbers = iter(self._number_order)
+        self._tile_types = bytearray(
+            _TILE_CODES[tile] for tile in self._tile_order
+        )
+        self._tile_numbers = bytearray(
+            next(numbers) if tile in game_constants.RESOURCE_TILE_TYPES
+            else 0
+            for tile in self._tile_order
         )
+        self._set_up_layout_key()
+        key = self._topology, self._layout_key
+        layout = _shared_layouts.get(key)
+        if layout is None:
+            layout = self._build_layout()
+            _shared_layouts[key] = layout
+        self._layout = layout
+        self._land_vertices = layout.land_vertices
+        self._land_edges = layout.land_edges
+        self._ports = layout.ports
+        self._vertex_table = layout.vertex_table
 
-        # But then set its vertices and edges to contain the same bits
-        # as the current board (but stored in separate objects).
-        new_board._vertices = deepcopy(self._vertices, memo)
-        new_board._edges = deepcopy(self._edges, memo)
+    def _build_layout(self):
+        layout = _Layout()
+        # Byte masks, indexed by vertex and edge id, of where anything
+        # may be built at all.
+        topology = self._topology
+        layout.land_vertices = bytearray(topology.vertex_count)
+        layout.land_edges = bytearray(topology.edge_count)
+        for ordinal in self._land_ordinals():
+            for index in range(6*ordinal, 6*ordinal + 6):
+                layout.land_vertices[topology.tile_vertices[index]] = 1
+                layout.land_edges[topology.tile_edges[index]] = 1
+        # Ports are keyed by canonical vertex id
+        layout.ports = {}
+        vertex_id = topology.vertex_id
+        for hexagon_coord, port_type, vertex_1, vertex_2 in self._port_map:
+            layout.ports[vertex_id(hexagon_coord, vertex_1)] = port_type
+            layout.ports[vertex_id(hexagon_coord, vertex_2)] = port_type
+        layout.vertex_table = vertex_table.build(
+            topology, self._tile_types, self._tile_numbers, layout.ports
+        )
+        return layout
+
+    def _set_up_layout_key(self):
+        # The layout's part of the Zobrist hash, which every rehash
+        # starts from.
+        self._layout_key = zobrist.layout_key(
+            self._tile_order, self._number_order, self._port_map
+        )
+
+    def _load_legacy_state(self, tiles, vertices, edges):
+        """Fill the arrays from state pickled by older boards.
+
+        Older boards kept a list of tiles, and dicts of buildings and
+        roads keyed either by canonical id or by whichever (hexagon,
+        corner) name the caller passed in. The indexes are only rebuilt
+        once the robber, arrays and players are all in place.
+        """
+        self._port_map = _legacy_port_map(self._port_map, self._topology)
+        self._set_up_layout()
+        self._robber = [t.has_robber for t in tiles].index(True)
+        self._vertex_state = bytearray(self._topology.vertex_count)
+        self._edge_state = bytearray(self._topology.edge_count)
+        self._player_names = [None]
+        self._player_slots = {}
+        topology = self._topology
+        for key, (player, building) in vertices.items():
+            if isinstance(key, tuple):
+                key = topology.vertex_id(*key)
+            is_city = building == 'city'
+            self._vertex_state[key] = self._player_slot(player) * 2 + is_city
+        for key, player in edges.items():
+            if isinstance(key, tuple):
+                key = topology.edge_id(*key)
+            self._edge_state[key] = self._player_slot(player)
+        self._rebuild_indexes()
+
+    def _load_state(self, robber, vertex_state, edge_state, player_names,
+                    road_holder):
+        """Replace the robber, roads and buildings, and rebuild the
+        indexes from them.
+
+        vertex_state and edge_state are bytes in the layout of the
+        board's arrays, with player_names giving the players in slots
+        1 onwards. The longest road title goes to road_holder, since
+        who reached the longest road first cannot be told from the
+        roads alone.
+        """
+        self._robber = robber
+        self._vertex_state = bytearray(vertex_state)
+        self._edge_state = bytearray(edge_state)
+        self._player_names = [None]
+        self._player_slots = {}
+        for player in player_names:
+            self._player_slot(player)
+        self._shared = False
+        self._rebuild_indexes()
+        self._longest_road.holder = self._player_slots.get(road_holder, 0)
+
+    def __getstate__(self):
+        # The topology is shared by every board of the same geometry,
+        # so it is looked up again on unpickling rather than stored.
+        # The vertex table and indexes are derived from the layout and
+        # arrays, so they are rebuilt rather than stored too. Only who
+        # holds the longest road cannot be told from the roads alone.
+        state = self.__dict__.copy()
+        del state['_topology']
+        for name in ('_layout', '_vertex_table', '_history',
+                     '_undo_marks') + self._INDEXES:
+            state.pop(name, None)
+        state['_road_holder'] = self.longest_road_holder()
+        return state
+
+    def __setstate__(self, state):
+        legacy_keys = ('_tiles', '_vertices', '_edges')
+        legacy = [state.pop(key, None) for key in legacy_keys]
+        road_holder = state.pop('_road_holder', None)
+        self.__dict__.update(state)
+        self._shared = False
+        self._history = []
+        self._undo_marks = 0
+        self._topology = self._board_geometry.topology
+        if legacy[0] is not None:
+            # Older boards kept no layout arrays, so they are built
+            # from the tile and number orders.
+            self._load_legacy_state(*legacy)
+        else:
+            self._set_up_layout()
+            self._rebuild_indexes()
+        if road_holder is not None:
+            self._longest_road.holder = self._player_slots[road_holder]
+
+    def snapshot(self):
+        """Return a private copy of the board in constant time.
+
+        The copy shares the current roads and buildings with this
+        board. Whichever of the two is modified first takes its own
+        copy of that state just before the change, so neither can ever
+        see the other's modifications.
+
+        The copy starts with nothing to undo, and no undo marks.
+        """
+        new_board = object.__new__(type(self))
+        new_board.__dict__.update(self.__dict__)
+        new_board._history = []
+        new_board._undo_marks = 0
+        new_board._shared = True
+        self._shared = True
         return new_board
 
+    def fork(self):
+        """Return a private copy of the board, as BoardView.fork does.
+        """
+        return self.snapshot()
+
+    def _unshare(self):
+        """Take a private copy of any state shared with a snapshot.
+
+        Must be called by every method before it modifies the board.
+        """
+        if self._shared:
+            for name in self._COPY_ON_WRITE:
+                setattr(self, name, copy(getattr(self, name)))
+            self._shared = False
+
+    def __deepcopy__(self, memo):
+        # The board's contents are all immutable values, so a
+        # snapshot is as good as a deep copy.
+        return self.snapshot()
+
+    def _rebuild_indexes(self):
+        """Recompute everything derived from the tiles and placements.
+
+        The indexes are kept up to date incrementally by every method
+        that modifies the board, so this is only needed when the board
+        is first set up or loaded.
+        """
+        buildings = _occupied(self._vertex_state)
+        edges = _occupied(self._edge_state)
+        self._history = []
+        self._rehash(buildings, edges)
+        self._production = ProductionIndex()
+        self._longest_road = LongestRoad(self._topology)
+        self._placements = PlacementIndex(self._topology,
+                                          self._land_vertices)
+        for vertex_id, state in buildings:
+            self._produce(vertex_id, state >> 1, 1 + (state & 1))
+            self._placements.add_town(vertex_id, state >> 1)
+            if state & 1:
+                self._placements.upgrade_town(state >> 1)
+        for edge_id, state in edges:
+            self._placements.add_road(edge_id, state)
+        self._robber_candidates = None
+        self._longest_road.add_roads([edge_id for edge_id, _ in edges],
+                                     self._vertex_state, self._edge_state)
+
+    def _vertex_owner(self, vertex_id):
+        """Return the player with a building on vertex_id, or None.
+        """
+        state = self._vertex_state[vertex_id]
+        return self._player_names[state >> 1] if state else None
+
+    def longest_road(self, player):
+        """Return the length of player's longest continuous road.
+        """
+        slot = self._player_slots.get(player)
+        return self._longest_road.length(slot) if slot else 0
+
+    def longest_road_holder(self):
+        """Return the player holding the longest road title, or None.
+        """
+        # Slot 0, meaning no holder, holds the name None.
+        return self._player_names[self._longest_road.holder]
+
+    def _land_ordinals(self):
+        return [ordinal for ordinal, code in enumerate(self._tile_types)
+                if code != _WATER]
+
+    def _tile_players(self, ordinal):
+        """Return the players with a building on the tile, in slot order.
+
+        A tile has only six vertices, so reading them from the vertex
+        array is as quick as keeping a list of players for every tile.
+        """
+        vertex_state = self._vertex_state
+        slots = set(vertex_state[vertex_id] >> 1 for vertex_id in
+                    self._topology.tile_vertices[6*ordinal:6*ordinal + 6])
+        slots.discard(0)
+        names = self._player_names
+        return tuple(names[slot] for slot in sorted(slots))
+
+    def robber_position(self):
+        """Return the hexagon coordinate of the tile the robber is on.
+        """
+        return self._topology.hexagons[self._robber]
+
+    def robber_candidates(self):
+        """Return the coordinates of every tile the robber can move to.
+
+        These are all the land tiles, except the robber's current one.
+        They are listed when first asked for after the robber moves, so
+        moving it costs the same however large the board is.
+        """
+        if self._robber_candidates is None:
+            hexagons = self._topology.hexagons
+            self._robber_candidates = tuple(
+                hexagons[ordinal] for ordinal in self._land_ordinals()
+                if ordinal != self._robber
+            )
+        return self._robber_candidates
+
+    def adjacent_players(self, hexagon_coord):
+        """Return the players with a town or city on the given tile, in
+        the order they first built on the board.
+        """
+        ordinal = self._board_geometry.ordinal_from_hexagon(hexagon_coord)
+        return self._tile_players(ordinal)
+
+    def robber_options(self):
+        """Return (hexagon, adjacent players) for every robber candidate.
+        """
+        ordinals = self._topology.ordinals
+        return [(hexagon, self._tile_players(ordinals[hexagon]))
+                for hexagon in self.robber_candidates()]
+
+    def _produce(self, vertex_id, slot, count):
+        """Add count cards per roll to the production at vertex_id of
+        the player in slot.
+
+        Tiles under the robber are skipped.
+        """
+        numbers = self._tile_numbers
+        for ordinal in self._topology.vertex_tiles[vertex_id]:
+            number = numbers[ordinal]
+            if number and ordinal != self._robber:
+                self._production.add(number, slot, self._tile_types[ordinal],
+                                     count)
+
+    def _tile_production(self, ordinal, sign):
+        """Add (sign=1) or remove (sign=-1) everything a tile produces.
+        """
+        number = self._tile_numbers[ordinal]
+        if not number:
+            return
+        resource = self._tile_types[ordinal]
+        tile_vertices = self._topology.tile_vertices
+        for vertex_id in tile_vertices[ordinal * 6:ordinal * 6 + 6]:
+            state = self._vertex_state[vertex_id]
+            if state:
+                count = sign * (1 + (state & 1))
+                self._production.add(number, state >> 1, resource, count)
+
+    def production(self, number):
+        """Return (player, resource, count) for every card number produces.
+
+        This reflects the towns and cities on the board, and skips the
+        tile under the robber.
+        """
+        return self._production.entries(number, self._player_names)
+
+    def _rehash(self, buildings=None, roads=None):
+        """Compute the position's Zobrist hash from scratch.
+
+        The occupied (vertex_id, state) and (edge_id, state) pairs are
+        found from the arrays unless they are passed in.
+        """
+        if buildings is None:
+            buildings = _occupied(self._vertex_state)
+        if roads is None:
+            roads = _occupied(self._edge_state)
+        names = self._player_names
+        key = zobrist.key
+        position_hash = self._layout_key
+        position_hash ^= key(zobrist.ROBBER, self._robber)
+        for vertex_id, state in buildings:
+            kind = zobrist.CITY if state & 1 else zobrist.TOWN
+            position_hash ^= key(kind, vertex_id, names[state >> 1])
+        for edge_id, state in roads:
+            position_hash ^= key(zobrist.ROAD, edge_id, names[state])
+        self._hash = position_hash
+
+    def position_key(self):
+        """Return a 64 bit hash identifying the current position.
+
+        Boards with the same layout, roads, buildings and robber have
+        the same key, however they were reached. Suitable for keying a
+        zobrist.TranspositionTable.
+        """
+        return self._hash
+
+    def placement_state(self):
+        """Return the layout key, robber tile ordinal, player names,
+        building bytes and road bytes of the board.
+
+        The names are listed by player slot, starting with None for the
+        empty slot. Each building byte is twice the slot of its owner,
+        plus one for a city, and each road byte is the slot of its
+        owner. The bytes are copies, so later moves do not change them.
+        """
+        return (self._layout_key, self._robber, tuple(self._player_names),
+                bytes(self._vertex_state), bytes(self._edge_state))
+
+    def _player_slot(self, player):
+        """Return the slot number for a player, assigning one if needed.
+        """
+        slot = self._player_slots.get(player)
+        if slot is None:
+            slot = len(self._player_names)
+            if slot > MAX_PLAYERS:
+                msg = "A board can hold at most {0} players"
+                raise ValueError(msg.format(MAX_PLAYERS))
+            self._player_names.append(player)
+            self._player_slots[player] = slot
+        return slot
+
+    def _tile_at(self, ordinal):
+        number = self._tile_numbers[ordinal]
+        return Tile(game_constants.TILE_TYPES[self._tile_types[ordinal]],
+                    number if number else None,
+                    ordinal == self._robber)
+
+    @property
+    def _tiles(self):
+        """Every tile, in ordinal order, built from the board's arrays.
+        """
+        return [self._tile_at(o) for o in range(len(self._tile_types))]
+
+    @property
+    def _vertices(self):
+        """Buildings as a dict of vertex id -> (player, 'town' or 'city').
+        """
+        names = self._player_names
+        return {vertex_id: (names[state >> 1], 'city' if state & 1 else 'town')
+                for vertex_id, state in enumerate(self._vertex_state)
+                if state}
+
+    @property
+    def _edges(self):
+        """Roads as a dict of edge id -> player.
+        """
+        names = self._player_names
+        return {edge_id: names[state]
+                for edge_id, state in enumerate(self._edge_state)
+                if state}
+
     def tile(self, hexagon_coord):
         """Return the tile object at the given coordinate.
         """
         ordinal = self._board_geometry.ordinal_from_hexagon(hexagon_coord)
-        return self._tiles[ordinal]
+        return self._tile_at(ordinal)
+
+    def vertex_tiles(self, hexagon_coord, vertex):
+        """Return the tiles touching the given vertex.
+        """
+        topology = self._topology
+        vertex_id = topology.vertex_id(hexagon_coord, vertex)
+        return [self._tile_at(o) for o in topology.vertex_tiles[vertex_id]]
 
     def port(self, hexagon_coord, vertex):
         """Return the port at the given vertex, or None.
         """
-        synonyms = self._board_geometry.vertex_synonyms(hexagon_coord, vertex)
-        synonyms.append((hexagon_coord, vertex))
-        for synonym in synonyms:
-            if self._ports.get(synonym) is not None:
-                return self._ports[synonym]
-        return None
+        vertex_id = self._topology.vertex_id(hexagon_coord, vertex)
+        return self._ports.get(vertex_id)
 
     def move_robber(self, to_coord):
         """Remove robber from its position and place on to_coord.
         """
+        to_ordinal = self._board_geometry.ordinal_from_hexagon(to_coord)
+
         # Check that we're moving the robber to a new tile
-        if self.tile(to_coord).has_robber:
+        if to_ordinal == self._robber:
             msg = "Cannot leave robber on current tile"
             raise GameRuleViolation(msg)
 
         # Check that we're moving the robber to a land tile
-        if self.tile(to_coord).tile_type == 'water':
+        if self._tile_types[to_ordinal] == _WATER:
             msg = "Must move robber to land tile."
             raise GameRuleViolation(msg)
 
         # Actually move the robber
-        robber_filter = lambda tile: tile.has_robber
-        current_robber_tile = filter(robber_filter, self._tiles).__next__()
-        current_robber_tile.has_robber = False
-        self.tile(to_coord).has_robber = True
+        self._unshare()
+        self._record('_undo_robber', self._robber, self._robber_candidates)
+        self._hash ^= (zobrist.key(zobrist.ROBBER, self._robber)
+                       ^ zobrist.key(zobrist.ROBBER, to_ordinal))
+        self._place_robber(to_ordinal)
+        self._robber_candidates = None
+
+    def _place_robber(self, to_ordinal):
+        self._tile_production(self._robber, 1)
+        self._tile_production(to_ordinal, -1)
+        self._robber = to_ordinal
 
     def add_road(self, hexagon_coord, edge, player):
         """Add a road on the edge between two tiles.
@@ -138,20 +594,27 @@ class Board:
         which is passed in as `tile_2`
         """
         # Check a road doesn't already exist.
-        if self.has_road(hexagon_coord, edge):
+        topology = self._topology
+        edge_id = topology.edge_id(hexagon_coord, edge)
+        if self._edge_state[edge_id]:
             msg = "Cannot build a road where a road already exists."
             raise GameRuleViolation(msg)
 
         # Check that road isn't between two water tiles.
-        neighbors = self._board_geometry.hexagon_neighbors(hexagon_coord)
-        current_tile_type = self.tile(hexagon_coord).tile_type
-        opposite_tile_type = self.tile(neighbors[edge]).tile_type
-        if current_tile_type == 'water' and opposite_tile_type == 'water':
+        if not self._land_edges[edge_id]:
             msg = "Road must be built adjacent to land."
             raise GameRuleViolation(msg)
 
         # If no error is thrown, Add the road.
-        self._edges[(hexagon_coord,  edge)] = player
+        self._longest_road.measure()
+        self._unshare()
+        record = self._record('_undo_road', edge_id, player)
+        slot = self._player_slot(player)
+        self._edge_state[edge_id] = slot
+        self._hash ^= zobrist.key(zobrist.ROAD, edge_id, player)
+        record.append(self._longest_road.add_road(
+            edge_id, self._vertex_state, self._edge_state))
+        record.append(self._placements.add_road(edge_id, slot))
 
     def add_town(self, hexagon_coord, vertex, player):
         """Add a town to a tile's vertex for a give player.
@@ -160,20 +623,33 @@ class Board:
         tile/vertex combinations with the exact same effect.
         """
         # Check that a city or town doesn't already exist.
-        h, v = hexagon_coord, vertex
-        if self.has_town(h, v) or self.has_city(h, v):
+        topology = self._topology
+        vertex_id = topology.vertex_id(hexagon_coord, vertex)
+        if self._vertex_state[vertex_id]:
             msg = "Cannot build a town where a town or city exists."
             raise GameRuleViolation(msg)
 
         # Check that there is at least one land tile.
-        synonyms = self._board_geometry.vertex_synonyms(hexagon_coord, vertex)
-        all_water = all(self.tile(h).tile_type == 'water' for h, v in synonyms)
-        if all_water:
+        if not self._land_vertices[vertex_id]:
             msg = "Towns must be built near land"
             raise GameRuleViolation(msg)
 
+        # Check the distance rule: no building on a neighboring vertex.
+        if not self._placements.open_vertices[vertex_id]:
+            msg = "Towns must be at least two roads from any other town."
+            raise GameRuleViolation(msg)
+
         # If no error is thrown, add the city
-        self._vertices[(hexagon_coord, vertex)] = (player, 'town')
+        self._longest_road.measure()
+        self._unshare()
+        record = self._record('_undo_town', vertex_id, player)
+        slot = self._player_slot(player)
+        self._vertex_state[vertex_id] = slot * 2
+        self._hash ^= zobrist.key(zobrist.TOWN, vertex_id, player)
+        self._produce(vertex_id, slot, 1)
+        record.append(self._longest_road.add_town(
+            vertex_id, self._vertex_state, self._edge_state))
+        record.append(self._placements.add_town(vertex_id, slot))
 
     def upgrade_town(self, hexagon_coord, vertex, player):
         """Turn a town into a city.
@@ -188,7 +664,240 @@ class Board:
             msg = "Cannot upgrade a town you don't own"
             raise GameRuleViolation(msg)
         else:
-            self._vertices[(hexagon_coord, vertex)] = (player, 'city')
+            vertex_id = self._topology.vertex_id(hexagon_coord, vertex)
+            self._unshare()
+            self._record('_undo_city', vertex_id, player)
+            self._vertex_state[vertex_id] |= 1
+            self._hash ^= (zobrist.key(zobrist.TOWN, vertex_id, player)
+                           ^ zobrist.key(zobrist.CITY, vertex_id, player))
+            slot = self._player_slots[player]
+            self._produce(vertex_id, slot, 1)
+            self._placements.upgrade_town(slot)
+
+    def undo(self):
+        """Take back the most recent road, town, city or robber move.
+
+        Everything derived from the board, its position key included,
+        is restored exactly, in time proportional to what that change
+        touched. A search can so explore moves on a single board
+        instead of copying it for each one:
+
+            mark = board.undo_mark()
+            board.add_road(hexagon_coord, edge, player)
+            ...
+            board.undo_to(mark)
+
+        Changes are only recorded while an undo mark is held, so a board
+        nobody searches on keeps no history.
+        """
+        if not self._history:
+            raise ValueError("Nothing to undo.")
+        self._unshare()
+        name, position_hash, player_count, *args = self._history.pop()
+        getattr(self, name)(*args)
+        self._hash = position_hash
+        for player in self._player_names[player_count:]:
+            del self._player_slots[player]
+        del self._player_names[player_count:]
+
+    def undo_depth(self):
+        """Return the number of changes undo can take back.
+        """
+        return len(self._history)
+
+    def undo_mark(self):
+        """Start recording changes, and return a mark to undo_to.
+
+        Every mark must be given back to undo_to, or the board goes on
+        recording its changes.
+        """
+        self._undo_marks += 1
+        return len(self._history)
+
+    def undo_to(self, mark):
+        """Undo the changes made since mark was taken, and release it.
+        """
+        if not self._undo_marks:
+            raise ValueError("No undo mark is held.")
+        if not 0 <= mark <= len(self._history):
+            msg = "Cannot undo to mark {0}."
+            raise ValueError(msg.format(mark))
+        while len(self._history) > mark:
+            self.undo()
+        self._undo_marks -= 1
+
+    def _record(self, name, *args):
+        """Push an undo record for a change about to be made.
+
+        name is the method that reverses the change, given args and
+        anything later appended to the returned record. The position
+        key and players are restored by undo itself. Nothing is kept
+        unless an undo mark is held.
+        """
+        if not self._undo_marks:
+            return []
+        record = [name, self._hash, len(self._player_names)]
+        record.extend(args)
+        self._history.append(record)
+        return record
+
+    def _undo_robber(self, ordinal, candidates):
+        self._place_robber(ordinal)
+        self._robber_candidates = candidates
+
+    def _undo_road(self, edge_id, player, road_token, added):
+        self._edge_state[edge_id] = 0
+        self._longest_road.undo_road(road_token)
+        self._placements.undo_road(self._player_slots[player], added)
+
+    def _undo_town(self, vertex_id, player, road_token, closed):
+        slot = self._player_slots[player]
+        self._produce(vertex_id, slot, -1)
+        self._vertex_state[vertex_id] = 0
+        self._longest_road.undo_town(road_token)
+        self._placements.undo_town(slot, closed)
+
+    def _undo_city(self, vertex_id, player):
+        slot = self._player_slots[player]
+        self._produce(vertex_id, slot, -1)
+        self._vertex_state[vertex_id] &= ~1
+        self._placements.undo_upgrade(slot)
+
+    def legal_town_sites(self, player, setup=False):
+        """Return (hexagon_coord, vertex) for every place player may
+        build a town.
+
+        Towns must touch land and keep the distance rule. Outside of
+        setup they must also be at the end of one of player's roads.
+        """
+        return self._vertex_names(self._open_sites(player, setup))
+
+    def legal_roads(self, player, from_vertex=None):
+        """Return (hexagon_coord, edge) for every place player may build
+        a road.
+
+        A road must touch land and join player's network: one of their
+        buildings, or the end of one of their roads that another
+        player hasn't built on. Passing from_vertex as a
+        (hexagon_coord, vertex) pair only returns roads leaving that
+        vertex, such as the road placed next to a town during setup.
+        """
+        topology = self._topology
+        network = self._network(player)
+        if from_vertex is not None:
+            network.intersection_update([topology.vertex_id(*from_vertex)])
+        edge_state = self._edge_state
+        land_edges = self._land_edges
+        edge_ids = set(
+            edge_id for vertex_id in network
+            for edge_id in topology.vertex_edges[vertex_id]
+            if not edge_state[edge_id] and land_edges[edge_id]
+        )
+        return [topology.edge_aliases[edge_id][0]
+                for edge_id in sorted(edge_ids)]
+
+    def can_build_road(self, hexagon_coord, edge, player):
+        """Return True if player may build a road on the edge.
+        """
+        edge_id = self._topology.edge_id(hexagon_coord, edge)
+        if self._edge_state[edge_id] or not self._land_edges[edge_id]:
+            return False
+        network = self._network(player)
+        return any(vertex_id in network
+                   for vertex_id in self._topology.edge_vertices[edge_id])
+
+    def can_build_town(self, hexagon_coord, vertex, player, setup=False):
+        """Return True if player may build a town on the vertex.
+        """
+        vertex_id = self._topology.vertex_id(hexagon_coord, vertex)
+        if not self._placements.open_vertices[vertex_id]:
+            return False
+        slot = self._player_slots.get(player)
+        return setup or slot is not None and \
+            vertex_id in self._placements.road_vertices(slot)
+
+    def _open_sites(self, player, setup):
+        """Return the open vertex ids, or outside of setup only those
+        player's roads reach.
+        """
+        if setup:
+            return self._placements.open_sites()
+        slot = self._player_slots.get(player)
+        if slot is None:
+            return []
+        return self._placements.open_sites(slot)
+
+    def _network(self, player):
+        """Return the vertices player's next road may start from.
+        """
+        slot = self._player_slots.get(player)
+        if slot is None:
+            return set()
+        placements = self._placements
+        vertex_state = self._vertex_state
+        network = set(placements.buildings(vertex_state, slot))
+        network.update(
+            vertex_id for vertex_id in placements.road_vertices(slot)
+            if vertex_state[vertex_id] >> 1 in (0, slot)
+        )
+        return network
+
+    def legal_city_upgrades(self, player):
+        """Return (hexagon_coord, vertex) for each of player's towns.
+        """
+        slot = self._player_slots.get(player)
+        if slot is None:
+            return []
+        return self._vertex_names(
+            self._placements.towns(self._vertex_state, slot))
+
+    def pieces(self, player):
+        """Return how many roads, towns and cities player has built.
+        """
+        slot = self._player_slots.get(player)
+        roads, towns, cities = (self._placements.pieces(slot) if slot
+                                else (0, 0, 0))
+        return {'road': roads, 'town': towns, 'city': cities}
+
+    def victory_points(self):
+        """Return a dict of the points each player has on the board.
+
+        Towns, cities and the longest road count. Players who have only
+        built roads score 0.
+        """
+        points = {}
+        for slot, player in enumerate(self._player_names[1:], 1):
+            _, towns, cities = self._placements.pieces(slot)
+            points[player] = (towns * game_constants.TOWN_POINTS +
+                              cities * game_constants.CITY_POINTS)
+        holder = self.longest_road_holder()
+        if holder is not None:
+            points[holder] += game_constants.LONGEST_ROAD_POINTS
+        return points
+
+    @property
+    def vertex_table(self):
+        """The read-only NumPy table of vertex scores, indexed by
+        canonical vertex id. See settling.vertex_table.
+        """
+        return self._vertex_table
+
+    def rank_openings(self, player, weights=None, setup=True):
+        """Return the sites player may build a town on, best first.
+
+        Sites are named by (hexagon_coord, vertex) and ranked by their
+        vertex table scores. weights sets the value of a pip of each
+        resource, in RESOURCE_TILE_TYPES order. Outside of setup only
+        sites reached by player's roads are ranked.
+        """
+        sites = self._open_sites(player, setup)
+        ranked = vertex_table.rank(self._vertex_table, sites, weights)
+        aliases = self._topology.vertex_aliases
+        return [aliases[vertex_id][0] for vertex_id in ranked]
+
+    def _vertex_names(self, vertex_ids):
+        aliases = self._topology.vertex_aliases
+        return [aliases[vertex_id][0] for vertex_id in sorted(vertex_ids)]
 
     def has_road(self, hexagon_coord, edge, player=None):
         """Return True if there is a road.
@@ -196,15 +905,10 @@ class Board:
         If the optional player argument is passed in, only return True
         if there is a road owned by that player.
         """
-        road_coords = self._board_geometry.edge_synonyms(hexagon_coord, edge)
-        road_coords.append((hexagon_coord, edge))
+        state = self._edge_state[self._topology.edge_id(hexagon_coord, edge)]
         if player:
-            has_road = any(self._edges.get(road_coord) == player
-                           for road_coord in road_coords)
-        else:
-            has_road = any(self._edges.get(road_coord) is not None
-                           for road_coord in road_coords)
-        return has_road
+            return state != 0 and state == self._player_slots.get(player)
+        return state != 0
 
     def has_town(self, hexagon_coord, vertex, player=None):
         """Return True if there is a town.
@@ -233,28 +937,150 @@ class Board:
 
         If player is None, return True for any town/city.
         """
-        bg = self._board_geometry
-        verts = self._vertices
-        town_coords = bg.vertex_synonyms(hexagon_coord, vertex)
-        town_coords.append((hexagon_coord, vertex))
-        if player:
-            has_town = any(verts.get(town_coord) == (player, town_or_city)
-                           for town_coord in town_coords)
-        else:
-            has_town = any(town_or_city in verts.get(town_coord, (None, None))
-                           for town_coord in town_coords)
-        return has_town
+        vertex_id = self._topology.vertex_id(hexagon_coord, vertex)
+        state = self._vertex_state[vertex_id]
+        is_city = town_or_city == 'city'
+        if not state or state & 1 != is_city:
+            return False
+        return not player or state >> 1 == self._player_slots.get(player)
 
 
-def random_standard_board():
-    # shuffled copies of the three lists
-    tile_order = random.sample(
-        game_constants.STANDARD_LAND_TILE_ORDER,
-        len(game_constants.STANDARD_LAND_TILE_ORDER)
-    )
-    number_order = random.sample(
+class BoardView:
+    """A read-only window onto a live board.
+
+    Views are what players are handed by the game. They answer the
+    same questions as the board they wrap, always reflecting its
+    current state, but raise ReadOnlyBoardError on any attempt to
+    modify it. A player that wants to try out moves can take a private
+    copy of the board with `fork`.
+    """
+    __slots__ = ('_board',)
+
+    _READ_METHODS = frozenset([
+        'tile', 'port', 'has_road', 'has_town', 'has_city', 'position_key',
+        'vertex_tiles', 'production', 'robber_position', 'robber_candidates',
+        'adjacent_players', 'robber_options', 'longest_road',
+        'longest_road_holder', 'legal_town_sites', 'legal_roads',
+        'legal_city_upgrades', 'can_build_road', 'can_build_town',
+        'pieces', 'victory_points', 'vertex_table', 'rank_openings',
+        'placement_state',
+    ])
+    _WRITE_METHODS = frozenset([
+        'add_road', 'add_town', 'upgrade_town', 'move_robber', 'undo',
+        'undo_mark', 'undo_to',
+    ])
+
+    def __init__(self, board):
+        object.__setattr__(self, '_board', board)
+
+    def __getattr__(self, name):
+        if name in self._READ_METHODS:
+            return getattr(self._board, name)
+        elif name in self._WRITE_METHODS:
+            return self._refuse(name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise ReadOnlyBoardError("Cannot modify a read-only board view")
+
+    def _refuse(self, name):
+        def refuse(*args, **kwargs):
+            msg = "Cannot {0} on a read-only board view; fork it first."
+            raise ReadOnlyBoardError(msg.format(name))
+        return refuse
+
+    def fork(self):
+        """Return a private copy of the board that can be modified.
+        """
+        return self._board.snapshot()
+
+
+def _occupied(states):
+    """Return (index, state) for every non-zero byte of states.
+    """
+    indexes = np.flatnonzero(np.frombuffer(states, dtype=np.uint8))
+    return [(index, states[index]) for index in indexes.tolist()]
+
+
+def _legacy_port_map(port_map, topology):
+    """Return port_map with the hexagons of older port maps corrected.
+
+    Ports on any other hexagon that is not on the board are dropped.
+    """
+    ports = []
+    for hexagon_coord, port_type, vertex_1, vertex_2 in port_map:
+        hexagon_coord = _LEGACY_PORT_HEXAGONS.get(hexagon_coord,
+                                                  hexagon_coord)
+        if hexagon_coord in topology.ordinals:
+            ports.append((hexagon_coord, port_type, vertex_1, vertex_2))
+    return tuple(ports)
+
+
+def random_standard_board(rng=random):
+    """Return a standard board with its land tiles and numbers shuffled.
+
+    Pass a random.Random instance as rng for a reproducible board.
+    """
+    # shuffled copies of the land tiles and numbers, surrounded by the
+    # ring of water
+    land_tiles = game_constants.STANDARD_LAND_TILE_ORDER
+    water_tiles = game_constants.STANDARD_TILE_ORDER[len(land_tiles):]
+    tile_order = tuple(rng.sample(land_tiles, len(land_tiles))) + water_tiles
+    number_order = rng.sample(
         game_constants.STANDARD_NUMBER_ORDER,
         len(game_constants.STANDARD_NUMBER_ORDER)
     )
     port_order = game_constants.STANDARD_PORT_MAP
     return Board(tile_order, number_order, port_order, StandardBoard())
+
+
+def random_hexagonal_board(radius, rng=random):
+    """Return a board of the given radius with its land tiles, numbers
+    and ports shuffled.
+
+    Every ring but the last is land, mixed like the standard board's
+    with a desert for each 19 land tiles, and numbered from the
+    standard numbers over and over. The last ring is water, with a
+    port facing land on every other tile. Radius 3 gives the standard
+    board's tiles and numbers, with the ports placed differently.
+
+    Pass a random.Random instance as rng for a reproducible board.
+    """
+    if radius < 1:
+        raise ValueError("A board needs a ring of water around its land.")
+    geometry = HexagonalBoard(radius)
+    land_count = 3 * radius * (radius - 1) + 1
+    standard = game_constants.STANDARD_LAND_TILE_ORDER
+    deserts = max(1, round(land_count / len(standard)))
+    resources = [t for t in standard if t != 'desert']
+    land_tiles = ['desert'] * deserts + [
+        resources[i % len(resources)] for i in range(land_count - deserts)
+    ]
+    numbers = game_constants.STANDARD_NUMBER_ORDER
+    number_order = [numbers[i % len(numbers)]
+                    for i in range(land_count - deserts)]
+    water_count = geometry.max_ordinal + 1 - land_count
+    tile_order = (tuple(rng.sample(land_tiles, len(land_tiles))) +
+                  ('water',) * water_count)
+    number_order = rng.sample(number_order, len(number_order))
+
+    port_types = [port[1] for port in game_constants.STANDARD_PORT_MAP]
+    port_types = [port_types[i % len(port_types)]
+                  for i in range((water_count + 1) // 2)]
+    port_types = rng.sample(port_types, len(port_types))
+    port_map = _shore_ports(geometry.topology, land_count, port_types)
+    return Board(tile_order, number_order, port_map, geometry)
+
+
+def _shore_ports(topology, land_count, port_types):
+    """Return a port map with port_types on every other water tile,
+    from ordinal land_count on, each on the first edge facing land.
+    """
+    port_map = []
+    water = range(land_count, len(topology.hexagons), 2)
+    for port_type, ordinal in zip(port_types, water):
+        hexagon = topology.hexagons[ordinal]
+        edge = next(e for e, n in enumerate(hx.neighbors(hexagon))
+                    if topology.ordinals.get(n, land_count) < land_count)
+        port_map.append((hexagon, port_type, edge, (edge + 1) % 6))
+    return tuple(port_map)
@@ -0,0 +1,274 @@
+"""Random boards that meet balance constraints, generated in bulk.
+
+random_standard_board shuffles the tiles and numbers with no regard
+for how fair the result is. A BoardGenerator draws shuffles a batch at
+a time as NumPy arrays, and rejects the unfair ones with a handful of
+array operations over tables of which tiles neighbor each other and
+which tiles meet at each vertex, worked out once from the topology.
+Only the layouts that pass are built into Boards.
+
+The Constraints are:
+
+  - red_apart: no 6 or 8 next to another 6 or 8;
+  - max_same_neighbors: no tile has more than this many neighbors of
+    its own resource, so 0 allows no two alike side by side, and 1
+    allows pairs but no runs of three;
+  - max_vertex_pips: no vertex touches more than this many pips.
+
+Any of them can be turned off with None, or False for red_apart.
+
+    generator = BoardGenerator(Constraints(max_vertex_pips=11), seed=0)
+    for board in generator.boards(1000):
+        ...
+    print(generator.stats.report())
+"""
+
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from settling import game_constants
+from settling.board import Board
+from settling.board_geometry import StandardBoard
+from settling.vertex_table import PIPS
+
+Constraints = namedtuple('Constraints',
+                         ['red_apart', 'max_same_neighbors',
+                          'max_vertex_pips'])
+Constraints.__new__.__defaults__ = (True, 1, 12)
+
+RED_NUMBERS = (6, 8)
+
+_TILE_CODES = {t: i for i, t in enumerate(game_constants.TILE_TYPES)}
+_DESERT = _TILE_CODES['desert']
+# The tile type of the padding that stands in for water and missing
+# neighbors, which matches no land tile.
+_PAD = -1
+
+
+class GeneratorStats:
+    """How many layouts a BoardGenerator has tried, passed and built.
+    """
+    def __init__(self):
+        self.tile_layouts = 0
+        self.number_layouts = 0
+        self.passed = 0
+        self.boards = 0
+        # How many layouts were checked against each constraint, and
+        # how many of those failed it.
+        self.checked = Counter()
+        self.rejected = Counter()
+        self.check_seconds = 0.0
+        self.build_seconds = 0.0
+        self._start = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    @property
+    def boards_per_second(self):
+        return self.boards / self.elapsed if self.boards else 0.0
+
+    def report(self):
+        """Return a few lines describing the boards generated so far.
+        """
+        lines = [
+            '{0:,} boards in {1:.2f}s: {2:,.0f} boards/s'.format(
+                self.boards, self.elapsed, self.boards_per_second),
+            '{0:,} tile and {1:,} number shuffles tried, {2:,} '
+            'passed'.format(self.tile_layouts, self.number_layouts,
+                            self.passed),
+            'checking {0:.2f}s, building {1:.2f}s'.format(
+                self.check_seconds, self.build_seconds),
+        ]
+        for constraint, count in sorted(self.rejected.items()):
+            lines.append('{0}: {1:.1%} rejected'.format(
+                constraint, count / self.checked[constraint]))
+        return '\n'.join(lines)
+
+
+class BoardGenerator:
+    """Draw boards whose layouts meet constraints.
+
+    The land tiles fill the first ordinals of geometry, and the rest
+    are water. numbers go on the land tiles other than deserts, in
+    ordinal order, as for Board. seed is anything
+    numpy.random.default_rng accepts.
+    """
+    def __init__(self, constraints=Constraints(), seed=None,
+                 land_tiles=game_constants.STANDARD_LAND_TILE_ORDER,
+                 numbers=game_constants.STANDARD_NUMBER_ORDER,
+                 port_map=game_constants.STANDARD_PORT_MAP,
+                 geometry=None, batch_size=1024, numbers_per_layout=16):
+        self.constraints = constraints
+        self.rng = np.random.default_rng(seed)
+        self.land_tiles = tuple(land_tiles)
+        self.port_map = port_map
+        self.geometry = geometry if geometry is not None else StandardBoard()
+        self.batch_size = batch_size
+        self.numbers_per_layout = numbers_per_layout
+        self.stats = GeneratorStats()
+        land_count = len(self.land_tiles)
+        if land_count > self.geometry.max_ordinal + 1:
+            raise ValueError("More land tiles than the board has room for.")
+        if len(numbers) != land_count - self.land_tiles.count('desert'):
+            raise ValueError("Need a number for every land tile but the "
+                             "deserts.")
+        self._water = ('water',) * (self.geometry.max_ordinal + 1 -
+                                    land_count)
+        self._tile_codes = np.array([_TILE_CODES[t] for t in land_tiles],
+                                    dtype=np.int8)
+        self._numbers = np.array(numbers, dtype=np.int8)
+        self._set_up_tables(land_count)
+
+    def _set_up_tables(self, land_count):
+        """Index the land tiles' neighbors and each vertex's land tiles,
+        padded with land_count, an extra column that is never land.
+        """
+        topology = self.geometry.topology
+        ordinals = topology.ordinals
+        neighbors = [[ordinals[h] for h in topology.tile_neighbors[o]
+                      if ordinals[h] < land_count]
+                     for o in range(land_count)]
+        self._neighbors = _padded(neighbors, 6, land_count)
+        self._pairs = np.array(sorted({(a, b) for a, row in
+                                       enumerate(neighbors)
+                                       for b in row if a < b}),
+                               dtype=np.intp).reshape(-1, 2)
+        corners = {tuple(o for o in tiles if o < land_count)
+                   for tiles in topology.vertex_tiles}
+        corners.discard(())
+        self._corners = _padded(sorted(corners), 3, land_count)
+
+    def layouts(self):
+        """Yield (tile_order, number_order) for each accepted layout,
+        forever.
+
+        The tiles are shuffled and checked first. Each tile layout that
+        passes is tried with numbers_per_layout shuffles of the
+        numbers, and every pair that passes is kept, so any fair layout
+        is as likely as any other. They come out in a random order.
+        """
+        while True:
+            start = time.perf_counter()
+            tiles = self._shuffled(self._tile_codes, self.batch_size)
+            tiles = tiles[self._check_tiles(tiles)]
+            tiles = np.repeat(tiles, self.numbers_per_layout, axis=0)
+            numbers = self._shuffled(self._numbers, len(tiles))
+            accepted = self.rng.permutation(
+                self._check_numbers(tiles, numbers))
+            self.stats.passed += len(accepted)
+            self.stats.check_seconds += time.perf_counter() - start
+            for tile_row, number_row in zip(tiles[accepted].tolist(),
+                                            numbers[accepted].tolist()):
+                yield (tuple(game_constants.TILE_TYPES[t]
+                             for t in tile_row) + self._water,
+                       number_row)
+
+    def boards(self, count=None):
+        """Yield count accepted Boards, or boards forever if count is
+        None.
+        """
+        layouts = self.layouts()
+        for _ in range(count) if count is not None else iter(int, 1):
+            tile_order, number_order = next(layouts)
+            start = time.perf_counter()
+            board = Board(tile_order, number_order, self.port_map,
+                          self.geometry)
+            self.stats.build_seconds += time.perf_counter() - start
+            self.stats.boards += 1
+            yield board
+
+    def _shuffled(self, row, size):
+        """Return size shuffles of row.
+        """
+        return self.rng.permuted(np.broadcast_to(row, (size, len(row))),
+                                 axis=1)
+
+    def _check_tiles(self, tiles):
+        """Return the indexes of the tile layouts that meet the
+        constraints on resources.
+        """
+        self.stats.tile_layouts += len(tiles)
+        limit = self.constraints.max_same_neighbors
+        if limit is None:
+            return np.arange(len(tiles))
+        padded = np.full((len(tiles), tiles.shape[1] + 1), _PAD, np.int8)
+        padded[:, :-1] = tiles
+        same = (padded[:, self._neighbors] ==
+                padded[:, :-1, np.newaxis]).sum(axis=2)
+        same[tiles == _DESERT] = 0
+        failed = np.any(same > limit, axis=1)
+        return np.flatnonzero(self._tally('max_same_neighbors', failed))
+
+    def _check_numbers(self, tiles, numbers):
+        """Return the indexes of the layouts, tiles and numbers
+        together, that meet the constraints on numbers.
+        """
+        size = len(tiles)
+        constraints = self.constraints
+        self.stats.number_layouts += size
+        ok = np.ones(size, dtype=bool)
+        # Each tile's number, with a 0 for the padding column.
+        resource = tiles != _DESERT
+        slot = np.cumsum(resource, axis=1) - 1
+        tile_numbers = np.zeros((size, tiles.shape[1] + 1), dtype=np.int8)
+        tile_numbers[:, :-1] = np.where(
+            resource, np.take_along_axis(numbers, slot, axis=1), 0)
+        if constraints.red_apart:
+            red = np.isin(tile_numbers, RED_NUMBERS)
+            failed = np.any(red[:, self._pairs[:, 0]] &
+                            red[:, self._pairs[:, 1]], axis=1)
+            ok &= self._tally('red_apart', failed)
+        if constraints.max_vertex_pips is not None:
+            pips = PIPS[tile_numbers]
+            failed = np.any(pips[:, self._corners].sum(axis=2) >
+                            constraints.max_vertex_pips, axis=1)
+            ok &= self._tally('max_vertex_pips', failed)
+        return np.flatnonzero(ok)
+
+    def _tally(self, constraint, failed):
+        self.stats.checked[constraint] += len(failed)
+        self.stats.rejected[constraint] += int(failed.sum())
+        return ~failed
+
+
+def _padded(rows, width, pad):
+    """Return rows of indexes as an array, padded out to width with pad.
+    """
+    table = np.full((len(rows), width), pad, dtype=np.intp)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row
+    return table
+
+
+def is_fair(board, constraints=Constraints()):
+    """Return True if board meets constraints, checked tile by tile.
+
+    This is the slow, direct reading of the constraints that
+    BoardGenerator checks in bulk.
+    """
+    topology = board._topology
+    land = [o for o in range(len(topology.hexagons))
+            if board._tile_types[o] != _TILE_CODES['water']]
+    types = {o: board._tile_types[o] for o in land}
+    numbers = {o: board._tile_numbers[o] for o in land}
+    for o in land:
+        neighbors = [topology.ordinals[h] for h in topology.tile_neighbors[o]
+                     if topology.ordinals[h] in types]
+        if constraints.red_apart and numbers[o] in RED_NUMBERS and \
+                any(numbers[n] in RED_NUMBERS for n in neighbors):
+            return False
+        if constraints.max_same_neighbors is not None and \
+                types[o] != _DESERT and \
+                sum(types[n] == types[o] for n in neighbors) > \
+                constraints.max_same_neighbors:
+            return False
+    if constraints.max_vertex_pips is not None:
+        for tiles in topology.vertex_tiles:
+            if sum(int(PIPS[numbers.get(o, 0)]) for o in tiles) > \
+                    constraints.max_vertex_pips:
+                return False
+    return True
@@ -5,12 +5,14 @@ This mapping allows for different board sizes to be defined, and a
 simple list of tiles/numbers/ports to be passed in for the
 construction.
 
-Currently the only board type defined is the standard 3-4 player
-board.
+HexagonalBoard covers boards of any number of whole rings of tiles,
+from the standard 3-4 player board, StandardBoard, up to synthetic
+boards of thousands of tiles.
 """
 
 from abc import ABCMeta, abstractmethod
 
+from settling import board_topology
 from settling import hexagon_utils as hx
 
 
@@ -45,72 +47,104 @@ class BoardGeometry(metaclass=ABCMeta):
         """
         pass
 
+    @property
+    @abstractmethod
+    def topology(self):
+        """Return the BoardTopology tables describing this geometry.
+        """
+        pass
 
-class StandardBoard(BoardGeometry):
-    """The standard 3-4 player catan board.
 
-    There are only 37 tiles in the standard board.
-    """
-    def __init__(self):
-        """Create caches for the mapping between ordinal and hexagon values.
-
-        Since the computation in either direction can take a fair
-        amount of time, we cache the values to create amoritized
-        constant time lookups.
+class HexagonalBoard(BoardGeometry):
+    """A hexagon of tiles, out to ring radius around the center.
 
-        We do not use fancy methods such as decorators to populate
-        these caches, but rather code in the methods themselves.
+    Ring 0 is the center tile, and ring r holds 6r tiles, so a board
+    of radius r has 3r(r + 1) + 1 tiles, numbered from 0 at the center
+    outwards.
+    """
+    def __init__(self, radius):
+        """Record the size of the board.
+
+        Every query about the shape of the board is answered from a
+        BoardTopology, which is built once and shared by every board
+        of the same radius, rather than computed on each call. So
+        queries take the same time however large the board is.
+        Coordinates off the board fall back to the hexagon_utils
+        functions.
+        """
+        if radius < 0:
+            raise ValueError("Radius must not be negative.")
+        self.radius = radius
+        self.max_ordinal = 3 * radius * (radius + 1)
+
+    @classmethod
+    def from_max_ordinal(cls, max_ordinal):
+        """Return the board whose last tile is max_ordinal.
         """
-        self.cached_ordinal_from_hexagon = {}
-        self.cached_hexagon_from_ordinal = {}
-        self.max_ordinal = 36     # 36 is max ordinal for 37 tiles
+        radius = 0
+        while 3 * radius * (radius + 1) < max_ordinal:
+            radius += 1
+        if 3 * radius * (radius + 1) != max_ordinal:
+            msg = "No hexagonal board has max ordinal {0}."
+            raise ValueError(msg.format(max_ordinal))
+        return cls(radius)
+
+    @property
+    def topology(self):
+        return board_topology.shared_topology(self.max_ordinal)
+
+    def has_hexagon(self, hexagon_coord):
+        """Return True if the board has a tile at hexagon_coord.
+        """
+        return (sum(hexagon_coord) == 0 and
+                max(map(abs, hexagon_coord)) <= self.radius)
 
     def ordinal_from_hexagon(self, hexagon_coord):
         """Give the ordinal location of a tile given its hexagon coordinates.
         """
-        # Go to the cache before calling the library function.
-        if hexagon_coord in self.cached_ordinal_from_hexagon:
-            ordinal_coord = self.cached_ordinal_from_hexagon[hexagon_coord]
-        # If missing, compute it and  cache the value.
-        else:
+        ordinal_coord = self.topology.ordinals.get(hexagon_coord)
+        if ordinal_coord is None:
             ordinal_coord = hx.ordinal_from_hexagon(hexagon_coord)
-            self.cached_ordinal_from_hexagon[hexagon_coord] = ordinal_coord
         return ordinal_coord
 
     def hexagon_from_ordinal(self, ordinal_coord):
-        # Go to the cache before calling the library function.
-        if ordinal_coord in self.cached_hexagon_from_ordinal:
-            hexagon_coord = self.cached_hexagon_from_ordinal[ordinal_coord]
-        # If missing, compute it and  cache the value.
-        else:
-            hexagon_coord = hx.hexagon_from_ordinal(ordinal_coord)
-            self.cached_hexagon_from_ordinal[ordinal_coord] = hexagon_coord
-        return hexagon_coord
+        if 0 <= ordinal_coord <= self.max_ordinal:
+            return self.topology.hexagons[ordinal_coord]
+        return hx.hexagon_from_ordinal(ordinal_coord)
 
     def hexagon_neighbors(self, hexagon_coord):
-        all_neighbors = hx.neighbors(hexagon_coord)
-        existing_neighbors = []
-        for neighbor in all_neighbors:
-            if self.ordinal_from_hexagon(neighbor) <= self.max_ordinal:
-                existing_neighbors.append(neighbor)
-        return existing_neighbors
+        topology = self.topology
+        ordinal = topology.ordinals.get(hexagon_coord)
+        if ordinal is not None:
+            return list(topology.tile_neighbors[ordinal])
+        return [n for n in hx.neighbors(hexagon_coord)
+                if self.has_hexagon(n)]
 
     def edge_synonyms(self, hexagon_coord, edge):
-        all_neighbors = hx.neighbors(hexagon_coord)
-        other = all_neighbors[edge]
-        other_edge = (edge + 3) % 6
-        if hx.ordinal_from_hexagon(other) <= self.max_ordinal:
-            return [(other, other_edge)]
-        else:
-            return []
+        topology = self.topology
+        ordinal = topology.ordinals.get(hexagon_coord)
+        if ordinal is not None:
+            return list(topology.edge_synonyms[ordinal * 6 + edge])
+        aliases = board_topology.edge_aliases(hexagon_coord, edge)
+        return [(h, e) for h, e in aliases[1:] if self.has_hexagon(h)]
 
     def vertex_synonyms(self, hexagon_coord, vertex):
-        all_neighbors = hx.neighbors(hexagon_coord)
-        first = all_neighbors[vertex - 1]
-        second = all_neighbors[vertex]
-        other_names = []
-        if hx.ordinal_from_hexagon(first) <= self.max_ordinal:
-            other_names.append((first, (vertex + 2) % 6))
-        if hx.ordinal_from_hexagon(second) <= self.max_ordinal:
-            other_names.append((second, (vertex + 4) % 6))
-        return other_names
+        topology = self.topology
+        ordinal = topology.ordinals.get(hexagon_coord)
+        if ordinal is not None:
+            return list(topology.vertex_synonyms[ordinal * 6 + vertex])
+        aliases = board_topology.vertex_aliases(hexagon_coord, vertex)
+        return [(h, v) for h, v in aliases[1:] if self.has_hexagon(h)]
+
+
+class StandardBoard(HexagonalBoard):
+    """The standard 3-4 player catan board.
+
+    There are only 37 tiles in the standard board: the 19 land tiles
+    out to ring 2, and a ring of water around them.
+    """
+    # Boards pickled before the radius was recorded find it here.
+    radius = 3
+
+    def __init__(self):
+        super().__init__(3)
@@ -0,0 +1,192 @@
+"""Precomputed adjacency tables for a board of hexagonal tiles.
+
+A board's shape never changes, so everything about how its tiles,
+vertices and edges fit together can be worked out once and shared by
+every board of that shape.
+
+Vertices and edges can each be addressed in several ways, one for
+every tile they touch. For example, vertex 0 of the center tile is
+also vertex 2 of tile (1, -1, 0) and vertex 4 of tile (1, 0, -1). The
+tables here give every vertex and every edge a single canonical id,
+numbered from 0 in the order they are first seen walking the tiles by
+ordinal.
+
+Vertex v of a tile sits between the tile's edges v - 1 and v, so edge
+e runs from vertex e to vertex e + 1.
+
+Lookups indexed by tile use the flat index `ordinal * 6 + corner`,
+where corner is the vertex or edge number on that tile.
+"""
+
+from settling import hexagon_utils as hx
+
+
+def vertex_aliases(hexagon_coord, vertex):
+    """Return every (hexagon, vertex) pair naming the given vertex.
+
+    The given name comes first, followed by the names on the two
+    neighboring tiles that share it, whether or not those tiles exist.
+    """
+    all_neighbors = hx.neighbors(hexagon_coord)
+    return [(hexagon_coord, vertex),
+            (all_neighbors[vertex - 1], (vertex + 2) % 6),
+            (all_neighbors[vertex], (vertex + 4) % 6)]
+
+
+def edge_aliases(hexagon_coord, edge):
+    """Return every (hexagon, edge) pair naming the given edge.
+
+    The given name comes first, followed by the name on the tile
+    across the edge, whether or not that tile exists.
+    """
+    other = hx.neighbors(hexagon_coord)[edge]
+    return [(hexagon_coord, edge), (other, (edge + 3) % 6)]
+
+
+class BoardTopology:
+    """Immutable tables describing a board of tiles 0 to max_ordinal.
+
+    All of the tables are tuples, indexed by ordinal, by canonical
+    vertex or edge id, or by the flat `ordinal * 6 + corner` index:
+
+      - hexagons: the hexagon coordinate of each ordinal.
+      - tile_neighbors: each tile's existing neighbors, clockwise.
+      - tile_vertices, tile_edges: flat index -> canonical id.
+      - vertex_synonyms, edge_synonyms: flat index -> the other
+        existing names for that vertex or edge.
+      - vertex_aliases, edge_aliases: canonical id -> every existing
+        name for it.
+      - vertex_tiles, edge_tiles: canonical id -> ordinals of the
+        tiles it touches.
+      - vertex_edges: vertex id -> ids of the edges that meet there.
+      - vertex_neighbors: vertex id -> ids of the vertices one edge
+        away.
+      - edge_vertices: edge id -> ids of its two endpoints.
+    """
+    def __init__(self, max_ordinal):
+        self.max_ordinal = max_ordinal
+        self.hexagons = tuple(hx.hexagon_from_ordinal(o)
+                              for o in range(max_ordinal + 1))
+        self.ordinals = {h: o for o, h in enumerate(self.hexagons)}
+        self.tile_neighbors = tuple(
+            tuple(n for n in hx.neighbors(h) if n in self.ordinals)
+            for h in self.hexagons
+        )
+        self._set_up_vertices()
+        self._set_up_edges()
+        self._set_up_adjacency()
+
+    def __reduce__(self):
+        # Topologies are pickled by size, and unpickle to the shared
+        # instance rather than a copy of every table.
+        return (shared_topology, (self.max_ordinal,))
+
+    def _existing(self, aliases):
+        return [(h, c) for h, c in aliases if h in self.ordinals]
+
+    def _set_up_vertices(self):
+        self.vertex_synonyms, self.tile_vertices, self.vertex_aliases = (
+            self._canonical_ids(vertex_aliases)
+        )
+        self._vertex_lookup = self._lookup(self.vertex_aliases)
+        self.vertex_tiles = tuple(
+            tuple(self.ordinals[h] for h, v in aliases)
+            for aliases in self.vertex_aliases
+        )
+
+    def _set_up_edges(self):
+        self.edge_synonyms, self.tile_edges, self.edge_aliases = (
+            self._canonical_ids(edge_aliases)
+        )
+        self._edge_lookup = self._lookup(self.edge_aliases)
+        self.edge_tiles = tuple(
+            tuple(self.ordinals[h] for h, e in aliases)
+            for aliases in self.edge_aliases
+        )
+
+    def _canonical_ids(self, find_aliases):
+        """Number the vertices or edges in the order they are found.
+
+        Returns the flat synonym table, the flat canonical id table and
+        the aliases for each canonical id.
+        """
+        synonyms = []
+        ids = []
+        aliases_by_id = []
+        seen = {}
+        for hexagon in self.hexagons:
+            for corner in range(6):
+                aliases = self._existing(find_aliases(hexagon, corner))
+                synonyms.append(tuple(aliases[1:]))
+                if aliases[0] not in seen:
+                    for alias in aliases:
+                        seen[alias] = len(aliases_by_id)
+                    aliases_by_id.append(tuple(aliases))
+                ids.append(seen[aliases[0]])
+        return tuple(synonyms), tuple(ids), tuple(aliases_by_id)
+
+    def _lookup(self, aliases_by_id):
+        return {alias: canonical_id
+                for canonical_id, aliases in enumerate(aliases_by_id)
+                for alias in aliases}
+
+    def _set_up_adjacency(self):
+        vertex_edges = [set() for _ in self.vertex_aliases]
+        edge_vertices = []
+        for aliases in self.edge_aliases:
+            hexagon, edge = aliases[0]
+            flat = self.ordinals[hexagon] * 6
+            ends = (self.tile_vertices[flat + edge],
+                    self.tile_vertices[flat + (edge + 1) % 6])
+            edge_vertices.append(ends)
+            for vertex_id in ends:
+                vertex_edges[vertex_id].add(len(edge_vertices) - 1)
+        self.edge_vertices = tuple(edge_vertices)
+        self.vertex_edges = tuple(tuple(sorted(e)) for e in vertex_edges)
+        self.vertex_neighbors = tuple(
+            tuple(sorted(other
+                         for e in edges
+                         for other in self.edge_vertices[e]
+                         if other != vertex_id))
+            for vertex_id, edges in enumerate(self.vertex_edges)
+        )
+
+    @property
+    def vertex_count(self):
+        return len(self.vertex_aliases)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_aliases)
+
+    def vertex_id(self, hexagon_coord, vertex):
+        """Return the canonical id of a vertex, given any of its names.
+        """
+        try:
+            return self._vertex_lookup[(hexagon_coord, vertex)]
+        except KeyError:
+            msg = "{0}, {1} is not a vertex on this board"
+            raise ValueError(msg.format(hexagon_coord, vertex))
+
+    def edge_id(self, hexagon_coord, edge):
+        """Return the canonical id of an edge, given any of its names.
+        """
+        try:
+            return self._edge_lookup[(hexagon_coord, edge)]
+        except KeyError:
+            msg = "{0}, {1} is not an edge on this board"
+            raise ValueError(msg.format(hexagon_coord, edge))
+
+
+_shared_topologies = {}
+
+
+def shared_topology(max_ordinal):
+    """Return the BoardTopology for tiles 0 to max_ordinal.
+
+    Topologies are built the first time they are asked for, and the
+    same object is handed out from then on.
+    """
+    if max_ordinal not in _shared_topologies:
+        _shared_topologies[max_ordinal] = BoardTopology(max_ordinal)
+    return _shared_topologies[max_ordinal]
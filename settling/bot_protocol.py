@@ -0,0 +1,512 @@
+"""A line based protocol for bots that run as separate programs.
+
+A bot is any program that reads requests on stdin and writes replies
+on stdout, one JSON object per line. A RemotePlayer hands its
+decisions to a BotProcess, a long-lived worker that can serve many
+players in many games, so no process is started per decision or game.
+
+Every request has an id, which its reply repeats, and the session of
+the player making it:
+
+    {"id": 12, "session": 3, "hook": "act", "hand": [0, 2, 1, 0, 3],
+     "delta": {"vertices": [[40, 6]], "edges": [[61, 3]]}}
+    {"id": 12, "move": ["build_road", [1, -1, 0], 2]}
+
+hook is starting_town, play_action_card or act, and hand is the
+player's count of each resource, in RESOURCE_TILE_TYPES order. The
+first request of a session also has the player's name, any options for
+the bot, and the whole board as a base64 serialization board record.
+After that only what has changed since the session's last request is
+sent, as a delta with any of:
+
+  - players: players new to the board, in slot order;
+  - vertices: [vertex id, player_slot * 2 + is_city] for each change;
+  - edges: [edge id, player_slot] for each change;
+  - robber: the ordinal of the robber's tile;
+  - holder: the slot of the longest road holder, or 0.
+
+Should the board change in any other way, the whole board is sent
+again. A move is null, [hexagon_coord, vertex] for a starting town, or
+an action as encoded by encode_action. A bot that cannot decide
+replies with an "error" instead, and one that cannot read a request at
+all replies with an error and a null id, which is logged and otherwise
+ignored. Requests without an id get no reply. A session ends with
+{"session": 3, "hook": "close"}, which has no reply.
+
+Requests are pipelined: a BotProcess writes each one as it is made,
+and a reader thread hands back replies as they arrive, in any order.
+A RemotePlayer made with asynchronous=True returns awaitables from its
+hooks, for an AsyncGame, so that a GameServer can have requests from
+many games in flight to one worker at once.
+
+    with BotProcess(['python', '-m', 'settling', 'bot']) as bot:
+        players = [RemotePlayer('player0', bot), ...]
+        Game(board, players, roll).game_loop()
+        for player in players:
+            player.close()
+"""
+
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import subprocess
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+from settling import game_constants
+from settling import player_action
+from settling import serialization
+from settling.board import BoardView
+from settling.exceptions import BotError
+from settling.hand import Hand
+from settling.player import Player
+
+_log = logging.getLogger(__name__)
+
+HOOKS = ('starting_town', 'play_action_card', 'act')
+
+# Each action's name in the protocol, and its fields in order.
+ACTIONS = (
+    ('start_turn', player_action.StartTurn, ()),
+    ('request_trade', player_action.RequestTrade, ()),
+    ('bank_trade', player_action.BankTrade, ('give', 'receive')),
+    ('build_road', player_action.BuildRoad, ('hexagon_coord', 'edge')),
+    ('build_town', player_action.BuildTown, ('hexagon_coord', 'vertex')),
+    ('upgrade_town', player_action.UpgradeTown,
+     ('hexagon_coord', 'vertex')),
+    ('buy_action_card', player_action.BuyActionCard, ()),
+    ('play_action_card', player_action.PlayActionCard, ()),
+    ('end_turn', player_action.EndTurn, ()),
+)
+
+_ACTION_NAMES = {action: (name, fields) for name, action, fields in ACTIONS}
+_ACTION_TYPES = {name: action for name, action, _ in ACTIONS}
+
+_RESOURCES = game_constants.RESOURCE_TILE_TYPES
+
+# The most a bot reads from stdin at a time.
+_READ_SIZE = 1 << 16
+
+
+def encode_action(action):
+    """Return action as a list of its name and fields.
+    """
+    name, fields = _ACTION_NAMES[type(action)]
+    values = [getattr(action, field) for field in fields]
+    return [name] + [list(v) if isinstance(v, tuple) else v for v in values]
+
+
+def decode_action(move):
+    """Return the action a list from encode_action stands for.
+    """
+    try:
+        action = _ACTION_TYPES[move[0]]
+    except (KeyError, IndexError, TypeError):
+        raise ValueError("Not an action: {0!r}.".format(move))
+    return action(*[tuple(v) if isinstance(v, list) else v
+                    for v in move[1:]])
+
+
+def encode_move(hook, move):
+    if move is None:
+        return None
+    elif hook == 'starting_town':
+        hexagon_coord, vertex = move
+        return [list(hexagon_coord), vertex]
+    return encode_action(move)
+
+
+def decode_move(hook, move):
+    if move is None:
+        return None
+    elif hook == 'starting_town':
+        hexagon_coord, vertex = move
+        return tuple(hexagon_coord), vertex
+    return decode_action(move)
+
+
+def encode_hand(hand):
+    held = Counter(hand.cards)
+    return [held[resource] for resource in _RESOURCES]
+
+
+def decode_hand(counts):
+    return Hand([resource for resource, count in zip(_RESOURCES, counts)
+                 for _ in range(count)])
+
+
+class DeltaEncoder:
+    """Describe a board by what has changed since it was last described.
+    """
+    def __init__(self):
+        self._layout_key = None
+        self._names = None
+        self._vertices = None
+        self._edges = None
+        self._robber = None
+        self._holder = None
+
+    def encode(self, board):
+        """Return the fields of a request that bring a bot up to date
+        with board: a board record, a delta, or neither.
+        """
+        layout_key, robber, names, vertices, edges = board.placement_state()
+        vertices = np.frombuffer(vertices, np.uint8)
+        edges = np.frombuffer(edges, np.uint8)
+        holder = board.longest_road_holder()
+        if layout_key != self._layout_key or \
+                len(vertices) != len(self._vertices) or \
+                list(names[:len(self._names)]) != self._names:
+            message = {'board': self._full(board)}
+        else:
+            message = self._delta(board, names, vertices, edges, robber,
+                                  holder)
+        self._layout_key = layout_key
+        self._names = list(names)
+        self._vertices = vertices
+        self._edges = edges
+        self._robber = robber
+        self._holder = holder
+        return message
+
+    def _full(self, board):
+        # Views have no record of their own, so encode a private copy.
+        record = serialization.encode_board(board.fork())
+        return base64.b64encode(record).decode('ascii')
+
+    def _delta(self, board, names, vertices, edges, robber, holder):
+        """Return the changes since the last encode, or a whole board if
+        anything was taken off it.
+        """
+        delta = {}
+        if len(names) > len(self._names):
+            delta['players'] = list(names[len(self._names):])
+        changed = np.flatnonzero(vertices != self._vertices)
+        if len(changed):
+            old = self._vertices[changed]
+            new = vertices[changed]
+            if not np.all((old == 0) | (new == old | 1)):
+                return {'board': self._full(board)}
+            delta['vertices'] = np.stack([changed, new], 1).tolist()
+        changed = np.flatnonzero(edges != self._edges)
+        if len(changed):
+            if np.any(self._edges[changed]):
+                return {'board': self._full(board)}
+            delta['edges'] = np.stack([changed, edges[changed]], 1).tolist()
+        if robber != self._robber:
+            delta['robber'] = robber
+        if holder != self._holder:
+            delta['holder'] = names.index(holder) if holder else 0
+        return {'delta': delta} if delta else {}
+
+
+class DeltaDecoder:
+    """Keep a board up to date from the requests of a DeltaEncoder.
+    """
+    def __init__(self):
+        self.board = None
+        # The sender's player slots, which this board's may not match.
+        self._names = [None]
+
+    def apply(self, request):
+        """Bring the board up to date with request, and return it.
+        """
+        if 'board' in request:
+            self.board = serialization.decode_board(
+                base64.b64decode(request['board']))
+            self._names = list(self.board._player_names)
+        elif self.board is None:
+            raise ValueError("No board has been sent.")
+        delta = request.get('delta')
+        if delta:
+            self._apply(delta)
+        return self.board
+
+    def _apply(self, delta):
+        board = self.board
+        topology = board._topology
+        names = self._names
+        names.extend(delta.get('players', ()))
+        if 'robber' in delta:
+            board.move_robber(topology.hexagons[delta['robber']])
+        for edge_id, slot in delta.get('edges', ()):
+            board.add_road(*topology.edge_aliases[edge_id][0],
+                           player=names[slot])
+        for vertex_id, state in delta.get('vertices', ()):
+            hexagon_coord, vertex = topology.vertex_aliases[vertex_id][0]
+            player = names[state >> 1]
+            if not board._vertex_state[vertex_id]:
+                board.add_town(hexagon_coord, vertex, player)
+            if state & 1:
+                board.upgrade_town(hexagon_coord, vertex, player)
+        if 'holder' in delta:
+            board._longest_road.holder = board._player_slots.get(
+                names[delta['holder']], 0)
+
+
+class BotProcess:
+    """A long-lived bot program, and the requests in flight to it.
+
+    command and any keyword arguments are passed to subprocess.Popen.
+    bytes_sent and requests count what has been written to the bot.
+    """
+    def __init__(self, command, **kwargs):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE, **kwargs)
+        self.bytes_sent = 0
+        self.requests = 0
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._sessions = itertools.count(1)
+        self._lock = threading.Lock()
+        self._error = None
+        self._flush_scheduled = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def new_session(self):
+        return next(self._sessions)
+
+    def request(self, message, batch=False):
+        """Send message with a new id, and return a
+        concurrent.futures.Future of the move in the reply.
+
+        With batch=True, called from a running event loop, the request
+        is written along with any others made in the same pass of the
+        loop, rather than on its own.
+        """
+        future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise BotError(self._error)
+            message['id'] = request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._write(message)
+            self.requests += 1
+            if not batch:
+                self._flush()
+            elif not self._flush_scheduled:
+                self._flush_scheduled = True
+                asyncio.get_running_loop().call_soon(self._flush_batch)
+        return future
+
+    def send(self, message):
+        """Send message, which has no reply.
+        """
+        with self._lock:
+            if self._error is None:
+                self._write(message)
+                self._flush()
+
+    def close(self):
+        """Close the bot's input, and wait for it to exit.
+        """
+        with self._lock:
+            if not self.process.stdin.closed:
+                self.process.stdin.close()
+        self.process.wait()
+        self._reader.join()
+
+    def _write(self, message):
+        line = json.dumps(message, separators=(',', ':')).encode() + b'\n'
+        try:
+            self.process.stdin.write(line)
+        except (OSError, ValueError):
+            raise BotError("The bot is not reading requests.")
+        self.bytes_sent += len(line)
+
+    def _flush(self):
+        try:
+            self.process.stdin.flush()
+        except (OSError, ValueError):
+            raise BotError("The bot is not reading requests.")
+
+    def _flush_batch(self):
+        with self._lock:
+            self._flush_scheduled = False
+            if self._error is None:
+                try:
+                    self._flush()
+                except BotError:
+                    pass
+
+    def _read(self):
+        error = self._read_replies()
+        with self._lock:
+            self._error = error
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(BotError(error))
+
+    def _read_replies(self):
+        """Hand each reply to its request's future, until the bot stops.
+
+        Return why it stopped.
+        """
+        for line in self.process.stdout:
+            try:
+                reply = json.loads(line)
+                if reply['id'] is None:
+                    # Not the answer to any one request, so the rest
+                    # carry on.
+                    _log.warning("The bot could not read a request: %s",
+                                 reply['error'])
+                    continue
+                future = self._pending.pop(reply['id'])
+            except (ValueError, KeyError, TypeError):
+                return "The bot sent a bad reply: {0!r}.".format(line)
+            if not future.set_running_or_notify_cancel():
+                continue
+            if 'error' in reply:
+                future.set_exception(BotError(reply['error']))
+            else:
+                future.set_result(reply.get('move'))
+        return "The bot has exited."
+
+
+class RemotePlayer(Player):
+    """A player whose decisions are made by a bot in a BotProcess.
+
+    options are passed to the bot with the session's first request.
+    With asynchronous=True the hooks return awaitables instead of
+    waiting for the bot, for use in an AsyncGame.
+
+    Games do not close their players, so whoever makes a RemotePlayer
+    for a Game must call close() once it is over, or the bot keeps its
+    session. A GameServer and a Tournament close the players of the
+    games they play. The BotProcess is left running for other players,
+    to be closed by whoever started it.
+    """
+    def __init__(self, name, bot, asynchronous=False, options=None):
+        super().__init__(name)
+        self.bot = bot
+        self.asynchronous = asynchronous
+        self.options = options or {}
+        self.session = bot.new_session()
+        self._encoder = DeltaEncoder()
+        self._started = False
+
+    def starting_town(self, board):
+        return self._request('starting_town', board)
+
+    def play_action_card(self, board, hand):
+        return self._request('play_action_card', board, hand)
+
+    def act(self, board, hand):
+        return self._request('act', board, hand)
+
+    def close(self):
+        """End the session, so the bot can forget this player.
+        """
+        self.bot.send({'session': self.session, 'hook': 'close'})
+
+    def _request(self, hook, board, hand=None):
+        message = {'session': self.session, 'hook': hook}
+        if not self._started:
+            message['player'] = self.name
+            message['options'] = self.options
+            self._started = True
+        if hand is not None:
+            message['hand'] = encode_hand(hand)
+        message.update(self._encoder.encode(board))
+        if self.asynchronous:
+            return self._reply(hook, self.bot.request(message, batch=True))
+        return decode_move(hook, self.bot.request(message).result())
+
+    async def _reply(self, hook, future):
+        return decode_move(hook, await asyncio.wrap_future(future))
+
+
+class _Session:
+    """A player served by a bot, and its copy of the board.
+    """
+    def __init__(self, player):
+        self.player = player
+        self.decoder = DeltaDecoder()
+
+    def decide(self, request):
+        hook = request['hook']
+        board = BoardView(self.decoder.apply(request))
+        if hook == 'starting_town':
+            move = self.player.starting_town(board)
+        elif hook not in HOOKS:
+            raise ValueError("Unknown hook {0!r}.".format(hook))
+        else:
+            hand = decode_hand(request['hand'])
+            move = getattr(self.player, hook)(board, hand)
+        return encode_move(hook, move)
+
+
+def serve(make_player, stdin=None, stdout=None):
+    """Answer requests from a RemotePlayer until stdin is closed.
+
+    make_player(name, options) returns the Player that decides for
+    each new session. stdin and stdout are binary files, by default
+    the process's own. Requests are read as they arrive, and the
+    replies to all of them are written at once. Blank lines are
+    ignored, and a line that is not a JSON object is answered with an
+    error.
+    """
+    stdin = stdin if stdin is not None else sys.stdin.buffer
+    stdout = stdout if stdout is not None else sys.stdout.buffer
+    sessions = {}
+    partial = b''
+    while True:
+        chunk = stdin.read1(_READ_SIZE)
+        if not chunk:
+            return
+        lines = (partial + chunk).split(b'\n')
+        partial = lines.pop()
+        replies = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("A request must be a JSON object.")
+            except ValueError as e:
+                reply = {'id': None,
+                         'error': '{0}: {1}'.format(type(e).__name__, e)}
+            else:
+                reply = _answer(sessions, make_player, request)
+            if reply is not None:
+                replies.append(json.dumps(reply, separators=(',', ':')))
+        if replies:
+            stdout.write('\n'.join(replies).encode() + b'\n')
+            stdout.flush()
+
+
+def _answer(sessions, make_player, request):
+    """Return the reply to request, or None if it needs no reply.
+    """
+    session_id = request.get('session')
+    if request.get('hook') == 'close':
+        sessions.pop(session_id, None)
+        return None
+    if request.get('id') is None:
+        # Nobody is waiting on a reply that could not be matched up.
+        return None
+    try:
+        session = sessions.get(session_id)
+        if session is None:
+            session = sessions[session_id] = _Session(
+                make_player(request['player'], request.get('options', {})))
+        return {'id': request['id'], 'move': session.decide(request)}
+    except Exception as e:
+        return {'id': request.get('id'),
+                'error': '{0}: {1}'.format(type(e).__name__, e)}
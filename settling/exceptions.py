@@ -5,3 +5,15 @@ class GameRuleViolation(Exception):
 
     def __str__(self):
         return repr(self.message)
+
+
+class ReadOnlyBoardError(GameRuleViolation):
+    """Raised when a player tries to modify a read-only board view.
+    """
+    pass
+
+
+class BotError(Exception):
+    """Raised when a bot program fails to answer a request.
+    """
+    pass
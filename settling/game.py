@@ -11,96 +11,273 @@ The code in this module is responsible for dispatching all actions to
 the appropriate players. It is also responsible for modifying global
 game state based on these actions.
 
-As a design principle, a piece of mutable global state should never be
-passed to players. Instead, copies of that state, that players can
-modify locally should be passed in instead.
-"""
+As a design principle, players can never modify global game state.
+Hands are passed to players as copies. Boards are passed as read-only
+views of the global board, which players can `fork` if they want a
+private copy to modify. Games created with `private_boards=True` hand
+out copy-on-write snapshots instead, which cost nothing to take and
+are only copied if the player actually modifies them.
+
+Passing an Instrumentation from settling.instrumentation times each
+phase of the game, each player's decisions and the board's hot methods.
+Games without one run exactly as if instrumentation did not exist.
 
-from copy import deepcopy
+Passing an ActionLog from settling.action_log records everything that
+changes the game as it is played, for replaying later.
+"""
 
+from settling import game_constants
+from settling.board import BoardView
+from settling.exceptions import GameRuleViolation
 from settling.hand import Hand
-import settling.player_actions as player_action
+import settling.player_action as player_action
 
 
 class Game:
-    def __init__(self, board, players, roll):
+    def __init__(self, board, players, roll, private_boards=False,
+                 max_turns=None, instrumentation=None, log=None):
         self.board = board
         self.players = players
         self.roll = roll
+        self.private_boards = private_boards
+        self.max_turns = max_turns
+        self.turns = 0
         self.hands = {player.name: Hand() for player in players}
+        self.log = log
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.instrument_game(self)
 
     def game_loop(self):
         """Perform the main game loop.
+
+        Returns the name of the winner, or None if max_turns turns
+        pass without one.
         """
+        self._begin_log()
         self._board_set_up()
-        winner = None
-        while winner is None:
-            for player in self.players:
-                self._player_turn(player)
-                winner = who_won(self.board)
-                if winner:
-                    break
+        return self.play()
+
+    def play(self, first=0):
+        """Play turns, starting with self.players[first], until someone
+        wins or max_turns turns have passed.
+
+        Games that are already set up, such as copies of a game in
+        progress, can be continued this way.
+        """
+        self._begin_log()
+        winner = who_won(self.board)
+        index = first
+        while winner is None and not self._out_of_turns():
+            if self.log is not None:
+                self.log.turn(self, index)
+            self._player_turn(self.players[index])
+            self.turns += 1
+            winner = who_won(self.board)
+            index = (index + 1) % len(self.players)
+        if self.log is not None:
+            self.log.end(self, winner)
         return winner
 
+    def _begin_log(self):
+        if self.log is not None and not self.log.started:
+            self.log.begin(self)
+
+    def _out_of_turns(self):
+        return self.max_turns is not None and self.turns >= self.max_turns
+
+    def _player_board(self):
+        """Return the board as it should be handed to a player.
+        """
+        if self.private_boards:
+            return self.board.snapshot()
+        return BoardView(self.board)
+
     def _board_set_up(self):
         """Initial settlement placement. Initial resource distribtuion.
         """
         for player in self.players:
-            player_board = deepcopy(self.board)
-            hexagon_coord, vertex = player.starting_town(player_board)
-            self.board.add_town(hexagon_coord, vertex, player.name)
+            self._starting_town(player)
         for player in reversed(self.players):
-            player_board = deepcopy(self.board)
-            hexagon_coord, vertex = player.starting_town(player_board)
-            self.board.add_town(hexagon_coord, vertex, player.name)
-            resources = initial_resources(hexagon_coord, vertex)
-            self.hands[player.name].add_resources(resources)
+            hexagon_coord, vertex = self._starting_town(player)
+            self._starting_resources(player, hexagon_coord, vertex)
+
+    def _starting_town(self, player):
+        """Place the town the player chooses, and return where it went.
+        """
+        player_board = self._player_board()
+        hexagon_coord, vertex = player.starting_town(player_board)
+        self._place_starting_town(player, hexagon_coord, vertex)
+        return hexagon_coord, vertex
+
+    def _place_starting_town(self, player, hexagon_coord, vertex):
+        self.board.add_town(hexagon_coord, vertex, player.name)
+        if self.log is not None:
+            self.log.build(self.board, 'town', hexagon_coord, vertex,
+                           player.name)
+
+    def _starting_resources(self, player, hexagon_coord, vertex):
+        """Give player a card for each tile around their second town.
+        """
+        resources = initial_resources(self.board, hexagon_coord, vertex)
+        self.hands[player.name].add_resources(resources)
+        if self.log is not None:
+            self.log.grant(player.name, resources)
 
     def _player_turn(self, player):
         # Turn set up:
         #   - Initial action card?
         #   - roll
         #   - Move robber or distribute resources
-        player_board = deepcopy(self.board)
-        player_hand = deepcopy(self.hands[player.name])
+        player_board = self._player_board()
+        player_hand = self.hands[player.name].copy()
         action = player.play_action_card(player_board, player_hand)
         if isinstance(action, player_action.PlayActionCard):
-            self._apply_action(action)
+            self._apply_action(player, action)
+        self._roll_dice()
+        self._player_actions(player)
+
+    def _roll_dice(self):
+        """Roll, and move the robber or hand out what the number produces.
+        """
         number = self.roll()
-        player_board = deepcopy(self.board)
-        player_hand = deepcopy(self.hands[player.name])
+        if self.log is not None:
+            self.log.roll(number)
         if number == 7:
+            robber = self.board.robber_position()
             self._move_robber()
+            if self.log is not None and \
+                    self.board.robber_position() != robber:
+                self.log.robber(self.board)
         else:
             self._distribute_resources(number)
 
-        # Regular turn:
-        player_board = deepcopy(self.board)
-        player_hand = deepcopy(self.hands[player.name])
+    def _player_actions(self, player):
+        """Apply the player's actions until they end their turn.
+
+        The player gets a fresh board after each action, so they
+        always see its effects.
+        """
         action = player_action.StartTurn()
         while not isinstance(action, player_action.EndTurn):
-            self._apply_action(action)
+            self._apply_action(player, action)
+            player_board = self._player_board()
+            player_hand = self.hands[player.name].copy()
             action = player.act(player_board, player_hand)
 
     def _move_robber(self):
         pass
 
     def _distribute_resources(self, number):
-        for player in self.players:
-            resources = draw_player_resources(self.board, player, number)
-            self.hands[player.name].add_resources(resources)
+        """Give every player the cards the number produces for them.
 
-    def _apply_action(action):
-        pass
+        The board keeps an index of what each number produces, so this
+        only touches players who receive something.
+        """
+        log = self.log
+        for player_name, resource, count in self.board.production(number):
+            cards = [resource] * count
+            self.hands[player_name].add_resources(cards)
+            if log is not None:
+                log.grant(player_name, cards)
+
+    def _apply_action(self, player, action):
+        """Carry out a player's action on the global state.
+
+        An action the player cannot afford, or that breaks the rules,
+        raises GameRuleViolation and changes nothing.
+        """
+        if isinstance(action, player_action.BankTrade):
+            self._bank_trade(player, action)
+        elif type(action) in _BUILDS:
+            self._build(player, action)
+
+    def _bank_trade(self, player, action):
+        if action.receive not in game_constants.RESOURCE_TILE_TYPES:
+            msg = "The bank only trades resources."
+            raise GameRuleViolation(msg)
+        hand = self.hands[player.name]
+        given = [action.give] * game_constants.BANK_TRADE_RATE
+        hand.remove_resources(given)
+        hand.add_resources([action.receive])
+        if self.log is not None:
+            self.log.spend(player.name, given)
+            self.log.grant(player.name, [action.receive])
+
+    def _build(self, player, action):
+        """Build a road, town or city, taking its cost from the hand.
+        """
+        piece, cost, limit = _BUILDS[type(action)]
+        board = self.board
+        hand = self.hands[player.name]
+        if not hand.has_resources(cost):
+            msg = "Not enough resources."
+            raise GameRuleViolation(msg)
+        if board.pieces(player.name)[piece] >= limit:
+            msg = "No {0}s left to build.".format(piece)
+            raise GameRuleViolation(msg)
+        if piece == 'road':
+            if not board.can_build_road(action.hexagon_coord, action.edge,
+                                        player.name):
+                msg = "Roads must join your own roads or buildings."
+                raise GameRuleViolation(msg)
+            board.add_road(action.hexagon_coord, action.edge, player.name)
+            corner = action.edge
+        elif piece == 'town':
+            if not board.can_build_town(action.hexagon_coord, action.vertex,
+                                        player.name):
+                msg = "Towns must keep their distance and join your roads."
+                raise GameRuleViolation(msg)
+            board.add_town(action.hexagon_coord, action.vertex, player.name)
+            corner = action.vertex
+        else:
+            board.upgrade_town(action.hexagon_coord, action.vertex,
+                               player.name)
+            corner = action.vertex
+        hand.remove_resources(cost)
+        if self.log is not None:
+            self.log.build(board, piece, action.hexagon_coord, corner,
+                           player.name)
+            self.log.spend(player.name, cost)
+
+
+# What each build action places, what it costs, and how many of that
+# piece a player has.
+_BUILDS = {
+    player_action.BuildRoad: (
+        'road', game_constants.ROAD_COST, game_constants.ROAD_LIMIT
+    ),
+    player_action.BuildTown: (
+        'town', game_constants.TOWN_COST, game_constants.TOWN_LIMIT
+    ),
+    player_action.UpgradeTown: (
+        'city', game_constants.CITY_COST, game_constants.CITY_LIMIT
+    ),
+}
 
 
 def who_won(board):
-    pass
+    """Return the player with enough points to win, or None.
+    """
+    points = board.victory_points()
+    for player_name, player_points in points.items():
+        if player_points >= game_constants.WINNING_POINTS:
+            return player_name
+    return None
 
 
 def draw_player_resources(board, player, number):
-    pass
+    """Return the resource cards a roll of number gives player.
+    """
+    return [resource
+            for player_name, resource, count in board.production(number)
+            if player_name == player
+            for _ in range(count)]
 
 
-def initial_resources(hex_coord, vertex):
-    pass
+def initial_resources(board, hexagon_coord, vertex):
+    """Return one card for each resource tile around a starting town.
+    """
+    return [tile.tile_type
+            for tile in board.vertex_tiles(hexagon_coord, vertex)
+            if tile.tile_type in game_constants.RESOURCE_TILE_TYPES]
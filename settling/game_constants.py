@@ -14,7 +14,10 @@ NON_RESOURCE_TILE_TYPES = ("water", "desert")
 
 TILE_TYPES = RESOURCE_TILE_TYPES + NON_RESOURCE_TILE_TYPES
 
-PORT_TYPES = ("3:1 port", "brick port", "wood port", "sheep port", "ore port")
+PORT_TYPES = (
+    "3:1 port", "brick port", "wood port", "wheat port", "sheep port",
+    "ore port"
+)
 
 NUMBERS = (2, 3, 4, 5, 6, 8, 9, 10, 11, 12)
 
@@ -37,7 +40,33 @@ STANDARD_PORT_MAP = (
     ((-2, 2, 0), "3:1 port", 2, 3),
     ((-2, 1, 1), "wheat port", 3, 4),
     ((-1, -1, 2), "ore port", 3, 4),
-    ((0, -2, -2), "3:1 port", 4, 5),
+    ((0, -2, 2), "3:1 port", 4, 5),
     ((1, -2, 1), "sheep port", 5, 0),
     ((2, -1, -1), "3:1 port", 5, 0)
 )
+
+ROAD_COST = ("brick", "wood")
+
+TOWN_COST = ("brick", "wood", "wheat", "sheep")
+
+CITY_COST = ("wheat", "wheat", "ore", "ore", "ore")
+
+# Each player's supply of pieces, and the cards given for one card in a
+# trade with the bank.
+ROAD_LIMIT = 15
+
+TOWN_LIMIT = 5
+
+CITY_LIMIT = 4
+
+BANK_TRADE_RATE = 4
+
+# Victory points for each building, for holding the longest road, and
+# the total needed to win.
+TOWN_POINTS = 1
+
+CITY_POINTS = 2
+
+LONGEST_ROAD_POINTS = 2
+
+WINNING_POINTS = 10
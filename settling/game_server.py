@@ -0,0 +1,322 @@
+"""Play many games at once on one asyncio event loop.
+
+Players are often remote services, and Game.game_loop waits on each of
+their decisions in turn. An AsyncGame plays exactly the same game, but
+awaits any player hook that returns an awaitable, so a GameServer can
+interleave thousands of games on one event loop: while one game waits
+on a slow bot, the others carry on.
+
+  - Each decision can be given a timeout. A player that misses it is
+    given a default move: the best ranked opening for a starting town,
+    no action card, or the end of their turn.
+  - Every turn yields to the event loop, so games between quick local
+    players take turns with the rest instead of running to the end.
+  - Hooks that are plain functions run on the event loop itself when
+    there is no timeout, and so must then be quick. With a timeout they
+    run in the event loop's default executor instead, unless the
+    player has a true asynchronous attribute, as a RemotePlayer made
+    for an AsyncGame does. A thread that misses its timeout cannot be
+    stopped, and keeps one of the executor's threads until it returns.
+
+    server = GameServer(concurrency=1000)
+    results = asyncio.run(server.run(games))
+    print(server.metrics.to_json(indent=2))
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import time
+from collections import Counter, namedtuple
+
+from settling import player_action
+from settling.game import Game, who_won
+from settling.instrumentation import Histogram
+
+# error is the exception the game raised, in which case winner is None,
+# or else the first one raised closing its players.
+ServedGame = namedtuple('ServedGame',
+                        ['index', 'winner', 'turns', 'seconds', 'error'])
+
+
+class AsyncGame(Game):
+    """A Game whose players' hooks may be coroutines.
+
+    Each awaited decision may take up to decision_timeout seconds, or
+    as long as it likes if that is None. Timeouts are counted by player
+    in self.timeouts, and every decision is reported to metrics, a
+    ServerMetrics, if there is one.
+
+    An Instrumentation times the game as it does a Game's, except that
+    awaited phases and decisions include any time spent on other games
+    while they were waiting.
+    """
+    def __init__(self, board, players, roll, private_boards=False,
+                 max_turns=None, instrumentation=None, log=None,
+                 decision_timeout=None, metrics=None):
+        super().__init__(board, players, roll, private_boards=private_boards,
+                         max_turns=max_turns, instrumentation=instrumentation,
+                         log=log)
+        self.decision_timeout = decision_timeout
+        self.metrics = metrics
+        self.timeouts = Counter()
+
+    async def game_loop(self):
+        """Set up and play the game, and return the name of the winner.
+        """
+        self._begin_log()
+        await self._board_set_up()
+        return await self.play()
+
+    async def play(self, first=0):
+        """Play turns as Game.play does, yielding to other tasks at the
+        start of each one.
+        """
+        self._begin_log()
+        winner = who_won(self.board)
+        index = first
+        while winner is None and not self._out_of_turns():
+            await asyncio.sleep(0)
+            if self.log is not None:
+                self.log.turn(self, index)
+            await self._player_turn(self.players[index])
+            self.turns += 1
+            winner = who_won(self.board)
+            index = (index + 1) % len(self.players)
+        if self.log is not None:
+            self.log.end(self, winner)
+        return winner
+
+    async def _board_set_up(self):
+        for player in self.players:
+            await self._starting_town(player)
+        for player in reversed(self.players):
+            hexagon_coord, vertex = await self._starting_town(player)
+            self._starting_resources(player, hexagon_coord, vertex)
+
+    async def _starting_town(self, player):
+        hexagon_coord, vertex = await self._decide(
+            player, 'starting_town', self._player_board())
+        self._place_starting_town(player, hexagon_coord, vertex)
+        return hexagon_coord, vertex
+
+    async def _player_turn(self, player):
+        action = await self._decide(player, 'play_action_card',
+                                    self._player_board(),
+                                    self.hands[player.name].copy())
+        if isinstance(action, player_action.PlayActionCard):
+            self._apply_action(player, action)
+        self._roll_dice()
+        await self._player_actions(player)
+
+    async def _player_actions(self, player):
+        action = player_action.StartTurn()
+        while not isinstance(action, player_action.EndTurn):
+            self._apply_action(player, action)
+            action = await self._decide(player, 'act', self._player_board(),
+                                        self._hand_copy(player))
+
+    def _hand_copy(self, player):
+        return self.hands[player.name].copy()
+
+    async def _decide(self, player, hook, *args):
+        """Return what player's hook decides, given args.
+
+        An awaitable is awaited for up to decision_timeout seconds, and
+        then cancelled in favour of the default move. With a timeout,
+        plain functions are run in the default executor and waited on
+        the same way, so a slow one cannot hold up other games.
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            start = metrics.clock()
+        method = getattr(player, hook)
+        if self.decision_timeout is None or _awaits(player, method):
+            decision = method(*args)
+        else:
+            decision = asyncio.get_running_loop().run_in_executor(
+                None, method, *args)
+        timed_out = False
+        if not inspect.isawaitable(decision):
+            pass
+        elif self.decision_timeout is None:
+            decision = await decision
+        else:
+            try:
+                decision = await asyncio.wait_for(decision,
+                                                  self.decision_timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                self.timeouts[player.name] += 1
+                decision = self._default(player, hook)
+        if metrics is not None:
+            metrics.decision(metrics.clock() - start, timed_out)
+        return decision
+
+    def _default(self, player, hook):
+        """Return the move made for a player who runs out of time.
+        """
+        if hook == 'starting_town':
+            return self.board.rank_openings(player.name)[0]
+        elif hook == 'act':
+            return player_action.EndTurn()
+        return None
+
+
+def _awaits(player, method):
+    """Return True if method returns an awaitable rather than blocking.
+    """
+    return (getattr(player, 'asynchronous', False) or
+            inspect.iscoroutinefunction(inspect.unwrap(method)))
+
+
+def _close_players(players, error):
+    """Close each player that has a close method, and return error, or
+    the first exception a close raised if error is None.
+    """
+    for player in players:
+        if hasattr(player, 'close'):
+            try:
+                player.close()
+            except Exception as e:
+                if error is None:
+                    error = e
+    return error
+
+
+class ServerMetrics:
+    """Throughput and latency of the games played by a GameServer.
+
+    Game latency is the time from a game's start to its end, and
+    decision latency the time each player's hook took.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.active = 0
+        self.peak_active = 0
+        self.turns = 0
+        self.timeouts = 0
+        self.game_seconds = Histogram()
+        self.decision_seconds = Histogram()
+        self._start = clock()
+
+    def game_started(self):
+        self.started += 1
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def game_finished(self, seconds, turns, error=None):
+        self.active -= 1
+        self.finished += 1
+        if error is not None:
+            self.failed += 1
+        self.turns += turns
+        self.game_seconds.add(seconds)
+
+    def decision(self, seconds, timed_out=False):
+        self.decision_seconds.add(seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    @property
+    def elapsed(self):
+        return self.clock() - self._start
+
+    def snapshot(self):
+        """Return everything recorded so far as plain data.
+        """
+        elapsed = self.elapsed or float('inf')
+        return {
+            'elapsed': self.elapsed,
+            'games': {
+                'started': self.started,
+                'finished': self.finished,
+                'failed': self.failed,
+                'active': self.active,
+                'peak_active': self.peak_active,
+            },
+            'throughput': {
+                'games_per_second': self.finished / elapsed,
+                'turns_per_second': self.turns / elapsed,
+                'decisions_per_second':
+                    self.decision_seconds.count / elapsed,
+            },
+            'timeouts': self.timeouts,
+            'game_latency': self.game_seconds.summary(),
+            'decision_latency': self.decision_seconds.summary(),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+class GameServer:
+    """Play AsyncGames concurrently on the running event loop.
+
+    At most concurrency games are in play at once, and the rest wait
+    for a free slot. A game that raises is reported as failed, and
+    the others carry on. Once a game is over, any of its players with
+    a close method are closed.
+    """
+    def __init__(self, concurrency=1000, metrics=None):
+        self.concurrency = concurrency
+        self.metrics = metrics if metrics is not None else ServerMetrics()
+
+    async def play(self, game, index=0):
+        """Play one game through, and return its ServedGame.
+        """
+        metrics = self.metrics
+        if game.metrics is None:
+            game.metrics = metrics
+        metrics.game_started()
+        start = metrics.clock()
+        winner = error = None
+        try:
+            winner = await game.game_loop()
+        except Exception as e:
+            error = e
+        except asyncio.CancelledError as e:
+            error = e
+            raise
+        finally:
+            error = _close_players(game.players, error)
+            seconds = metrics.clock() - start
+            metrics.game_finished(seconds, game.turns, error)
+        return ServedGame(index, winner, game.turns, seconds, error)
+
+    async def serve(self, games):
+        """Yield a ServedGame for each game as it finishes.
+
+        games is any iterable of AsyncGames, numbered from 0, and is
+        only drawn from as slots free up, so it can make games on
+        demand. Games still in play when the caller stops iterating
+        are cancelled.
+        """
+        games = enumerate(games)
+        finished = asyncio.Queue()
+        running = set()
+        try:
+            while True:
+                free = self.concurrency - len(running)
+                for index, game in itertools.islice(games, free):
+                    task = asyncio.ensure_future(self.play(game, index))
+                    task.add_done_callback(finished.put_nowait)
+                    running.add(task)
+                if not running:
+                    return
+                task = await finished.get()
+                running.discard(task)
+                yield task.result()
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def run(self, games):
+        """Play every game, and return their ServedGames in order.
+        """
+        results = [result async for result in self.serve(games)]
+        return sorted(results, key=lambda result: result.index)
@@ -1,4 +1,37 @@
+from collections import Counter
+
+from settling.exceptions import GameRuleViolation
+
+
 class Hand:
     def __init__(self, cards=None, action_cards=None):
         self.cards = cards or []
         self.action_cards = action_cards or []
+
+    def add_resources(self, resources):
+        """Add a list of resource cards to the hand.
+        """
+        self.cards.extend(resources)
+
+    def has_resources(self, resources):
+        """Return True if the hand holds every card in resources.
+        """
+        held = Counter(self.cards)
+        return all(held[card] >= count
+                   for card, count in Counter(resources).items())
+
+    def remove_resources(self, resources):
+        """Take a list of resource cards out of the hand.
+
+        Fails, leaving the hand as it was, if any card is missing.
+        """
+        if not self.has_resources(resources):
+            msg = "Not enough resources."
+            raise GameRuleViolation(msg)
+        for card in resources:
+            self.cards.remove(card)
+
+    def copy(self):
+        """Return a hand that can be modified without affecting this one.
+        """
+        return type(self)(list(self.cards), list(self.action_cards))
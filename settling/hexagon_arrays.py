@@ -0,0 +1,147 @@
+"""Batch versions of the hexagon_utils coordinate conversions.
+
+Every function in this module takes NumPy integer arrays and returns
+NumPy integer arrays, giving the same results as the corresponding
+scalar function in hexagon_utils applied to each element:
+
+  |-----------------------------+-----------+-----------|
+  | Function                    | Input     | Output    |
+  |-----------------------------+-----------+-----------|
+  | neighbors                   | (N, 3)    | (N, 6, 3) |
+  | hexagons_from_ordinals      | (N,)      | (N, 3)    |
+  | ordinals_from_hexagons      | (N, 3)    | (N,)      |
+  | rsos_from_ordinals          | (N,)      | (N, 3)    |
+  | ordinals_from_rsos          | (N, 3)    | (N,)      |
+  | hexagons_from_rsos          | (N, 3)    | (N, 3)    |
+  | rsos_from_hexagons          | (N, 3)    | (N, 3)    |
+  |-----------------------------+-----------+-----------|
+
+All arithmetic is done in int64, which keeps the conversions exact for
+ordinals below 10^17 (rings below roughly 1.8 * 10^8).
+"""
+
+import numpy as np
+
+from settling import hexagon_utils as hx
+
+
+RING_1 = np.array(hx.RING_1, dtype=np.int64)
+
+
+def neighbors(hexagons):
+    """Return the six neighbors of each hexagon, in clockwise order.
+    """
+    hexagons = _as_coords(hexagons)
+    return hexagons[:, np.newaxis, :] + RING_1[np.newaxis, :, :]
+
+
+def hexagons_from_ordinals(ordinals):
+    """Convert an array of ordinals to hexagon coordinates.
+    """
+    return hexagons_from_rsos(rsos_from_ordinals(ordinals))
+
+
+def ordinals_from_hexagons(hexagons):
+    """Convert an array of hexagon coordinates to ordinals.
+    """
+    return ordinals_from_rsos(rsos_from_hexagons(hexagons))
+
+
+def rsos_from_ordinals(ordinals):
+    """Convert an array of ordinals to ring spine offset coordinates.
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    if ordinals.ndim != 1:
+        raise ValueError("Ordinals must be a one dimensional array")
+    if np.any(ordinals < 0):
+        raise ValueError("Ordinal coordinates must not be negative")
+    # Ring 0 is handled by clamping the ordinal so the square root
+    # stays real, then zeroing the result out.
+    center = ordinals == 0
+    rings = (3 + _isqrt(12 * np.maximum(ordinals, 1) - 3)) // 6
+    in_ring = ordinals - _tiles_before_rings(rings)
+    safe_rings = np.maximum(rings, 1)
+    rsos = np.empty((len(ordinals), 3), dtype=np.int64)
+    rsos[:, 0] = np.where(center, 0, rings)
+    rsos[:, 1] = np.where(center, 0, in_ring // safe_rings)
+    rsos[:, 2] = np.where(center, 0, in_ring % safe_rings)
+    return rsos
+
+
+def ordinals_from_rsos(rsos):
+    """Convert an array of ring spine offset coordinates to ordinals.
+    """
+    rings, spines, offsets = _validate_rsos(rsos)
+    ordinals = _tiles_before_rings(rings) + spines * rings + offsets
+    return np.where(rings == 0, 0, ordinals)
+
+
+def hexagons_from_rsos(rsos):
+    """Convert an array of ring spine offset coordinates to hexagons.
+    """
+    rings, spines, offsets = _validate_rsos(rsos)
+    corners = RING_1[spines] * rings[:, np.newaxis]
+    steps = RING_1[(spines + 2) % 6] * offsets[:, np.newaxis]
+    return corners + steps
+
+
+def rsos_from_hexagons(hexagons):
+    """Convert an array of hexagon coordinates to ring spine offsets.
+
+    Each hexagon's spine is picked by testing which side of its ring
+    it lies on, in the same order as hexagon_utils.rso_from_hexagon.
+    """
+    hexagons = _as_coords(hexagons)
+    if np.any(hexagons.sum(axis=1) != 0):
+        raise ValueError("Hexagon coordinates must sum to zero")
+    x, y, z = hexagons[:, 0], hexagons[:, 1], hexagons[:, 2]
+    rings = np.abs(hexagons).max(axis=1)
+    sides = [
+        (z == -rings) & (x > 0),
+        (y == rings) & (z < 0),
+        (x == -rings) & (y > 0),
+        (z == rings) & (x < 0),
+        (y == -rings) & (z > 0),
+    ]
+    spines = np.select(sides, [0, 1, 2, 3, 4], default=5)
+    offsets = np.select(sides, [y, -x, z, -y, x], default=-z)
+    center = rings == 0
+    rsos = np.empty((len(hexagons), 3), dtype=np.int64)
+    rsos[:, 0] = rings
+    rsos[:, 1] = np.where(center, 0, spines)
+    rsos[:, 2] = np.where(center, 0, offsets)
+    return rsos
+
+
+def _as_coords(coords):
+    coords = np.asarray(coords, dtype=np.int64)
+    if coords.ndim != 2 or coords.shape[1] != 3:
+        raise ValueError("Coordinates must be an array of shape (N, 3)")
+    return coords
+
+
+def _validate_rsos(rsos):
+    rsos = _as_coords(rsos)
+    rings, spines, offsets = rsos[:, 0], rsos[:, 1], rsos[:, 2]
+    valid_center = (rings == 0) & (spines == 0) & (offsets == 0)
+    valid_ring = ((rings > 0) & (spines >= 0) & (spines < 6)
+                  & (offsets >= 0) & (offsets < rings))
+    if not np.all(valid_center | valid_ring):
+        raise ValueError("Array contains invalid ring, spine, offsets")
+    return rings, spines, offsets
+
+
+def _tiles_before_rings(rings):
+    return np.where(rings == 0, 0, 1 + 3 * rings * (rings - 1))
+
+
+def _isqrt(values):
+    """Exact integer square root of a non-negative int64 array.
+
+    The floating point root can be off by one for large values, so it
+    is nudged into place with integer comparisons.
+    """
+    roots = np.floor(np.sqrt(values.astype(np.float64))).astype(np.int64)
+    roots -= (roots * roots > values)
+    roots += ((roots + 1) * (roots + 1) <= values)
+    return roots
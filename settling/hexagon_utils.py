@@ -29,6 +29,12 @@ This library provides utilities for converting between these
 coordinate systems, as well as some other useful tools for working
 with the coordinate systems.
 
+All of the conversions are closed form: ring r starts at ordinal
+1 + 3r(r - 1), and each of its six spines covers r consecutive
+ordinals. The original search based conversions are kept at the
+bottom of this module as a reference implementation, so the two can
+be checked against each other.
+
 The following graph, and table gives a number of examples of the
 mapping between ring, spine and offset, and attempts to graphically
 show how they are calculated and related.
@@ -67,6 +73,12 @@ show how they are calculated and related.
     |-----+-----------+--------------|
 """
 
+from math import isqrt
+
+
+RING_1 = ((1, 0, -1), (0, 1, -1), (-1, 1, 0),
+          (-1, 0, 1), (0, -1, 1), (1, -1, 0))
+
 
 def neighbors(hexagon_coord):
     """Return all the hexagon_coordinates of the surrounding six tiles.
@@ -75,19 +87,14 @@ def neighbors(hexagon_coord):
     starting tile is the northeast tile, or for example, the first
     neighbor for the tile with ordinal 0, is the tile with ordinal 1.
     """
-    deltas = [(1, 0, -1), (0, 1, -1), (-1, 1, 0),
-              (-1, 0, 1), (0, -1, 1), (1, -1, 0)]
-    neighbors = []
-    for delta in deltas:
-        neighbor = tuple(coord + d for coord, d in zip(hexagon_coord, delta))
-        neighbors.append(neighbor)
-    return neighbors
+    x, y, z = hexagon_coord
+    return [(x + 1, y, z - 1), (x, y + 1, z - 1), (x - 1, y + 1, z),
+            (x - 1, y, z + 1), (x, y - 1, z + 1), (x + 1, y - 1, z)]
 
 
 def hexagon_from_ordinal(ordinal_coord):
     """Convert from an ordinal to a hexagon coordinate.
     """
-    # If the value is not in the cache, compute it explicitly
     rso = rso_from_ordinal(ordinal_coord)
     hexagon_coords = hexagon_from_rso(rso)
     return hexagon_coords
@@ -95,48 +102,171 @@ def hexagon_from_ordinal(ordinal_coord):
 
 def hexagon_from_rso(rso_coord):
     """Convert from a ring spine offset to a hexagon coordinate.
+
+    The tile sits `offset` steps from the spine's corner, walking
+    clockwise towards the next spine.
+    """
+    ring, spine, offset = _validate_rso(rso_coord)
+    if ring == 0:
+        return (0, 0, 0)
+    cx, cy, cz = RING_1[spine]
+    dx, dy, dz = RING_1[(spine + 2) % 6]
+    return (ring * cx + offset * dx,
+            ring * cy + offset * dy,
+            ring * cz + offset * dz)
+
+
+def ordinal_from_hexagon(hexagon_coord):
+    """Convert from a hexagon to an ordianl coordinate.
+    """
+    return ordinal_from_rso(rso_from_hexagon(hexagon_coord))
+
+
+def ordinal_from_rso(rso_coord):
+    """Convert from a ring spine offset to an ordinal coordinate.
+    """
+    ring, spine, offset = _validate_rso(rso_coord)
+    if ring == 0:
+        return 0
+    return _tiles_before_ring(ring) + spine * ring + offset
+
+
+def rso_from_hexagon(hexagon_coord):
+    """Convert from a hexagon to ring spine offset coordinate.
+
+    The ring is the distance from the center. Which spine the tile
+    belongs to is determined by which side of the ring it lies on.
     """
+    x, y, z = hexagon_coord
+    if x + y + z != 0:
+        msg = "{0} are not valid hexagon coordinates"
+        raise ValueError(msg.format(hexagon_coord))
+    ring = max(abs(x), abs(y), abs(z))
+    if ring == 0:
+        return (0, 0, 0)
+    elif z == -ring and x > 0:
+        return (ring, 0, y)
+    elif y == ring and z < 0:
+        return (ring, 1, -x)
+    elif x == -ring and y > 0:
+        return (ring, 2, z)
+    elif z == ring and x < 0:
+        return (ring, 3, -y)
+    elif y == -ring and z > 0:
+        return (ring, 4, x)
+    else:
+        return (ring, 5, -z)
+
+
+def rso_from_ordinal(ordinal_coord):
+    """Convert from an ordinal to a ring spine offset coordinate.
+    """
+    if ordinal_coord < 0:
+        msg = "{0} is not a valid ordinal coordinate"
+        raise ValueError(msg.format(ordinal_coord))
+    ring = _find_ring(ordinal_coord)
+    spine = _find_spine(ordinal_coord, ring)
+    offset = _find_offset(ordinal_coord, ring)
+    return ring, spine, offset
+
+
+def _validate_rso(rso_coord):
+    """Return the rso coordinate, raising ValueError if it is invalid.
+    """
+    ring, spine, offset = rso_coord
+    valid_center = ring == 0 and spine == 0 and offset == 0
+    valid_ring = ring > 0 and 0 <= spine < 6 and 0 <= offset < ring
+    if not (valid_center or valid_ring):
+        err_msg = "{r}, {s}, {o} is not a valid ring, spine, offset."
+        raise ValueError(err_msg.format(r=ring, s=spine, o=offset))
+    return ring, spine, offset
+
+
+def _find_ring(ordinal):
+    """Invert the count of tiles before a ring.
+
+    Ring r holds the ordinals 3r(r - 1) + 1 through 3r(r + 1), so the
+    ring is the largest r with 3r(r - 1) <= ordinal - 1. Solving the
+    quadratic with an integer square root keeps this exact for any
+    ordinal.
+    """
+    if ordinal == 0:
+        return 0
+    return (3 + isqrt(12 * ordinal - 3)) // 6
+
+
+def _find_spine(ordinal, ring):
+    if ordinal == 0:
+        return 0
+    ordinal_in_ring = ordinal - _tiles_before_ring(ring)
+    return ordinal_in_ring // ring
+
+
+def _find_offset(ordinal, ring):
+    if ordinal == 0:
+        return 0
+    ordinal_in_ring = ordinal - _tiles_before_ring(ring)
+    return ordinal_in_ring % ring
+
+
+def _tiles_in_ring(ring):
+    return 1 if ring == 0 else ring * 6
+
+
+def _tiles_before_ring(ring):
+    return 0 if ring == 0 else 1 + 3 * ring * (ring - 1)
+
+
+# Reference implementations
+# -------------------------
+#
+# These are the original conversions, which search and recurse
+# rather than compute directly. They are slow, and only reach the
+# first 1000 ordinals, but their definition of the ordering is easy
+# to check by eye. The test suite compares them to the closed form
+# versions above.
+
+
+def _reference_hexagon_from_ordinal(ordinal_coord):
+    rso = _reference_rso_from_ordinal(ordinal_coord)
+    return _reference_hexagon_from_rso(rso)
+
+
+def _reference_hexagon_from_rso(rso_coord):
     ring, spine, offset = rso_coord
-    ring_1 = [(1, 0, -1), (0, 1, -1), (-1, 1, 0),
-              (-1, 0, 1), (0, -1, 1), (1, -1, 0)]
     if ring == 0 and spine == 0 and offset == 0:
         # We're in the center
         return (0, 0, 0)
     elif ring == 1 and offset == 0:
         # We're in the first ring
-        return ring_1[spine]
+        return RING_1[spine]
     elif ring > 1 and offset == 0:
         # We're on a spine
-        return tuple(ring * i for i in ring_1[spine])
+        return tuple(ring * i for i in RING_1[spine])
     elif ring > 1 and offset != 0:
         # We move along the spine until we hit the next spine.
-        move = ring_1[spine]
+        move = RING_1[spine]
         next_rso = (ring - 1,
                     spine if offset < (ring - 1) else (spine + 1) % 6,
                     offset if offset < (ring - 1) else 0)
-        next_loc = hexagon_from_rso(next_rso)
+        next_loc = _reference_hexagon_from_rso(next_rso)
         return tuple(m + l for m, l in zip(move, next_loc))
     else:
         err_msg = "{r}, {s}, {o} is not a valid ring, spine, offset."
         raise ValueError(err_msg.format(r=ring, s=spine, o=offset))
 
 
-def ordinal_from_hexagon(hexagon_coord):
-    """Convert from a hexagon to an ordianl coordinate.
-    """
+def _reference_ordinal_from_hexagon(hexagon_coord):
     # First check that the coordinates are valid
     if sum(hexagon_coord) != 0:
         msg = "{0} are not valid hexagon coordinates"
         raise ValueError(msg.format(hexagon_coord))
     # Iterate through all the ordinal numbers, comparing to their
     # hexagon coordinates to those given.
-    #
-    # This method ensures that the ordering is consistent in both
-    # directions.
     MAX_SEARCH = 1000
     current_ordinal = 0
     while current_ordinal < MAX_SEARCH:
-        hexagon = hexagon_from_ordinal(current_ordinal)
+        hexagon = _reference_hexagon_from_ordinal(current_ordinal)
         if hexagon == hexagon_coord:
             return current_ordinal
         current_ordinal += 1
@@ -144,60 +274,33 @@ def ordinal_from_hexagon(hexagon_coord):
     raise ValueError(err_msg.format(MAX_SEARCH))
 
 
-def ordinal_from_rso(rso_coord):
-    """Convert from a ring spine offset to an ordinal coordinate.
-    """
-    hexagon_coord = hexagon_from_rso(rso_coord)
-    ordinal_coord = ordinal_from_hexagon(hexagon_coord)
-    return ordinal_coord
+def _reference_ordinal_from_rso(rso_coord):
+    hexagon_coord = _reference_hexagon_from_rso(rso_coord)
+    return _reference_ordinal_from_hexagon(hexagon_coord)
 
 
-def rso_from_hexagon(hexagon_coord):
-    """Convert from a hexagon to ring spine offset coordinate.
-    """
-    ordinal_coord = ordinal_from_hexagon(hexagon_coord)
-    rso_coord = rso_from_ordinal(ordinal_coord)
-    return rso_coord
+def _reference_rso_from_hexagon(hexagon_coord):
+    ordinal_coord = _reference_ordinal_from_hexagon(hexagon_coord)
+    return _reference_rso_from_ordinal(ordinal_coord)
 
 
-def rso_from_ordinal(ordinal_coord):
-    """Convert from an ordinal to a ring spine offset coordinate.
-    """
-    ring = _find_ring(ordinal_coord)
-    spine = _find_spine(ordinal_coord, ring)
-    offset = _find_offset(ordinal_coord, ring)
+def _reference_rso_from_ordinal(ordinal_coord):
+    ring = _reference_find_ring(ordinal_coord)
+    tiles_before_ring = sum(_tiles_in_ring(r) for r in range(ring))
+    ordinal_in_ring = ordinal_coord - tiles_before_ring
+    tiles_per_spine = _tiles_in_ring(ring) // 6
+    if ordinal_coord == 0:
+        return 0, 0, 0
+    spine = ordinal_in_ring // tiles_per_spine
+    offset = ordinal_in_ring % tiles_per_spine
     return ring, spine, offset
 
 
-def _find_ring(ordinal, ring_so_far=0):
+def _reference_find_ring(ordinal, ring_so_far=0):
     """Recursively traverses triangular numbers.
     """
     check = ordinal - (6 * ring_so_far)
     if check <= 0:
         return ring_so_far
     else:
-        return _find_ring(check, ring_so_far + 1)
-
-
-def _find_spine(ordinal, ring):
-    if ordinal == 0:
-        return 0
-    tiles_before_ring = sum(_tiles_in_ring(r) for r in range(ring))
-    ordinal_in_ring = ordinal - tiles_before_ring
-    tiles_per_spine = _tiles_in_ring(ring) // 6
-    spine = ordinal_in_ring // tiles_per_spine
-    return spine
-
-
-def _find_offset(ordinal, ring):
-    if ordinal == 0:
-        return 0
-    tiles_before_ring = sum(_tiles_in_ring(r) for r in range(ring))
-    ordinal_in_ring = ordinal - tiles_before_ring
-    tiles_per_spine = _tiles_in_ring(ring) // 6
-    offset = ordinal_in_ring % tiles_per_spine
-    return offset
-
-
-def _tiles_in_ring(ring):
-    return 1 if ring == 0 else ring * 6
+        return _reference_find_ring(check, ring_so_far + 1)
@@ -0,0 +1,269 @@
+"""Counters and latency histograms for the phases of a game.
+
+An Instrumentation is attached to a Game by passing it in:
+
+    stats = Instrumentation()
+    Game(board, players, roll, instrumentation=stats).game_loop()
+    print(stats.to_json(indent=2))
+
+It times the game's phases, each player's decisions and the hot board
+methods, per phase and per player. Nothing is wrapped unless an
+Instrumentation is passed, so uninstrumented games pay nothing at all:
+  - the game's own methods are replaced on the instance with timed
+    versions;
+  - the board's class is replaced with a subclass whose listed methods
+    are timed, so the game still holds the very same board;
+  - players are put behind thin proxies that time the listed methods
+    and pass everything else straight through.
+
+Calls that return an awaitable, as an AsyncGame's do, are timed until
+the awaitable completes.
+"""
+
+import functools
+import inspect
+import json
+import time
+
+# Game methods timed, with the phase they are recorded under.
+GAME_PHASES = (
+    ('_board_set_up', 'setup'),
+    ('_player_turn', 'turn'),
+    ('_player_board', 'copy'),
+    ('roll', 'roll'),
+    ('_distribute_resources', 'distribute'),
+    ('_apply_action', 'apply_action'),
+)
+
+# Methods of players, recorded as 'decide.<method>'.
+PLAYER_METHODS = ('starting_town', 'play_action_card', 'act')
+
+# Hot Board methods, recorded as 'board.<method>'.
+BOARD_METHODS = (
+    'add_road', 'add_town', 'upgrade_town', 'move_robber', 'has_road',
+    'has_town', 'has_city', 'production', 'can_build_road',
+    'can_build_town', 'legal_town_sites', 'legal_roads',
+    'legal_city_upgrades', 'rank_openings', 'pieces', 'victory_points',
+    'snapshot',
+)
+
+# Game methods whose first argument is the player acting.
+_PER_PLAYER = ('_player_turn', '_apply_action')
+
+_BUCKETS = 64
+
+
+class Histogram:
+    """Latencies in power of two buckets of nanoseconds.
+
+    Bucket i holds durations of less than 2**i nanoseconds that did not
+    fit in bucket i - 1.
+    """
+    __slots__ = ('count', 'total', 'maximum', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * _BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        bucket = int(seconds * 1e9).bit_length()
+        self.buckets[min(bucket, _BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Return an upper bound on the given fraction of latencies.
+        """
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(2 ** bucket / 1e9, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'max': self.maximum,
+        }
+
+
+class Instrumentation:
+    """Counters and histograms, keyed by phase and player.
+
+    Timings are also kept for each phase over all players, under the
+    player None.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.histograms = {}
+        self.counters = {}
+
+    def record(self, phase, seconds, player=None):
+        for key in {(phase, None), (phase, player)}:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name, player=None, n=1):
+        for key in {(name, None), (name, player)}:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def timed(self, function, phase, player=None, player_arg=False):
+        """Return function, recording the time of each call under phase.
+
+        With player_arg the player is taken from the first argument.
+        """
+        clock = self.clock
+        record = self.record
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            who = args[0].name if player_arg else player
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                record(phase, clock() - start, who)
+                raise
+            if inspect.isawaitable(result):
+                return _timed_awaitable(result, record, phase, who, clock,
+                                        start)
+            record(phase, clock() - start, who)
+            return result
+        return timed_function
+
+    def instrument_game(self, game):
+        """Time game's phases, its players' decisions and its board.
+        """
+        for name, phase in GAME_PHASES:
+            method = getattr(game, name)
+            setattr(game, name, self.timed(method, phase,
+                                           player_arg=name in _PER_PLAYER))
+        apply_action = game._apply_action
+
+        def counted_apply_action(player, action):
+            self.count('action.' + type(action).__name__, player.name)
+            return apply_action(player, action)
+        game._apply_action = counted_apply_action
+        game.players = [TimedProxy(player, self, PLAYER_METHODS,
+                                   'decide.', player.name)
+                        for player in game.players]
+        self.instrument_board(game.board)
+
+    def instrument_board(self, board):
+        """Time board's hot methods, leaving it the same object.
+
+        Snapshots and pickles of the board are of its original class,
+        and so are not timed.
+        """
+        board.__class__ = self._timed_class(type(board))
+
+    def _timed_class(self, cls):
+        base = getattr(cls, '_untimed_class', cls)
+        namespace = {
+            '_untimed_class': base,
+            '__module__': base.__module__,
+            '__qualname__': base.__qualname__,
+            '__reduce_ex__': _reduce_untimed,
+        }
+        for name in BOARD_METHODS:
+            method = getattr(base, name, None)
+            if method is not None:
+                namespace[name] = self.timed(method, 'board.' + name)
+        timed_snapshot = namespace.get('snapshot', base.snapshot)
+
+        def snapshot(board):
+            copy = timed_snapshot(board)
+            copy.__class__ = base
+            return copy
+        namespace['snapshot'] = snapshot
+        return type(base.__name__, (base,), namespace)
+
+    def snapshot(self):
+        """Return everything recorded so far as plain data.
+
+        Each phase and counter has its total over all players, with a
+        'players' dict breaking it down where players are known.
+        """
+        phases = {}
+        for (phase, player), histogram in sorted(
+                self.histograms.items(), key=_sort_key):
+            if player is None:
+                phases[phase] = dict(histogram.summary(), players={})
+            else:
+                phases[phase]['players'][player] = histogram.summary()
+        counters = {}
+        for (name, player), value in sorted(self.counters.items(),
+                                            key=_sort_key):
+            if player is None:
+                counters[name] = {'total': value, 'players': {}}
+            else:
+                counters[name]['players'][player] = value
+        return {'phases': phases, 'counters': counters}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def reset(self):
+        self.histograms.clear()
+        self.counters.clear()
+
+
+def _sort_key(item):
+    # Totals (player None) sort before the players of the same phase.
+    (name, player), _ = item
+    return (name, player is not None, str(player))
+
+
+async def _timed_awaitable(awaitable, record, phase, player, clock, start):
+    try:
+        return await awaitable
+    finally:
+        record(phase, clock() - start, player)
+
+
+def _reduce_untimed(board, protocol):
+    # Timed board classes are made on the fly, so boards are pickled as
+    # their original class instead.
+    return (_new_untimed, (type(board)._untimed_class,),
+            board.__getstate__())
+
+
+def _new_untimed(cls):
+    return object.__new__(cls)
+
+
+class TimedProxy:
+    """Pass attribute access through to target, timing some methods.
+
+    Calls to each listed method are recorded as prefix + name, under
+    player.
+    """
+    def __init__(self, target, instrumentation, methods, prefix,
+                 player=None):
+        object.__setattr__(self, '_target', target)
+        for name in methods:
+            method = getattr(target, name, None)
+            if method is not None:
+                object.__setattr__(self, name, instrumentation.timed(
+                    method, prefix + name, player))
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
@@ -0,0 +1,305 @@
+"""Incremental longest road tracking.
+
+A player's road length is the longest trail -- a path that may revisit
+vertices, but never reuses an edge -- through their own roads. A
+trail cannot continue through a vertex where another player has built,
+so towns can break a road in two.
+
+Finding the longest trail is expensive, so the roads of each player
+are split into connected components, and every road remembers the
+length of the component it is part of. Building a road only
+recomputes the component it joins, and building a town only
+recomputes the components of other players running through that
+vertex.
+
+The index works from the board's own arrays, and players are known by
+their slot on the board, as in those arrays. All it keeps is one array
+of lengths indexed by edge id and another indexed by player slot.
+
+Roads loaded in bulk, as when a board is rebuilt, are only measured
+when the index is next used, so loading a board that is never asked
+about its roads costs almost nothing.
+
+add_road and add_town return an undo token recording the lengths
+they replaced, which undo_road and undo_town put back without
+measuring anything.
+"""
+
+from array import array
+
+MINIMUM_LENGTH = 5
+
+
+class LongestRoad:
+    """Each player's longest road, and the slot of the title holder.
+
+    The board calls add_road and add_town after each placement, passing
+    its vertex_state and edge_state arrays. The holder is 0 while no one
+    holds the title.
+    """
+    __slots__ = ('_topology', '_edge_lengths', '_lengths', '_holder',
+                 '_pending', '_pending_state')
+
+    def __init__(self, topology):
+        self._topology = topology
+        # The length of the component each road is part of, or 0.
+        self._edge_lengths = array('H', bytes(2 * topology.edge_count))
+        self._lengths = array('H')
+        self._holder = 0
+        # Roads added by add_roads and not measured yet, with the
+        # arrays to measure them by.
+        self._pending = []
+        self._pending_state = None
+
+    @property
+    def holder(self):
+        self.measure()
+        return self._holder
+
+    @holder.setter
+    def holder(self, slot):
+        # Roads waiting to be measured keep the title where it is set,
+        # unless they turn out to beat it.
+        self._holder = slot
+
+    def __copy__(self):
+        # Measured now, while the pending arrays still describe both
+        # copies.
+        self.measure()
+        new_index = type(self)(self._topology)
+        new_index._edge_lengths = array('H', self._edge_lengths)
+        new_index._lengths = array('H', self._lengths)
+        new_index._holder = self._holder
+        return new_index
+
+    def __getstate__(self):
+        self.measure()
+        return (self._topology, self._edge_lengths, self._lengths,
+                self._holder)
+
+    def __setstate__(self, state):
+        self._topology, self._edge_lengths, self._lengths, self._holder = \
+            state
+        self._pending = []
+        self._pending_state = None
+
+    def length(self, slot):
+        """Return the length of the longest road of the player in slot.
+        """
+        self.measure()
+        lengths = self._lengths
+        return lengths[slot] if slot < len(lengths) else 0
+
+    def add_road(self, edge_id, vertex_state, edge_state):
+        """Recompute the component a new road joins.
+
+        Return a token for undo_road.
+        """
+        self.measure()
+        token = self._token()
+        self._regroup([edge_id], vertex_state, edge_state, token[2])
+        self._update_holder()
+        return token
+
+    def undo_road(self, token):
+        """Take back the road added by the add_road call that returned
+        token.
+        """
+        self._restore(token)
+
+    def add_roads(self, edge_ids, vertex_state, edge_state):
+        """Record many roads at once.
+
+        They are measured together the next time the index is used,
+        so the arrays must describe the board until then.
+        """
+        self._pending.extend(edge_ids)
+        self._pending_state = vertex_state, edge_state
+
+    def add_town(self, vertex_id, vertex_state, edge_state):
+        """Split other players' roads running through a new town.
+
+        Return a token for undo_town.
+        """
+        self.measure()
+        token = self._token()
+        slot = vertex_state[vertex_id] >> 1
+        touching = {}
+        for edge_id in self._topology.vertex_edges[vertex_id]:
+            other = edge_state[edge_id]
+            if other and other != slot:
+                touching.setdefault(other, []).append(edge_id)
+        for edge_ids in touching.values():
+            if len(edge_ids) > 1:
+                self._regroup(edge_ids, vertex_state, edge_state, token[2])
+        if token[2]:
+            self._update_holder()
+        return token
+
+    def undo_town(self, token):
+        """Rejoin the roads split by the add_town call that returned
+        token.
+        """
+        self._restore(token)
+
+    def _token(self):
+        """Return (holder, player lengths, replaced edge lengths) to be
+        filled in by a change.
+        """
+        return self._holder, self._lengths.tobytes(), []
+
+    def _restore(self, token):
+        """Put back the lengths and holder saved in token.
+        """
+        holder, lengths, changes = token
+        edge_lengths = self._edge_lengths
+        for edge_id, length in reversed(changes):
+            edge_lengths[edge_id] = length
+        self._lengths = array('H')
+        self._lengths.frombytes(lengths)
+        self._holder = holder
+
+    def measure(self):
+        """Measure any roads added by add_roads now.
+
+        The board calls this before any change to its buildings, while
+        the pending arrays still describe the board the roads were
+        loaded on.
+        """
+        if self._pending:
+            pending, self._pending = self._pending, []
+            vertex_state, edge_state = self._pending_state
+            self._regroup(pending, vertex_state, edge_state, [])
+            self._update_holder()
+        self._pending_state = None
+
+    def _regroup(self, edge_ids, vertex_state, edge_state, changes):
+        """Measure again the components of the roads edge_ids, and the
+        longest road of their players.
+
+        The previous length of every road measured is appended to
+        changes as (edge_id, length).
+        """
+        edge_lengths = self._edge_lengths
+        stale = set(edge_ids)
+        # slot -> [longest component replaced, longest component added]
+        slots = {}
+        while stale:
+            edge_id = stale.pop()
+            slot = edge_state[edge_id]
+            component = self._component(slot, edge_id, vertex_state,
+                                        edge_state)
+            stale.difference_update(component)
+            length = self._longest_trail(slot, component, vertex_state)
+            lengths = slots.setdefault(slot, [0, 0])
+            lengths[1] = max(lengths[1], length)
+            for edge_id in component:
+                lengths[0] = max(lengths[0], edge_lengths[edge_id])
+                changes.append((edge_id, edge_lengths[edge_id]))
+                edge_lengths[edge_id] = length
+        for slot, (replaced, added) in slots.items():
+            self._set_length(slot, replaced, added, edge_state)
+
+    def _set_length(self, slot, replaced, added, edge_state):
+        """Update the length of slot once components no longer than
+        replaced have been measured again as no longer than added.
+
+        Only when the player's longest road was cut short are all of
+        their roads looked at again.
+        """
+        lengths = self._lengths
+        if slot >= len(lengths):
+            lengths.extend(bytes(slot + 1 - len(lengths)))
+        old = lengths[slot]
+        if old > replaced:
+            # A road that was not measured again is still the longest.
+            lengths[slot] = max(old, added)
+        elif added >= old:
+            lengths[slot] = added
+        else:
+            edge_lengths = self._edge_lengths
+            index = edge_state.find(slot)
+            while index >= 0:
+                added = max(added, edge_lengths[index])
+                index = edge_state.find(slot, index + 1)
+            lengths[slot] = added
+
+    def _component(self, slot, edge_id, vertex_state, edge_state):
+        """Return the roads connected to edge_id, without passing through
+        another player's building.
+        """
+        topology = self._topology
+        component = {edge_id}
+        frontier = [edge_id]
+        while frontier:
+            for vertex_id in topology.edge_vertices[frontier.pop()]:
+                if _blocked(vertex_state[vertex_id], slot):
+                    continue
+                for other in topology.vertex_edges[vertex_id]:
+                    if edge_state[other] == slot and other not in component:
+                        component.add(other)
+                        frontier.append(other)
+        return component
+
+    def _longest_trail(self, slot, component, vertex_state):
+        """Return the number of edges in the longest trail in component.
+
+        A longest trail that starts on a vertex with two of the
+        component's roads either can be extended, or is a closed loop
+        that can be started anywhere else on it. So it is enough to
+        start from dead ends, junctions and broken vertices, unless the
+        component is a simple loop.
+        """
+        topology = self._topology
+        adjacency = {}
+        for bit, edge_id in enumerate(component):
+            for vertex_id in topology.edge_vertices[edge_id]:
+                adjacency.setdefault(vertex_id, []).append((bit, edge_id))
+        blocked = {v for v in adjacency if _blocked(vertex_state[v], slot)}
+        starts = [v for v, edges in adjacency.items()
+                  if len(edges) != 2 or v in blocked]
+        if not starts:
+            return len(component)
+
+        edge_vertices = topology.edge_vertices
+
+        def walk(vertex_id, used):
+            best = 0
+            for bit, edge_id in adjacency[vertex_id]:
+                if used & (1 << bit):
+                    continue
+                a, b = edge_vertices[edge_id]
+                other = b if a == vertex_id else a
+                length = 1
+                if other not in blocked:
+                    length += walk(other, used | (1 << bit))
+                best = max(best, length)
+            return best
+
+        return max(walk(start, 0) for start in starts)
+
+    def _update_holder(self):
+        """Award the title by the usual rules.
+
+        The holder keeps it while no one is strictly longer. Otherwise
+        the title goes to the single longest road of at least
+        MINIMUM_LENGTH, or to no one if there is a tie.
+        """
+        lengths = self._lengths
+        best = max(lengths, default=0)
+        holder = self._holder
+        if holder and best >= MINIMUM_LENGTH and \
+                holder < len(lengths) and lengths[holder] == best:
+            return
+        leaders = [slot for slot, length in enumerate(lengths)
+                   if length == best]
+        if best >= MINIMUM_LENGTH and len(leaders) == 1:
+            self._holder = leaders[0]
+        else:
+            self._holder = 0
+
+
+def _blocked(state, slot):
+    """Return True if a vertex with state stops the roads of slot.
+    """
+    return state != 0 and state >> 1 != slot
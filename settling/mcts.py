@@ -0,0 +1,297 @@
+"""A Monte Carlo tree search player.
+
+The tree covers the player's own decisions during a turn. Each node is
+a position the player has to act in, and its branches are the legal
+actions. A search repeatedly walks down the tree, choosing branches by
+UCB1. When it ends the turn or reaches a position it has not seen, it
+plays the rest of the game out with random players and backs the result
+up along the path.
+
+Nodes are kept in a transposition table keyed by the board's Zobrist
+key and the player's hand. The tree is reused from one decision to the
+next, and any position reached again on a later turn starts with its
+earlier statistics.
+
+Walks are played out on one private copy of the board, and their moves
+taken back with Board.undo afterwards, so the board is only copied
+once per decision. Rollouts are run in batches, one per worker. With
+more than one worker they go to a concurrent.futures executor, a
+process pool by default, and each walk in a batch takes its own
+snapshot of the board instead. The opponents' hands are hidden from
+the player, so rollouts start them with empty hands.
+"""
+
+import math
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from settling import game_constants
+from settling import player_action
+from settling.game import Game
+from settling.hand import Hand
+from settling.player import BUILD_OPTIONS, Player, RandomPlayer
+from settling.zobrist import TranspositionTable
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    """Visit counts and total rollout values for each action.
+    """
+    __slots__ = ('actions', 'visits', 'values', 'total')
+
+    def __init__(self, actions):
+        self.actions = actions
+        self.visits = [0] * len(actions)
+        self.values = [0.0] * len(actions)
+        self.total = 0
+
+    def select(self, exploration=EXPLORATION):
+        """Return the index of the action to explore next.
+        """
+        visits = self.visits
+        if 0 in visits:
+            return visits.index(0)
+        values = self.values
+        log_total = math.log(self.total)
+        return max(range(len(visits)), key=lambda i: (
+            values[i] / visits[i] +
+            exploration * math.sqrt(log_total / visits[i])
+        ))
+
+    def best(self):
+        """Return the index of the most visited action, breaking ties by
+        the mean value.
+        """
+        visits = self.visits
+        values = self.values
+        return max(range(len(visits)), key=lambda i: (
+            visits[i], values[i] / visits[i] if visits[i] else 0.0
+        ))
+
+
+def candidate_actions(board, hand, player):
+    """Return the actions worth searching for player with hand on board.
+
+    Ending the turn is always first, followed by every affordable
+    build. Bank trades are only included when they bring in a card
+    missing for a build the player has room for.
+    """
+    actions = [player_action.EndTurn()]
+    pieces = board.pieces(player)
+    held = Counter(hand.cards)
+    missing = set()
+    for piece, cost, limit, action, legal_moves in BUILD_OPTIONS:
+        if pieces[piece] >= limit:
+            continue
+        if hand.has_resources(cost):
+            actions.extend(action(*move)
+                           for move in getattr(board, legal_moves)(player))
+        else:
+            missing.update(Counter(cost) - held)
+    for give, count in sorted(held.items()):
+        if count >= game_constants.BANK_TRADE_RATE:
+            actions.extend(player_action.BankTrade(give, receive)
+                           for receive in sorted(missing)
+                           if receive != give)
+    return actions
+
+
+def position_key(board, hand):
+    return (board.position_key(), tuple(sorted(hand.cards)))
+
+
+def rollout(board, hands, names, first, finish_turn, seed, max_turns,
+            player):
+    """Play a game on with random players and return its value to player.
+
+    The value is the average of two scores between 0 and 1: one for
+    the position as player's turn ends, and one for how the game goes
+    on. A win scores 1 and a loss 0. A position without a winner is
+    scored by player's lead over the best of the other players. The
+    first score stops the search counting on random play to spend
+    player's cards later, and so valuing hoarding as highly as
+    building. If finish_turn is true, names[first] is in the middle of
+    their turn.
+    """
+    rng = random.Random(seed)
+    players = [RandomPlayer(name, rng) for name in names]
+    game = _continued_game(board, hands, players, rng, max_turns)
+    if finish_turn:
+        game._player_actions(players[first])
+        game.turns += 1
+        first = (first + 1) % len(players)
+    turn_end = _score(game.board, player)
+    winner = game.play(first)
+    if winner is None:
+        outcome = _score(game.board, player)
+    else:
+        outcome = 1.0 if winner == player else 0.0
+    return (turn_end + outcome) / 2
+
+
+def _score(board, player):
+    points = board.victory_points()
+    if points.get(player, 0) >= game_constants.WINNING_POINTS:
+        return 1.0
+    lead = points.pop(player, 0) - max(points.values(), default=0)
+    return 0.5 + lead / (2.0 * game_constants.WINNING_POINTS)
+
+
+def _rollout_task(task):
+    return rollout(*task)
+
+
+def _continued_game(board, hands, players, rng, max_turns=None):
+    """Return a Game picking up from board and hands.
+    """
+    def roll():
+        return rng.randint(1, 6) + rng.randint(1, 6)
+
+    game = Game(board, players, roll, max_turns=max_turns)
+    game.hands = hands
+    return game
+
+
+class MCTSPlayer(Player):
+    """A player that searches for budget seconds before each action.
+
+    Rollouts are played workers at a time, in executor if one is given,
+    or in a process pool of that size when workers > 1. Call close() to
+    shut down a pool the player started.
+
+    The players are assumed to take turns in the order they placed
+    their first towns, which is the order the board lists them in.
+    """
+    def __init__(self, name, budget=0.1, workers=1, executor=None,
+                 rollout_turns=40, capacity=100000,
+                 exploration=EXPLORATION, rng=random):
+        super().__init__(name)
+        self.budget = budget
+        self.workers = workers
+        self.executor = executor
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.rng = rng
+        self.table = TranspositionTable(capacity)
+        self.decisions = 0
+        self.rollouts = 0
+        self.thinking_time = 0.0
+        self._own_executor = False
+
+    def starting_town(self, board):
+        """Take the best open site by the board's vertex table.
+        """
+        return board.rank_openings(self.name)[0]
+
+    def play_action_card(self, board, hand):
+        return None
+
+    def act(self, board, hand):
+        start = time.perf_counter()
+        root = self._node(board, hand)
+        if len(root.actions) > 1:
+            names = list(board.victory_points())
+            deadline = start + self.budget
+            search_board = board.fork()
+            while True:
+                self._search(search_board, hand, names, root)
+                if time.perf_counter() >= deadline:
+                    break
+        self.decisions += 1
+        self.thinking_time += time.perf_counter() - start
+        return root.actions[root.best()]
+
+    def stats(self):
+        """Return decisions and rollouts per second of thinking time.
+        """
+        seconds = self.thinking_time or float('inf')
+        return {
+            'decisions': self.decisions,
+            'rollouts': self.rollouts,
+            'decisions_per_second': self.decisions / seconds,
+            'rollouts_per_second': self.rollouts / seconds,
+        }
+
+    def close(self):
+        if self._own_executor:
+            self.executor.shutdown()
+            self.executor = None
+            self._own_executor = False
+
+    def _node(self, board, hand):
+        key = position_key(board, hand)
+        node = self.table.get(key)
+        if node is None:
+            node = Node(candidate_actions(board, hand, self.name))
+            self.table.store(key, node)
+        return node
+
+    def _search(self, board, hand, names, root):
+        """Walk the tree once per worker, and back up the rollouts.
+
+        A single walk rolled out in this process is played on board
+        itself, and undone afterwards.
+        """
+        in_place = self.workers == 1 and self.executor is None
+        if in_place:
+            mark = board.undo_mark()
+        paths = []
+        tasks = []
+        for _ in range(self.workers):
+            path, task = self._select(
+                board if in_place else board.snapshot(), hand, names, root)
+            paths.append(path)
+            tasks.append(task)
+        values = self._run(tasks)
+        if in_place:
+            board.undo_to(mark)
+        for path, value in zip(paths, values):
+            for node, index in path:
+                node.values[index] += value
+        self.rollouts += len(tasks)
+
+    def _select(self, board, hand, names, root):
+        """Walk down from root to a rollout, playing the actions on
+        board, and return the path taken with the rollout's arguments.
+
+        Visits are counted on the way down, so walks in the same batch
+        spread out over different branches.
+        """
+        hands = {name: Hand() for name in names}
+        hands[self.name] = hand.copy()
+        game = _continued_game(board, hands, [self], self.rng)
+        index = names.index(self.name)
+        node = root
+        path = []
+        while True:
+            choice = node.select(self.exploration)
+            node.visits[choice] += 1
+            node.total += 1
+            path.append((node, choice))
+            action = node.actions[choice]
+            if isinstance(action, player_action.EndTurn):
+                first, finish_turn = (index + 1) % len(names), False
+                break
+            game._apply_action(self, action)
+            key = position_key(game.board, game.hands[self.name])
+            child = self.table.get(key)
+            if child is None:
+                self.table.store(key, Node(candidate_actions(
+                    game.board, game.hands[self.name], self.name)))
+                first, finish_turn = index, True
+                break
+            node = child
+        task = (game.board, game.hands, names, first, finish_turn,
+                self.rng.getrandbits(64), self.rollout_turns, self.name)
+        return path, task
+
+    def _run(self, tasks):
+        if self.workers > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+            self._own_executor = True
+        if self.executor is None:
+            return [_rollout_task(task) for task in tasks]
+        return list(self.executor.map(_rollout_task, tasks))
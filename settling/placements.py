@@ -0,0 +1,149 @@
+"""Incrementally maintained arrays of where players may build.
+
+Boards keep a PlacementIndex up to date as roads and towns are built,
+so listing a player's legal moves only looks at the vertices their
+network actually reaches, rather than trying every vertex and edge.
+
+Players are known by their slot on the board, and everything is kept
+in arrays: a byte per vertex for the distance rule, the vertices each
+player's roads reach, and how many pieces each player has built. The
+towns and cities themselves are found in the board's vertex array.
+
+add_road and add_town return whatever they changed, for undo_road and
+undo_town to take back.
+"""
+
+from array import array
+
+# Pieces are counted in this order for each player slot.
+ROAD, TOWN, CITY = range(3)
+
+
+class PlacementIndex:
+    """The arrays that legal placements are generated from.
+
+      - open_vertices: a bytearray, indexed by vertex id, that is 1
+        where a town could go, ignoring connectivity. Those vertices
+        touch land, are empty, and are not next to any other building.
+      - road_vertices(slot): the vertices touched by slot's roads.
+      - pieces(slot): how many roads, towns and cities slot has built.
+    """
+    __slots__ = ('_topology', 'open_vertices', '_road_vertices', '_pieces')
+
+    def __init__(self, topology, land_vertices):
+        self._topology = topology
+        self.open_vertices = bytearray(land_vertices)
+        # Indexed by slot, each an array of vertex ids.
+        self._road_vertices = []
+        # Indexed by slot * 3 + ROAD, TOWN or CITY.
+        self._pieces = array('H')
+
+    def __copy__(self):
+        new_index = type(self)(self._topology, self.open_vertices)
+        new_index._road_vertices = [array('I', v)
+                                    for v in self._road_vertices]
+        new_index._pieces = array('H', self._pieces)
+        return new_index
+
+    def add_road(self, edge_id, slot):
+        """Record slot's road, and return the vertices it newly reaches.
+        """
+        while slot >= len(self._road_vertices):
+            self._road_vertices.append(array('I'))
+        vertices = self._road_vertices[slot]
+        added = [v for v in self._topology.edge_vertices[edge_id]
+                 if v not in vertices]
+        vertices.extend(added)
+        self._count(slot, ROAD, 1)
+        return added
+
+    def undo_road(self, slot, added):
+        # Roads are undone last first, so what they added is at the end.
+        vertices = self._road_vertices[slot]
+        del vertices[len(vertices) - len(added):]
+        self._count(slot, ROAD, -1)
+
+    def add_town(self, vertex_id, slot):
+        """Close the vertex, and its neighbors by the distance rule.
+
+        Return the vertices that were open until now.
+        """
+        open_vertices = self.open_vertices
+        closed = [v for v in
+                  (vertex_id,) + self._topology.vertex_neighbors[vertex_id]
+                  if open_vertices[v]]
+        for v in closed:
+            open_vertices[v] = 0
+        self._count(slot, TOWN, 1)
+        return closed
+
+    def undo_town(self, slot, closed):
+        for v in closed:
+            self.open_vertices[v] = 1
+        self._count(slot, TOWN, -1)
+
+    def upgrade_town(self, slot):
+        self._count(slot, TOWN, -1)
+        self._count(slot, CITY, 1)
+
+    def undo_upgrade(self, slot):
+        self._count(slot, CITY, -1)
+        self._count(slot, TOWN, 1)
+
+    def _count(self, slot, piece, count):
+        pieces = self._pieces
+        index = slot * 3 + piece
+        if index >= len(pieces):
+            pieces.extend(bytes(slot * 3 + 3 - len(pieces)))
+        pieces[index] += count
+
+    def pieces(self, slot):
+        """Return how many roads, towns and cities slot has built.
+        """
+        pieces = self._pieces
+        index = slot * 3
+        if index >= len(pieces):
+            return 0, 0, 0
+        return pieces[index], pieces[index + 1], pieces[index + 2]
+
+    def road_vertices(self, slot):
+        """Return the vertices touched by slot's roads.
+        """
+        if slot >= len(self._road_vertices):
+            return ()
+        return self._road_vertices[slot]
+
+    def open_sites(self, slot=None):
+        """Return the open vertices, or only those slot's roads reach.
+        """
+        open_vertices = self.open_vertices
+        if slot is None:
+            candidates = range(len(open_vertices))
+        else:
+            candidates = self.road_vertices(slot)
+        return [v for v in candidates if open_vertices[v]]
+
+    def towns(self, vertex_state, slot):
+        """Return the vertex ids of slot's towns in the board's vertex
+        array.
+        """
+        return _find(vertex_state, slot * 2)
+
+    def buildings(self, vertex_state, slot):
+        """Return the vertex ids of slot's towns and cities in the
+        board's vertex array.
+        """
+        return (_find(vertex_state, slot * 2) +
+                _find(vertex_state, slot * 2 + 1))
+
+
+def _find(states, value):
+    """Return the indexes of states holding value, searching the bytes
+    in C rather than testing each one.
+    """
+    found = []
+    index = states.find(value)
+    while index >= 0:
+        found.append(index)
+        index = states.find(value, index + 1)
+    return found
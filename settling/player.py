@@ -1,3 +1,69 @@
+import random
+from collections import Counter
+
+from settling import game_constants
+from settling import player_action
+
+
+# What a player can build: the piece, its cost, how many a player has,
+# the action that builds it and the board method listing where.
+BUILD_OPTIONS = (
+    ('city', game_constants.CITY_COST, game_constants.CITY_LIMIT,
+     player_action.UpgradeTown, 'legal_city_upgrades'),
+    ('town', game_constants.TOWN_COST, game_constants.TOWN_LIMIT,
+     player_action.BuildTown, 'legal_town_sites'),
+    ('road', game_constants.ROAD_COST, game_constants.ROAD_LIMIT,
+     player_action.BuildRoad, 'legal_roads'),
+)
+
+
 class Player:
     def __init__(self, name):
         self.name = name
+
+
+class RandomPlayer(Player):
+    """A bot that makes a random legal move.
+
+    It builds the most valuable thing it can afford and has pieces
+    left for -- a city, then a town, then a road -- choosing where at
+    random. Failing that it trades spare cards with the bank for a
+    card it lacks, and otherwise ends its turn. Pass a random.Random
+    instance as rng for reproducible games.
+    """
+    def __init__(self, name, rng=random):
+        super().__init__(name)
+        self.rng = rng
+
+    def starting_town(self, board):
+        return self.rng.choice(board.legal_town_sites(self.name, setup=True))
+
+    def play_action_card(self, board, hand):
+        return None
+
+    def act(self, board, hand):
+        pieces = board.pieces(self.name)
+        wanted = []
+        for piece, cost, limit, action, legal_moves in BUILD_OPTIONS:
+            if pieces[piece] >= limit:
+                continue
+            moves = getattr(board, legal_moves)(self.name)
+            if not moves:
+                continue
+            if hand.has_resources(cost):
+                return action(*self.rng.choice(moves))
+            wanted.append(cost)
+        return self._trade(hand, wanted)
+
+    def _trade(self, hand, wanted):
+        """Trade for a card missing from the cheapest wanted build.
+        """
+        held = Counter(hand.cards)
+        spare = [card for card, count in held.items()
+                 if count >= game_constants.BANK_TRADE_RATE]
+        if not spare or not wanted:
+            return player_action.EndTurn()
+        cost = min(wanted, key=len)
+        missing = Counter(cost) - held
+        return player_action.BankTrade(self.rng.choice(sorted(spare)),
+                                       self.rng.choice(sorted(missing)))
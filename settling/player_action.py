@@ -7,19 +7,27 @@ class RequestTrade:
 
 
 class BankTrade:
-    pass
+    def __init__(self, give, receive):
+        self.give = give
+        self.receive = receive
 
 
 class BuildRoad:
-    pass
+    def __init__(self, hexagon_coord, edge):
+        self.hexagon_coord = hexagon_coord
+        self.edge = edge
 
 
 class BuildTown:
-    pass
+    def __init__(self, hexagon_coord, vertex):
+        self.hexagon_coord = hexagon_coord
+        self.vertex = vertex
 
 
 class UpgradeTown:
-    pass
+    def __init__(self, hexagon_coord, vertex):
+        self.hexagon_coord = hexagon_coord
+        self.vertex = vertex
 
 
 class BuyActionCard:
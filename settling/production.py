@@ -0,0 +1,76 @@
+"""An index of what every dice number produces for each player.
+
+Boards keep a ProductionIndex up to date as towns and cities are built
+and the robber moves, so handing out resources after a roll only
+touches the players who actually receive something.
+
+The index is a single array of card counts, indexed by player slot,
+dice number and resource code, so it costs a few hundred bytes per
+board rather than a dict per number.
+"""
+
+from array import array
+
+from settling import game_constants
+
+_RESOURCES = game_constants.RESOURCE_TILE_TYPES
+# Counts for each player slot cover dice numbers 0 to 12.
+_NUMBERS = 13
+_SLOT_SIZE = _NUMBERS * len(_RESOURCES)
+
+
+class ProductionIndex:
+    """Count the cards each dice number produces, by player slot and
+    resource.
+
+    Slots and resource codes are those of the board: slot 1 is the
+    board's first player, and resource codes are indexes into
+    RESOURCE_TILE_TYPES.
+    """
+    __slots__ = ('_counts',)
+
+    def __init__(self):
+        self._counts = array('H')
+
+    def __copy__(self):
+        new_index = type(self)()
+        new_index._counts = array('H', self._counts)
+        return new_index
+
+    def __eq__(self, other):
+        # Slots that have never produced anything may or may not have
+        # been allocated.
+        if isinstance(other, self.__class__):
+            return (self._counts.tobytes().rstrip(b'\0') ==
+                    other._counts.tobytes().rstrip(b'\0'))
+        else:
+            return False
+
+    def add(self, number, slot, resource, count):
+        """Change what number produces for the player in slot by count
+        cards of the given resource code.
+
+        Negative counts remove production.
+        """
+        index = (slot - 1) * _SLOT_SIZE + number * len(_RESOURCES) + resource
+        counts = self._counts
+        if index >= len(counts):
+            size = (index // _SLOT_SIZE + 1) * _SLOT_SIZE
+            counts.extend(bytes(size - len(counts)))
+        counts[index] += count
+
+    def entries(self, number, player_names):
+        """Return (player, resource, count) for everything number produces.
+
+        player_names gives the player in each slot, starting from 0.
+        """
+        counts = self._counts
+        entries = []
+        for start in range(number * len(_RESOURCES), len(counts),
+                           _SLOT_SIZE):
+            for resource, name in enumerate(_RESOURCES):
+                count = counts[start + resource]
+                if count:
+                    player = player_names[start // _SLOT_SIZE + 1]
+                    entries.append((player, name, count))
+        return entries
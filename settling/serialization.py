@@ -0,0 +1,284 @@
+"""A compact, versioned binary format for boards and game positions.
+
+A board record is a fixed header followed by byte sections, all little
+endian:
+
+  |------------+--------------------+-----------------------------------|
+  | Section    | Size               | Contents                          |
+  |------------+--------------------+-----------------------------------|
+  | header     | BOARD_HEADER.size  | magic, version, counts, robber,   |
+  |            |                    | longest road holder's slot or 0   |
+  | tiles      | max_ordinal + 1    | index in TILE_TYPES, by ordinal   |
+  | numbers    | number_count       | the board's number order          |
+  | ports      | 5 * port_count     | ordinal (H), index in PORT_TYPES, |
+  |            |                    | and the port's two vertexes       |
+  | vertexes   | vertex_count       | player_slot * 2 + is_city         |
+  | edges      | edge_count         | player_slot                       |
+  | players    | varies             | a length byte and UTF-8 name per  |
+  |            |                    | slot, from slot 1                 |
+  |------------+--------------------+-----------------------------------|
+
+The occupancy sections are the board's own byte arrays, so decoding
+copies them straight out of the buffer. A position record is a
+POSITION_HEADER, with the turn and the player to move, followed by a
+board record and then each hand: a name, and a count of every resource
+in RESOURCE_TILE_TYPES order.
+
+Records are read with struct.unpack_from at an offset, so they can be
+decoded from bytes, a memoryview or an mmap without slicing the buffer
+up first. Records written one after another can be read back in turn
+with iter_positions.
+
+Boards rebuilt from the same layout share an empty board for it, which
+is snapshotted rather than set up again, so decoding many positions
+from one game only pays for the layout once.
+"""
+
+import struct
+from collections import namedtuple
+
+from settling import game_constants
+from settling.board import Board
+from settling.board_geometry import HexagonalBoard, StandardBoard
+from settling.hand import Hand
+
+VERSION = 1
+
+BOARD_MAGIC = b'STLB'
+POSITION_MAGIC = b'STLP'
+
+# magic, version, max_ordinal, vertex_count, edge_count, number_count,
+# port_count, player_count, road holder slot, robber ordinal
+BOARD_HEADER = struct.Struct('<4sBHHHHHBBH')
+# magic, version, turns, player to move, hand count
+POSITION_HEADER = struct.Struct('<4sBIBB')
+PORT = struct.Struct('<HBBB')
+HAND = struct.Struct('<' + 'H' * len(game_constants.RESOURCE_TILE_TYPES))
+
+# Board geometries by max_ordinal. Boards of any other size are read
+# as a HexagonalBoard.
+GEOMETRIES = {36: StandardBoard}
+
+# Ids and counts are stored in 16 bits, which covers boards up to
+# radius 84.
+_MAX_COUNT = 0xFFFF
+
+Position = namedtuple('Position', ['board', 'hands', 'turns', 'current'])
+
+_RESOURCE_CODES = {r: i for i, r in
+                   enumerate(game_constants.RESOURCE_TILE_TYPES)}
+_PORT_CODES = {p: i for i, p in enumerate(game_constants.PORT_TYPES)}
+
+# Empty boards by layout section, to snapshot when decoding.
+_layouts = {}
+_MAX_LAYOUTS = 256
+
+
+def encode_board(board):
+    """Return board as a board record.
+    """
+    out = bytearray()
+    _write_board(out, board)
+    return bytes(out)
+
+
+def decode_board(buffer, offset=0):
+    """Return the board recorded at offset in buffer.
+    """
+    return read_board(buffer, offset)[0]
+
+
+def read_board(buffer, offset=0):
+    """Return the board recorded at offset in buffer, and the offset just
+    past its record.
+    """
+    (magic, version, max_ordinal, vertex_count, edge_count, number_count,
+     port_count, player_count, holder, robber) = _unpack(
+         BOARD_HEADER, buffer, offset, BOARD_MAGIC)
+    start = offset + BOARD_HEADER.size
+    layout_end = (start + max_ordinal + 1 + number_count +
+                  PORT.size * port_count)
+    vertexes_end = layout_end + vertex_count
+    edges_end = vertexes_end + edge_count
+    _check_length(buffer, edges_end)
+
+    board = _layout_board(buffer, start, layout_end, max_ordinal,
+                          number_count, port_count)
+    topology = board._topology
+    if (vertex_count, edge_count) != (topology.vertex_count,
+                                      topology.edge_count):
+        raise ValueError("Board record does not match its geometry.")
+    names, offset = _read_names(buffer, edges_end, player_count)
+    vertex_state = buffer[layout_end:vertexes_end]
+    edge_state = buffer[vertexes_end:edges_end]
+    if (max(vertex_state, default=0) >> 1 > player_count or
+            max(edge_state, default=0) > player_count or
+            holder > player_count or robber > max_ordinal):
+        raise ValueError("Board record refers to a missing player or tile.")
+    board._load_state(robber, vertex_state, edge_state, names,
+                      names[holder - 1] if holder else None)
+    return board, offset
+
+
+def encode_position(board, hands, turns=0, current=0):
+    """Return a position record of board, the hands by player name, the
+    number of turns played and the index of the player to move.
+
+    Only resource cards are recorded, and not their order in the hand.
+    """
+    out = bytearray(POSITION_HEADER.pack(
+        POSITION_MAGIC, VERSION, turns, current, len(hands)))
+    _write_board(out, board)
+    codes = _RESOURCE_CODES
+    for name, hand in hands.items():
+        if hand.action_cards:
+            raise ValueError("Action cards cannot be recorded.")
+        counts = [0] * len(codes)
+        for card in hand.cards:
+            if card not in codes:
+                raise ValueError("Unknown resource {0!r}.".format(card))
+            counts[codes[card]] += 1
+        write_name(out, name)
+        out += HAND.pack(*counts)
+    return bytes(out)
+
+
+def decode_position(buffer, offset=0):
+    """Return the Position recorded at offset in buffer.
+    """
+    return read_position(buffer, offset)[0]
+
+
+def read_position(buffer, offset=0):
+    """Return the Position recorded at offset in buffer, and the offset
+    just past its record.
+    """
+    magic, version, turns, current, hand_count = _unpack(
+        POSITION_HEADER, buffer, offset, POSITION_MAGIC)
+    board, offset = read_board(buffer, offset + POSITION_HEADER.size)
+    resources = game_constants.RESOURCE_TILE_TYPES
+    hands = {}
+    for _ in range(hand_count):
+        name, offset = read_name(buffer, offset)
+        _check_length(buffer, offset + HAND.size)
+        counts = HAND.unpack_from(buffer, offset)
+        offset += HAND.size
+        hands[name] = Hand([resource
+                            for resource, count in zip(resources, counts)
+                            for _ in range(count)])
+    return Position(board, hands, turns, current), offset
+
+
+def iter_positions(buffer, offset=0):
+    """Yield each Position recorded back to back in buffer from offset.
+    """
+    end = len(buffer)
+    while offset < end:
+        position, offset = read_position(buffer, offset)
+        yield position
+
+
+def _write_board(out, board):
+    topology = board._topology
+    if topology.edge_count > _MAX_COUNT:
+        raise ValueError("Board is too large for a board record.")
+    names = board._player_names[1:]
+    holder = board.longest_road_holder()
+    out += BOARD_HEADER.pack(
+        BOARD_MAGIC, VERSION, board._board_geometry.max_ordinal,
+        topology.vertex_count, topology.edge_count,
+        len(board._number_order), len(board._port_map), len(names),
+        board._player_slots[holder] if holder is not None else 0,
+        board._robber)
+    out += board._tile_types
+    out += bytes(board._number_order)
+    ordinals = topology.ordinals
+    for hexagon_coord, port_type, vertex_1, vertex_2 in board._port_map:
+        if hexagon_coord not in ordinals:
+            raise ValueError("Ports must be on tiles of the board.")
+        out += PORT.pack(ordinals[hexagon_coord], _PORT_CODES[port_type],
+                         vertex_1, vertex_2)
+    out += board._vertex_state
+    out += board._edge_state
+    for name in names:
+        write_name(out, name)
+
+
+def write_name(out, name):
+    """Append name to out as a length byte and UTF-8 bytes.
+    """
+    encoded = name.encode('utf-8')
+    if len(encoded) > 255:
+        raise ValueError("Player names are limited to 255 bytes.")
+    out.append(len(encoded))
+    out += encoded
+
+
+def read_name(buffer, offset):
+    """Return the name written at offset in buffer by write_name, and
+    the offset just past it.
+    """
+    _check_length(buffer, offset + 1)
+    end = offset + 1 + buffer[offset]
+    _check_length(buffer, end)
+    return str(buffer[offset + 1:end], 'utf-8'), end
+
+
+def _read_names(buffer, offset, count):
+    names = []
+    for _ in range(count):
+        name, offset = read_name(buffer, offset)
+        names.append(name)
+    return names, offset
+
+
+def _unpack(header, buffer, offset, magic):
+    _check_length(buffer, offset + header.size)
+    fields = header.unpack_from(buffer, offset)
+    if fields[0] != magic:
+        raise ValueError("Not a {0} record.".format(magic.decode('ascii')))
+    if fields[1] != VERSION:
+        msg = "Unsupported record version {0}."
+        raise ValueError(msg.format(fields[1]))
+    return fields
+
+
+def _check_length(buffer, end):
+    if end > len(buffer):
+        raise ValueError("Record is truncated.")
+
+
+def _layout_board(buffer, start, end, max_ordinal, number_count,
+                  port_count):
+    """Return a new empty board with the layout between start and end.
+    """
+    key = bytes(buffer[start:end])
+    empty = _layouts.get(key)
+    if empty is None:
+        geometry = GEOMETRIES.get(max_ordinal)
+        if geometry is None:
+            geometry = HexagonalBoard.from_max_ordinal(max_ordinal)
+        else:
+            geometry = geometry()
+        numbers_start = max_ordinal + 1
+        ports_start = numbers_start + number_count
+        ports = list(PORT.iter_unpack(key[ports_start:]))
+        if (max(key[:numbers_start]) >= len(game_constants.TILE_TYPES) or
+                any(ordinal > max_ordinal or
+                    code >= len(game_constants.PORT_TYPES)
+                    for ordinal, code, _, _ in ports)):
+            raise ValueError("Board record has an unknown tile or port.")
+        tile_order = tuple(game_constants.TILE_TYPES[code]
+                           for code in key[:numbers_start])
+        number_order = tuple(key[numbers_start:ports_start])
+        hexagons = geometry.topology.hexagons
+        port_map = tuple(
+            (hexagons[ordinal], game_constants.PORT_TYPES[code],
+             vertex_1, vertex_2)
+            for ordinal, code, vertex_1, vertex_2 in ports
+        )
+        empty = Board(tile_order, number_order, port_map, geometry)
+        if len(_layouts) >= _MAX_LAYOUTS:
+            _layouts.clear()
+        _layouts[key] = empty
+    return empty.snapshot()
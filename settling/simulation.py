@@ -0,0 +1,128 @@
+"""Run many independent self-play games across a pool of processes.
+
+Every game is determined by its seed: the seed drives the board layout,
+the dice and the players' choices, so any game can be replayed on its
+own. Games share nothing, so they are spread over worker processes and
+their results streamed back in chunks as they finish, in whatever
+order they complete.
+
+    python -m settling simulate --games 10000
+"""
+
+import functools
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter, namedtuple
+
+from settling import board
+from settling.game import Game
+from settling.player import RandomPlayer
+
+GameResult = namedtuple('GameResult', ['seed', 'winner', 'turns', 'seconds'])
+
+DEFAULT_PLAYERS = 4
+DEFAULT_MAX_TURNS = 1000
+
+
+def play_game(seed, players=DEFAULT_PLAYERS, max_turns=DEFAULT_MAX_TURNS,
+              instrumentation=None, log=None):
+    """Play one game of random players and return its GameResult.
+
+    The winner is None if nobody won within max_turns turns. The game
+    records its timings in instrumentation, and its events in the
+    ActionLog log, if they are given.
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    game_board = board.random_standard_board(rng)
+    game_players = [
+        RandomPlayer('player{0}'.format(i + 1),
+                     random.Random(rng.getrandbits(64)))
+        for i in range(players)
+    ]
+
+    def roll():
+        return rng.randint(1, 6) + rng.randint(1, 6)
+
+    game = Game(game_board, game_players, roll, max_turns=max_turns,
+                instrumentation=instrumentation, log=log)
+    winner = game.game_loop()
+    return GameResult(seed, winner, game.turns,
+                      time.perf_counter() - start)
+
+
+def simulate(games, seed=0, processes=None, chunksize=None,
+             players=DEFAULT_PLAYERS, max_turns=DEFAULT_MAX_TURNS,
+             instrumentation=None, log=None):
+    """Yield a GameResult for each of games games, as they finish.
+
+    Game i is played with seed + i. Games are handed to processes
+    worker processes (by default one per core) chunksize at a time,
+    and each chunk's results come back together. With processes=1 the
+    games are played in this process instead.
+
+    Every game records its timings in instrumentation and its events
+    in log, if they are given, and is then played in this process.
+    """
+    if instrumentation is not None or log is not None:
+        processes = 1
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunksize is None:
+        # Enough chunks per worker to keep them all busy to the end,
+        # few enough that passing them around costs next to nothing.
+        chunksize = max(1, min(64, games // (processes * 8)))
+    seeds = range(seed, seed + games)
+    play = functools.partial(play_game, players=players,
+                             max_turns=max_turns,
+                             instrumentation=instrumentation, log=log)
+    if processes == 1:
+        for game_seed in seeds:
+            yield play(game_seed)
+        return
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(play, seeds, chunksize):
+            yield result
+
+
+class Summary:
+    """Running totals over a stream of GameResults.
+    """
+    def __init__(self):
+        self.games = 0
+        self.turns = 0
+        self.wins = Counter()
+        self.unfinished = 0
+        self._start = time.perf_counter()
+
+    def add(self, result):
+        self.games += 1
+        self.turns += result.turns
+        if result.winner is None:
+            self.unfinished += 1
+        else:
+            self.wins[result.winner] += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.games else 0.0
+
+    def report(self):
+        """Return a few lines describing the games so far.
+        """
+        lines = [
+            '{0:,} games in {1:.1f}s: {2:,.1f} games/s'.format(
+                self.games, self.elapsed, self.games_per_second),
+            'mean turns: {0:.1f}'.format(self.turns / max(self.games, 1)),
+            'unfinished: {0:,}'.format(self.unfinished),
+        ]
+        for player, wins in sorted(self.wins.items()):
+            lines.append('{0}: {1:,} wins ({2:.1%})'.format(
+                player, wins, wins / self.games))
+        return '\n'.join(lines)
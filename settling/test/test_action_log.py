@@ -0,0 +1,135 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from settling import action_log
+from settling.board import random_standard_board
+from settling.game import Game, who_won
+from settling.player import RandomPlayer
+
+
+class RobberGame(Game):
+    """A game whose robber moves to the first candidate on every 7.
+    """
+    def _move_robber(self):
+        self.board.move_robber(self.board.robber_candidates()[0])
+
+
+def new_game(seed, log=None, game_class=Game, max_turns=300):
+    rng = random.Random(seed)
+    players = [RandomPlayer('player{0}'.format(i), random.Random(seed + i))
+               for i in range(3)]
+    return game_class(random_standard_board(rng), players,
+                      lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                      max_turns=max_turns, log=log)
+
+
+def logged_games(seeds, game_class=Game, snapshot_every=10, max_turns=300):
+    f = io.BytesIO()
+    log = action_log.ActionLog(f, snapshot_every)
+    for seed in seeds:
+        new_game(seed, log, game_class, max_turns).game_loop()
+    return f.getvalue()
+
+
+class Test_Replay(unittest.TestCase):
+    def assertReplays(self, replay, game):
+        """Step through game a turn at a time, checking the replay's
+        position at the start of every turn.
+        """
+        game._board_set_up()
+        index = 0
+        while True:
+            position = replay.position(game.turns)
+            self.assertEqual(position.board.position_key(),
+                             game.board.position_key())
+            self.assertEqual(
+                {name: sorted(hand.cards)
+                 for name, hand in position.hands.items()},
+                {name: sorted(hand.cards)
+                 for name, hand in game.hands.items()})
+            self.assertEqual(position.turns, game.turns)
+            self.assertEqual(position.current, index)
+            if who_won(game.board) or game._out_of_turns():
+                break
+            game._player_turn(game.players[index])
+            game.turns += 1
+            index = (index + 1) % len(game.players)
+        self.assertEqual(replay.turns, game.turns)
+        self.assertEqual(replay.winner, who_won(game.board))
+
+    def test_every_turn(self):
+        replay, = action_log.read_games(logged_games([1]))
+        self.assertTrue(replay.finished)
+        self.assertEqual(replay.players, ['player0', 'player1', 'player2'])
+        self.assertReplays(replay, new_game(1))
+
+    def test_robber_moves(self):
+        replay, = action_log.read_games(logged_games([2], RobberGame))
+        kinds = [event.kind for event in replay.events()]
+        self.assertIn(action_log.ROBBER, kinds)
+        self.assertReplays(replay, new_game(2, game_class=RobberGame))
+
+    def test_many_games(self):
+        data = logged_games([3, 4, 5])
+        replays = action_log.read_games(memoryview(data))
+        self.assertEqual(len(replays), 3)
+        self.assertEqual(replays[-1].end, len(data))
+        self.assertReplays(replays[1], new_game(4))
+
+    def test_events(self):
+        replay, = action_log.read_games(logged_games([6]))
+        events = list(replay.events())
+        kinds = [event.kind for event in events]
+        self.assertEqual(kinds.count(action_log.TURN), replay.turns)
+        self.assertEqual(kinds.count(action_log.SNAPSHOT),
+                         1 + (replay.turns - 1) // 10)
+        self.assertEqual(kinds[:4], [action_log.SNAPSHOT] +
+                         [action_log.TOWN] * 3)
+        self.assertEqual(events[-1].kind, action_log.END)
+        self.assertEqual(events[-1].count, replay.turns)
+
+    def test_unfinished(self):
+        """A log cut off mid game can be replayed as far as it goes.
+        """
+        data = logged_games([7])
+        replay, = action_log.read_games(data[:-action_log.EVENT.size])
+        self.assertFalse(replay.finished)
+        self.assertIsNone(replay.winner)
+        last = replay.turns - 1
+        self.assertEqual(replay.position(last).turns, last)
+        with self.assertRaises(ValueError):
+            replay.position(replay.turns)
+
+    def test_max_turns(self):
+        replay, = action_log.read_games(logged_games([8], max_turns=5))
+        self.assertTrue(replay.finished)
+        self.assertIsNone(replay.winner)
+        self.assertEqual(replay.position(5).turns, 5)
+
+    def test_not_a_log(self):
+        with self.assertRaises(ValueError):
+            action_log.read_games(b'X' * 16)
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            action_log.read_games(logged_games([9])[:-3])
+
+    def test_map_file(self):
+        data = logged_games([10, 11])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.log')
+            with open(path, 'wb') as f:
+                f.write(data)
+            mapped = action_log.map_file(path)
+            replays = action_log.read_games(mapped)
+            self.assertEqual([r.turns for r in replays],
+                             [r.turns for r in action_log.read_games(data)])
+            self.assertEqual(
+                replays[1].position(10).board.position_key(),
+                action_log.read_games(data)[1].position(10)
+                .board.position_key())
+            del replays
+            mapped.close()
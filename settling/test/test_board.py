@@ -1,12 +1,17 @@
+import pickle
+import random
 import unittest
 from copy import deepcopy
 
 from mock import patch
 
 from settling.board_geometry import StandardBoard
-from settling.exceptions import GameRuleViolation
+from settling.exceptions import GameRuleViolation, ReadOnlyBoardError
 from settling import board
 from settling import game_constants
+from settling import serialization
+from settling.game import Game
+from settling.player import RandomPlayer
 
 
 class Test_Tile_eq(unittest.TestCase):
@@ -33,6 +38,50 @@ class Test_random_standard_board(unittest.TestCase):
         self.assertIsInstance(random_standard_board, board.Board)
 
 
+class Test_random_hexagonal_board(unittest.TestCase):
+    def test_radius_three_has_standard_tiles(self):
+        b = board.random_hexagonal_board(3, random.Random(1))
+        self.assertEqual(sorted(b._tile_order),
+                         sorted(game_constants.STANDARD_TILE_ORDER))
+        self.assertEqual(sorted(b._number_order),
+                         sorted(game_constants.STANDARD_NUMBER_ORDER))
+        self.assertEqual(sorted(p[1] for p in b._port_map),
+                         sorted(p[1] for p in
+                                game_constants.STANDARD_PORT_MAP))
+
+    def test_large_board(self):
+        b = board.random_hexagonal_board(10, random.Random(2))
+        tiles = b._tile_order
+        self.assertEqual(len(tiles), 331)
+        self.assertEqual(tiles[271:], ('water',) * 60)
+        self.assertNotIn('water', tiles[:271])
+        self.assertEqual(tiles.count('desert'), 14)
+        self.assertEqual(len(b._number_order), 271 - 14)
+        self.assertEqual(len(b.robber_candidates()), 270)
+        self.assertEqual(len(b._port_map), 30)
+        for hexagon, port_type, vertex_1, vertex_2 in b._port_map:
+            for vertex in (vertex_1, vertex_2):
+                self.assertEqual(b.port(hexagon, vertex), port_type)
+                self.assertTrue(b.can_build_town(hexagon, vertex, 'p',
+                                                 setup=True))
+
+    def test_needs_water(self):
+        with self.assertRaises(ValueError):
+            board.random_hexagonal_board(0)
+
+    def test_six_player_game(self):
+        rng = random.Random(3)
+        players = [RandomPlayer('player{0}'.format(i), random.Random(i))
+                   for i in range(6)]
+        b = board.random_hexagonal_board(4, rng)
+        game = Game(b, players,
+                    lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                    max_turns=300)
+        game.game_loop()
+        self.assertEqual(len(b.victory_points()), 6)
+        self.assertGreater(game.turns, 0)
+
+
 class Test_Board__set_up(unittest.TestCase):
     def setUp(self):
         self.tiles = game_constants.STANDARD_TILE_ORDER
@@ -53,6 +102,14 @@ class Test_Board__set_up(unittest.TestCase):
         robber_count = sum([1 for t in b._tiles if t.has_robber])
         self.assertEqual(robber_count, 1)
 
+    def test_shares_layout(self):
+        b = board.Board(self.tiles, self.numbers, self.ports, self.board_geom)
+        b2 = board.Board(self.tiles, self.numbers, self.ports, self.board_geom)
+        self.assertIs(b._ports, b2._ports)
+        self.assertIs(b._land_edges, b2._land_edges)
+        b3 = board.random_standard_board(random.Random(1))
+        self.assertIsNot(b._land_edges, b3._land_edges)
+
 
 class Test_Board_deepcopy(unittest.TestCase):
     def setUp(self):
@@ -370,3 +427,549 @@ class Test_Board_has_city(unittest.TestCase):
         """
         has_city = self.board.has_city((0, 1, -1), 0, 'player1')
         self.assertFalse(has_city)
+
+
+def legacy_state(port_map):
+    """Return the __dict__ a standard board with one town and road
+    pickled as, before its state was kept in arrays.
+    """
+    tile_order = game_constants.STANDARD_TILE_ORDER
+    numbers = iter(game_constants.STANDARD_NUMBER_ORDER)
+    tiles = [board.Tile(tile, next(numbers), False)
+             if tile in game_constants.RESOURCE_TILE_TYPES
+             else board.Tile(tile, None, tile == 'desert')
+             for tile in tile_order]
+    ports = {}
+    for hexagon_coord, port_type, vertex_1, vertex_2 in port_map:
+        ports[(hexagon_coord, vertex_1)] = port_type
+        ports[(hexagon_coord, vertex_2)] = port_type
+    return {
+        '_tile_order': tile_order,
+        '_number_order': game_constants.STANDARD_NUMBER_ORDER,
+        '_port_map': port_map,
+        '_board_geometry': StandardBoard(),
+        '_tiles': tiles,
+        '_ports': ports,
+        '_vertices': {((1, 1, -2), 4): ('player1', 'town')},
+        '_edges': {((1, 0, -1), 3): 'player1'},
+    }
+
+
+class Test_Board_canonical_storage(unittest.TestCase):
+    def setUp(self):
+        tiles = game_constants.STANDARD_TILE_ORDER
+        numbers = game_constants.STANDARD_NUMBER_ORDER
+        ports = game_constants.STANDARD_PORT_MAP
+        board_geom = StandardBoard()
+        self.board = board.Board(tiles, numbers, ports, board_geom)
+
+    def test_synonyms_share_a_key(self):
+        """Towns placed through different names land on one key.
+        """
+        self.board.add_town((0, 1, -1), 0, 'player1')
+        with self.assertRaises(GameRuleViolation):
+            self.board.add_town((1, 1, -2), 4, 'player2')
+        self.assertEqual(len(self.board._vertices), 1)
+
+    def test_road_synonyms_share_a_key(self):
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        with self.assertRaises(GameRuleViolation):
+            self.board.add_road((1, 0, -1), 3, 'player2')
+
+    def test_pickle_round_trip(self):
+        self.board.add_town((1, 1, -2), 4, 'player1')
+        self.board.add_road((1, 0, -1), 3, 'player1')
+        loaded = pickle.loads(pickle.dumps(self.board))
+        self.assertTrue(loaded.has_town((0, 1, -1), 0, 'player1'))
+        self.assertTrue(loaded.has_road((0, 0, 0), 0, 'player1'))
+
+    def test_pickle_rebuilds_indexes(self):
+        """Indexes are not stored, but the longest road stays with
+        whoever reached a tied length first.
+        """
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player2')
+        for edge in range(5):
+            self.board.add_road((-2, 1, 1), edge, 'player1')
+        self.board.add_town((0, 0, 0), 0, 'player2')
+        self.assertNotIn('_production', self.board.__getstate__())
+        loaded = pickle.loads(pickle.dumps(self.board))
+        self.assertEqual(loaded.longest_road_holder(), 'player2')
+        self.assertEqual(loaded.pieces('player2'),
+                         {'road': 5, 'town': 1, 'city': 0})
+        self.assertEqual(loaded.production(9), self.board.production(9))
+
+    def test_unpickles_array_state(self):
+        """A board pickled with its arrays but before any indexes
+        existed loads with them rebuilt.
+        """
+        self.board.add_town((1, 1, -2), 4, 'player1')
+        self.board.add_road((1, 0, -1), 3, 'player1')
+        state = self.board.__getstate__()
+        for name in ('_road_holder', '_land_vertices', '_land_edges'):
+            del state[name]
+        old_board = board.Board.__new__(board.Board)
+        old_board.__setstate__(state)
+        self.assertEqual(old_board.pieces('player1'),
+                         {'road': 1, 'town': 1, 'city': 0})
+        self.assertEqual(old_board.legal_roads('player1'),
+                         self.board.legal_roads('player1'))
+
+    def test_migrates_alias_keys_on_unpickle(self):
+        """Boards pickled with tile lists and dicts keyed by (hexagon,
+        corner) names load into the current layout.
+        """
+        state = self.board.__getstate__()
+        tiles = self.board._tiles
+        tiles[0] = board.Tile(tiles[0].tile_type, tiles[0].number, True)
+        tiles[13] = board.Tile('desert', None, False)
+        state['_tiles'] = tiles
+        state['_vertices'] = {((1, 1, -2), 4): ('player1', 'city')}
+        state['_edges'] = {((1, 0, -1), 3): 'player1'}
+        state['_ports'] = {((1, 1, -2), 1): 'brick port'}
+        old_board = board.Board.__new__(board.Board)
+        old_board.__setstate__(state)
+        self.assertTrue(old_board.has_city((0, 1, -1), 0, 'player1'))
+        self.assertTrue(old_board.has_road((0, 0, 0), 0, 'player1'))
+        self.assertEqual(old_board.port((0, 2, -2), 0), 'brick port')
+        self.assertTrue(old_board.tile((0, 0, 0)).has_robber)
+
+    def test_unpickles_baseline_state(self):
+        """A board pickled before the layout arrays existed loads, and
+        pickles again in the current format.
+        """
+        state = legacy_state(game_constants.STANDARD_PORT_MAP)
+        old_board = board.Board.__new__(board.Board)
+        old_board.__setstate__(state)
+        self.assertTrue(old_board.has_town((0, 1, -1), 0, 'player1'))
+        self.assertTrue(old_board.has_road((0, 0, 0), 0, 'player1'))
+        self.assertEqual(old_board.tile((0, 0, 0)),
+                         self.board.tile((0, 0, 0)))
+        self.board.add_town((0, 1, -1), 0, 'player1')
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        loaded = pickle.loads(pickle.dumps(old_board))
+        self.assertEqual(loaded.position_key(), self.board.position_key())
+        self.assertEqual(loaded._layout_key, self.board._layout_key)
+
+    def test_unpickles_baseline_port_map(self):
+        """The off-board port hexagon of older port maps is corrected.
+        """
+        port_map = tuple(
+            ((0, -2, -2),) + port[1:] if port[0] == (0, -2, 2) else port
+            for port in game_constants.STANDARD_PORT_MAP)
+        old_board = board.Board.__new__(board.Board)
+        old_board.__setstate__(legacy_state(port_map))
+        self.assertEqual(old_board._port_map,
+                         game_constants.STANDARD_PORT_MAP)
+        self.assertEqual(old_board.port((0, -2, 2), 4), '3:1 port')
+        self.assertEqual(old_board._layout_key, self.board._layout_key)
+
+    def test_drops_off_board_ports(self):
+        port_map = game_constants.STANDARD_PORT_MAP + (
+            ((5, 0, -5), 'ore port', 0, 1),)
+        old_board = board.Board.__new__(board.Board)
+        old_board.__setstate__(legacy_state(port_map))
+        self.assertEqual(old_board._port_map,
+                         game_constants.STANDARD_PORT_MAP)
+
+    def test_unpickles_dict_tiles(self):
+        """Tiles pickled with an attribute dict still load.
+        """
+        tile = board.Tile.__new__(board.Tile)
+        tile.__setstate__({'tile_type': 'ore', 'number': 5,
+                           'has_robber': False})
+        self.assertEqual(tile, board.Tile('ore', 5, False))
+
+
+class Test_Board_snapshot(unittest.TestCase):
+    def setUp(self):
+        tiles = game_constants.STANDARD_TILE_ORDER
+        numbers = game_constants.STANDARD_NUMBER_ORDER
+        ports = game_constants.STANDARD_PORT_MAP
+        board_geom = StandardBoard()
+        self.board = board.Board(tiles, numbers, ports, board_geom)
+
+    def test_shares_state_until_written(self):
+        """Taking a snapshot copies nothing.
+        """
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        snapshot = self.board.snapshot()
+        self.assertIs(snapshot._vertex_state, self.board._vertex_state)
+        self.assertIs(snapshot._edge_state, self.board._edge_state)
+
+    def test_mutating_snapshot_does_not_mutate_original(self):
+        snapshot = self.board.snapshot()
+        snapshot.add_road((0, 0, 0), 0, 'player2')
+        snapshot.add_town((0, 0, 0), 0, 'player2')
+        snapshot.upgrade_town((0, 0, 0), 0, 'player2')
+        snapshot.move_robber((0, 0, 0))
+        self.assertFalse(self.board.has_road((0, 0, 0), 0))
+        self.assertFalse(self.board.has_town((0, 0, 0), 0))
+        self.assertFalse(self.board.tile((0, 0, 0)).has_robber)
+
+    def test_mutating_original_does_not_mutate_snapshot(self):
+        snapshot = self.board.snapshot()
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.move_robber((0, 0, 0))
+        self.assertFalse(snapshot.has_town((0, 0, 0), 0))
+        self.assertFalse(snapshot.tile((0, 0, 0)).has_robber)
+
+    def test_snapshot_of_snapshot(self):
+        first = self.board.snapshot()
+        first.add_town((0, 0, 0), 0, 'player1')
+        second = first.snapshot()
+        second.add_town((0, 0, 0), 3, 'player2')
+        self.assertTrue(second.has_town((0, 0, 0), 0, 'player1'))
+        self.assertFalse(first.has_town((0, 0, 0), 3))
+        self.assertFalse(self.board.has_town((0, 0, 0), 0))
+
+    def test_keeps_robber_position(self):
+        self.board.move_robber((0, 0, 0))
+        self.assertTrue(deepcopy(self.board).tile((0, 0, 0)).has_robber)
+
+    def test_tiles_are_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.board.tile((0, 0, 0)).has_robber = True
+
+
+class Test_BoardView(unittest.TestCase):
+    def setUp(self):
+        tiles = game_constants.STANDARD_TILE_ORDER
+        numbers = game_constants.STANDARD_NUMBER_ORDER
+        ports = game_constants.STANDARD_PORT_MAP
+        board_geom = StandardBoard()
+        self.board = board.Board(tiles, numbers, ports, board_geom)
+        self.view = board.BoardView(self.board)
+
+    def test_reads_live_board(self):
+        """Changes to the board show up in an existing view.
+        """
+        self.board.add_town((1, 1, -2), 4, 'player1')
+        self.board.add_road((1, 0, -1), 3, 'player1')
+        self.assertTrue(self.view.has_town((0, 1, -1), 0, 'player1'))
+        self.assertTrue(self.view.has_road((0, 0, 0), 0, 'player1'))
+        self.assertFalse(self.view.has_city((0, 1, -1), 0))
+        self.assertEqual(self.view.port((0, 2, -2), 0), 'brick port')
+        self.assertEqual(self.view.tile((3, 0, -3)).tile_type, 'water')
+
+    def test_placement_state(self):
+        self.board.add_town((1, 1, -2), 4, 'player1')
+        self.board.upgrade_town((1, 1, -2), 4, 'player1')
+        self.board.add_road((1, 0, -1), 3, 'player1')
+        layout_key, robber, names, vertices, edges = \
+            self.view.placement_state()
+        self.assertEqual(names, (None, 'player1'))
+        self.assertEqual(sorted(vertices), [0] * (len(vertices) - 1) + [3])
+        self.assertEqual(sorted(edges), [0] * (len(edges) - 1) + [1])
+        self.board.add_road((1, 0, -1), 2, 'player1')
+        self.assertEqual(sum(edges), 1)
+
+    def test_mutation_raises(self):
+        with self.assertRaises(ReadOnlyBoardError):
+            self.view.add_town((0, 0, 0), 0, 'player1')
+        with self.assertRaises(ReadOnlyBoardError):
+            self.view.move_robber((0, 0, 0))
+        self.assertFalse(self.board.has_town((0, 0, 0), 0))
+
+    def test_is_a_rule_violation(self):
+        with self.assertRaises(GameRuleViolation):
+            self.view.add_road((0, 0, 0), 0, 'player1')
+
+    def test_only_exposes_reads(self):
+        with self.assertRaises(ReadOnlyBoardError):
+            self.view._board = None
+        with self.assertRaises(AttributeError):
+            self.view._vertices
+
+    def test_fork_is_private(self):
+        fork = self.view.fork()
+        fork.add_town((0, 0, 0), 0, 'player1')
+        self.assertFalse(self.board.has_town((0, 0, 0), 0))
+
+
+class Test_Board_compact_storage(unittest.TestCase):
+    def setUp(self):
+        tiles = game_constants.STANDARD_TILE_ORDER
+        numbers = game_constants.STANDARD_NUMBER_ORDER
+        ports = game_constants.STANDARD_PORT_MAP
+        board_geom = StandardBoard()
+        self.board = board.Board(tiles, numbers, ports, board_geom)
+
+    def test_occupancy_arrays(self):
+        self.assertEqual(len(self.board._vertex_state), 96)
+        self.assertEqual(len(self.board._edge_state), 132)
+
+    def test_expanded_views(self):
+        """The dict views decode the arrays back to players.
+        """
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.upgrade_town((0, 0, 0), 0, 'player1')
+        self.board.add_road((0, 0, 0), 0, 'player2')
+        self.assertEqual(list(self.board._vertices.values()),
+                         [('player1', 'city')])
+        self.assertEqual(list(self.board._edges.values()), ['player2'])
+
+    def test_tiles_match_layout(self):
+        tiles = self.board._tiles
+        self.assertEqual([t.tile_type for t in tiles],
+                         list(game_constants.STANDARD_TILE_ORDER))
+        self.assertEqual(tiles[0].number, 9)
+        self.assertIsNone(tiles[13].number)
+
+    def test_player_limit(self):
+        for i in range(board.MAX_PLAYERS):
+            self.board._player_slot('player{0}'.format(i))
+        with self.assertRaises(ValueError):
+            self.board._player_slot('one too many')
+
+    def test_tile_has_no_dict(self):
+        self.assertFalse(hasattr(self.board.tile((0, 0, 0)), '__dict__'))
+
+
+class Test_Board_robber_tracking(unittest.TestCase):
+    def setUp(self):
+        tiles = game_constants.STANDARD_TILE_ORDER
+        numbers = game_constants.STANDARD_NUMBER_ORDER
+        ports = game_constants.STANDARD_PORT_MAP
+        board_geom = StandardBoard()
+        self.board = board.Board(tiles, numbers, ports, board_geom)
+        self.desert = board_geom.hexagon_from_ordinal(13)
+
+    def test_starts_on_desert(self):
+        self.assertEqual(self.board.robber_position(), self.desert)
+
+    def test_candidates_are_other_land_tiles(self):
+        candidates = self.board.robber_candidates()
+        self.assertEqual(len(candidates), 18)
+        self.assertNotIn(self.desert, candidates)
+        self.assertNotIn((3, 0, -3), candidates)
+
+    def test_candidates_follow_robber(self):
+        self.board.move_robber((0, 0, 0))
+        candidates = self.board.robber_candidates()
+        self.assertIn(self.desert, candidates)
+        self.assertNotIn((0, 0, 0), candidates)
+        self.assertEqual(self.board.robber_position(), (0, 0, 0))
+
+    def test_move_to_water_raises(self):
+        with self.assertRaises(GameRuleViolation):
+            self.board.move_robber((3, 0, -3))
+
+    def test_adjacent_players(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.add_town((0, 0, 0), 3, 'player2')
+        self.board.add_town((1, 0, -1), 1, 'player1')
+        self.assertEqual(self.board.adjacent_players((0, 0, 0)),
+                         ('player1', 'player2'))
+        self.assertEqual(self.board.adjacent_players((1, 0, -1)),
+                         ('player1',))
+        self.assertEqual(self.board.adjacent_players((2, 0, -2)),
+                         ('player1',))
+        self.assertEqual(self.board.adjacent_players((-2, 2, 0)), ())
+
+    def test_robber_options(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        options = dict(self.board.robber_options())
+        self.assertEqual(len(options), 18)
+        self.assertEqual(options[(0, 0, 0)], ('player1',))
+        self.assertEqual(options[(2, 0, -2)], ())
+
+    def test_snapshot_is_independent(self):
+        snapshot = self.board.snapshot()
+        snapshot.add_town((0, 0, 0), 0, 'player1')
+        snapshot.move_robber((0, 0, 0))
+        self.assertEqual(self.board.adjacent_players((0, 0, 0)), ())
+        self.assertEqual(self.board.robber_position(), self.desert)
+
+
+class Test_random_standard_board_layout(unittest.TestCase):
+    def test_water_ring(self):
+        b = board.random_standard_board(random.Random(1))
+        self.assertEqual(len(b._tile_order), 37)
+        self.assertEqual(b._tile_order[19:], ('water',) * 18)
+        self.assertEqual(sorted(b._tile_order[:19]),
+                         sorted(game_constants.STANDARD_LAND_TILE_ORDER))
+
+    def test_seeded(self):
+        first = board.random_standard_board(random.Random(1))
+        second = board.random_standard_board(random.Random(1))
+        self.assertEqual(first.position_key(), second.position_key())
+
+
+class Test_Board_pieces(unittest.TestCase):
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.add_town((0, 0, 0), 3, 'player1')
+        self.board.upgrade_town((0, 0, 0), 3, 'player1')
+        self.board.add_road((0, 0, 0), 0, 'player1')
+
+    def test_pieces(self):
+        self.assertEqual(self.board.pieces('player1'),
+                         {'road': 1, 'town': 1, 'city': 1})
+        self.assertEqual(self.board.pieces('player2'),
+                         {'road': 0, 'town': 0, 'city': 0})
+
+    def test_victory_points(self):
+        self.board.add_road((0, 0, 0), 2, 'player2')
+        self.assertEqual(self.board.victory_points(),
+                         {'player1': 3, 'player2': 0})
+
+
+def board_state(b):
+    """Everything a board can be asked, for comparing two positions.
+    """
+    players = list(b.victory_points())
+    return {
+        'key': b.position_key(),
+        'robber': [(hexagon, sorted(adjacent))
+                   for hexagon, adjacent in b.robber_options()],
+        'points': b.victory_points(),
+        'holder': b.longest_road_holder(),
+        'production': [sorted(b.production(n)) for n in range(2, 13)],
+        'players': [(b.pieces(p), b.longest_road(p),
+                     sorted(b.legal_roads(p)),
+                     sorted(b.legal_town_sites(p)),
+                     sorted(b.legal_city_upgrades(p)))
+                    for p in players],
+        'open': sorted(b.legal_town_sites('nobody', setup=True)),
+        'tile_players': [b.adjacent_players(hexagon)
+                         for hexagon in b._topology.hexagons],
+    }
+
+
+class Test_Board_undo(unittest.TestCase):
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+        self.mark = self.board.undo_mark()
+
+    def random_move(self, rng):
+        b = self.board
+        player = 'player{0}'.format(rng.randrange(3))
+        moves = [(b.add_road, road) for road in b.legal_roads(player)]
+        moves += [(b.upgrade_town, town)
+                  for town in b.legal_city_upgrades(player)]
+        moves += [(b.add_town, site)
+                  for site in b.legal_town_sites(player, setup=True)][:3]
+        moves += [(b.move_robber, (hexagon,))
+                  for hexagon in b.robber_candidates()][:2]
+        method, args = rng.choice(moves)
+        if method == b.move_robber:
+            method(*args)
+        else:
+            method(*args, player=player)
+
+    def test_undo_restores_every_position(self):
+        """Undoing random moves one at a time passes back through every
+        position on the way, and ends on the empty board.
+        """
+        rng = random.Random(5)
+        states = []
+        for _ in range(120):
+            states.append(board_state(self.board))
+            self.random_move(rng)
+        self.assertEqual(self.board.undo_depth(), 120)
+        while states:
+            self.board.undo()
+            self.assertEqual(board_state(self.board), states.pop())
+        self.assertEqual(list(self.board.victory_points()), [])
+
+    def test_matches_rebuilt_indexes(self):
+        rng = random.Random(6)
+        for _ in range(60):
+            self.random_move(rng)
+        mark = self.board.undo_mark()
+        for _ in range(60):
+            self.random_move(rng)
+        self.board.undo_to(mark)
+        rebuilt = pickle.loads(pickle.dumps(self.board))
+        rebuilt._rebuild_indexes()
+        self.assertEqual(board_state(self.board), board_state(rebuilt))
+        self.assertEqual(self.board._production, rebuilt._production)
+
+    def test_moves_after_undo(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        self.board.undo()
+        self.board.add_road((0, 0, 0), 5, 'player1')
+        self.assertFalse(self.board.has_road((0, 0, 0), 0))
+        self.assertTrue(self.board.has_road((0, 0, 0), 5, 'player1'))
+        self.assertEqual(self.board.longest_road('player1'), 1)
+
+    def test_undo_on_loaded_board(self):
+        """Roads loaded in bulk are measured before a town splits them,
+        so undoing the town rejoins them.
+        """
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        for loaded in [serialization.decode_board(
+                           serialization.encode_board(self.board)),
+                       pickle.loads(pickle.dumps(self.board))]:
+            mark = loaded.undo_mark()
+            loaded.add_town((0, 0, 0), 2, 'player2')
+            self.assertEqual(loaded.longest_road('player1'), 3)
+            loaded.undo_to(mark)
+            self.assertEqual(loaded.longest_road('player1'), 5)
+            self.assertEqual(loaded.longest_road_holder(), 'player1')
+
+    def test_nothing_to_undo(self):
+        with self.assertRaises(ValueError):
+            self.board.undo()
+        with self.assertRaises(ValueError):
+            self.board.undo_to(1)
+        self.board.undo_to(self.mark)
+        with self.assertRaises(ValueError):
+            self.board.undo_to(0)
+
+    def test_records_only_while_marked(self):
+        """A board keeps no history once every mark is given back.
+        """
+        inner = self.board.undo_mark()
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.undo_to(inner)
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.undo_depth(), 1)
+        self.board.undo_to(self.mark)
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.undo_depth(), 0)
+        self.assertTrue(self.board.has_town((0, 0, 0), 0, 'player1'))
+        with self.assertRaises(ValueError):
+            self.board.undo()
+
+    def test_failed_move_records_nothing(self):
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        with self.assertRaises(GameRuleViolation):
+            self.board.add_road((0, 0, 0), 0, 'player2')
+        self.assertEqual(self.board.undo_depth(), 1)
+
+    def test_snapshots_are_unaffected(self):
+        """Undoing on either side of a snapshot leaves the other alone,
+        and the snapshot starts with nothing to undo.
+        """
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        snapshot = self.board.snapshot()
+        self.assertEqual(snapshot.undo_depth(), 0)
+        snapshot.undo_mark()
+        snapshot.add_road((0, 0, 0), 0, 'player1')
+        self.board.undo()
+        self.assertTrue(snapshot.has_town((0, 0, 0), 0, 'player1'))
+        snapshot.undo()
+        self.assertFalse(self.board.has_town((0, 0, 0), 0))
+        self.assertTrue(snapshot.has_town((0, 0, 0), 0, 'player1'))
+        self.assertFalse(snapshot.has_road((0, 0, 0), 0))
+
+    def test_not_pickled(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        copied = pickle.loads(pickle.dumps(self.board))
+        self.assertEqual(copied.undo_depth(), 0)
+
+    def test_refused_by_views(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        with self.assertRaises(ReadOnlyBoardError):
+            board.BoardView(self.board).undo()
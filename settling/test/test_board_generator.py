@@ -0,0 +1,85 @@
+import unittest
+from collections import Counter
+
+from settling import game_constants
+from settling.board import Board, random_standard_board
+from settling.board_generator import BoardGenerator, Constraints, is_fair
+from settling.board_geometry import StandardBoard
+
+
+def board_from_rows(generator, tiles, numbers):
+    tile_order = tuple(game_constants.TILE_TYPES[t] for t in tiles)
+    return Board(tile_order + generator._water, list(numbers),
+                 generator.port_map, StandardBoard())
+
+
+class Test_is_fair(unittest.TestCase):
+    def test_standard_layout(self):
+        """The printed layout has a 6 next to an 8, a pair of tiles of
+        the same resource, and a vertex with 13 pips.
+        """
+        board = Board(game_constants.STANDARD_TILE_ORDER,
+                      game_constants.STANDARD_NUMBER_ORDER,
+                      game_constants.STANDARD_PORT_MAP, StandardBoard())
+        self.assertFalse(is_fair(board, Constraints(True, None, None)))
+        self.assertFalse(is_fair(board, Constraints(False, 0, None)))
+        self.assertTrue(is_fair(board, Constraints(False, 1, None)))
+        self.assertFalse(is_fair(board, Constraints(False, None, 12)))
+        self.assertTrue(is_fair(board, Constraints(False, None, 13)))
+
+
+class Test_BoardGenerator(unittest.TestCase):
+    def test_boards_are_fair(self):
+        for constraints in [Constraints(), Constraints(True, 1, 11),
+                            Constraints(False, None, 10)]:
+            generator = BoardGenerator(constraints, seed=0, batch_size=256)
+            boards = list(generator.boards(40))
+            self.assertEqual(len(boards), 40)
+            for board in boards:
+                self.assertTrue(is_fair(board, constraints))
+            self.assertEqual(generator.stats.boards, 40)
+
+    def test_checks_match_is_fair(self):
+        """Every layout is accepted exactly when the board built from it
+        is fair.
+        """
+        generator = BoardGenerator(seed=1)
+        tiles = generator._shuffled(generator._tile_codes, 500)
+        numbers = generator._shuffled(generator._numbers, 500)
+        passed = (set(generator._check_tiles(tiles).tolist()) &
+                  set(generator._check_numbers(tiles, numbers).tolist()))
+        self.assertTrue(passed)
+        for i in range(500):
+            board = board_from_rows(generator, tiles[i], numbers[i])
+            self.assertEqual(is_fair(board), i in passed)
+
+    def test_reproducible(self):
+        first = BoardGenerator(seed=3).boards(5)
+        second = BoardGenerator(seed=3).boards(5)
+        self.assertEqual([b.position_key() for b in first],
+                         [b.position_key() for b in second])
+
+    def test_unconstrained(self):
+        """Without constraints every shuffle passes, and every tile is
+        dealt as often as random_standard_board deals it.
+        """
+        generator = BoardGenerator(Constraints(False, None, None), seed=2)
+        boards = list(generator.boards(20))
+        self.assertEqual(generator.stats.rejected, Counter())
+        tiles = Counter(t for b in boards for t in b._tile_order)
+        expected = Counter(random_standard_board()._tile_order)
+        self.assertEqual(tiles, Counter({t: 20 * n
+                                         for t, n in expected.items()}))
+
+    def test_stats(self):
+        generator = BoardGenerator(seed=0)
+        list(generator.boards(10))
+        stats = generator.stats
+        self.assertGreaterEqual(stats.passed, 10)
+        self.assertGreater(stats.number_layouts, stats.passed)
+        self.assertGreater(stats.boards_per_second, 0)
+        self.assertIn('red_apart', stats.report())
+
+    def test_bad_numbers(self):
+        with self.assertRaises(ValueError):
+            BoardGenerator(numbers=(2, 3, 4))
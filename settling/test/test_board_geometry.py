@@ -150,3 +150,56 @@ class Test_StandardBoard_vertex_synonyms(unittest.TestCase):
         synonyms = self.geometry.vertex_synonyms(hexagon, vertex)
         expected_synonyms = []
         self.assertEqual(synonyms, expected_synonyms)
+
+
+class Test_HexagonalBoard(unittest.TestCase):
+    def test_tile_counts(self):
+        """Ring r adds 6r tiles around the center.
+        """
+        for radius, tiles in [(0, 1), (1, 7), (2, 19), (3, 37), (10, 331)]:
+            geometry = board_geometry.HexagonalBoard(radius)
+            self.assertEqual(geometry.max_ordinal + 1, tiles)
+            self.assertEqual(len(geometry.topology.hexagons), tiles)
+
+    def test_standard_board_is_radius_three(self):
+        standard = board_geometry.StandardBoard()
+        self.assertEqual(standard.radius, 3)
+        self.assertIs(standard.topology,
+                      board_geometry.HexagonalBoard(3).topology)
+
+    def test_from_max_ordinal(self):
+        geometry = board_geometry.HexagonalBoard.from_max_ordinal(1260)
+        self.assertEqual(geometry.radius, 20)
+        with self.assertRaises(ValueError):
+            board_geometry.HexagonalBoard.from_max_ordinal(37)
+
+    def test_negative_radius(self):
+        with self.assertRaises(ValueError):
+            board_geometry.HexagonalBoard(-1)
+
+    def test_has_hexagon(self):
+        geometry = board_geometry.HexagonalBoard(20)
+        self.assertTrue(geometry.has_hexagon((20, -20, 0)))
+        self.assertTrue(geometry.has_hexagon((0, 0, 0)))
+        self.assertFalse(geometry.has_hexagon((21, -20, -1)))
+        self.assertFalse(geometry.has_hexagon((1, 1, 1)))
+
+    def test_edge_of_large_board(self):
+        """Tiles on the last ring only have synonyms and neighbors on
+        the board, and the same holds for a tile just off it.
+        """
+        geometry = board_geometry.HexagonalBoard(20)
+        corner = (20, 0, -20)
+        self.assertEqual(geometry.ordinal_from_hexagon(corner), 1141)
+        self.assertEqual(geometry.vertex_synonyms(corner, 1), [])
+        self.assertEqual(geometry.vertex_synonyms(corner, 3),
+                         [((19, 1, -20), 5), ((19, 0, -19), 1)])
+        self.assertEqual(geometry.edge_synonyms(corner, 3),
+                         [((19, 0, -19), 0)])
+        self.assertEqual(len(geometry.hexagon_neighbors(corner)), 3)
+        outside = (21, 0, -21)
+        self.assertEqual(geometry.hexagon_neighbors(outside), [corner])
+        self.assertEqual(geometry.edge_synonyms(outside, 3), [(corner, 0)])
+        self.assertEqual(geometry.hexagon_from_ordinal(1261),
+                         board_geometry.StandardBoard()
+                         .hexagon_from_ordinal(1261))
@@ -0,0 +1,88 @@
+import pickle
+import unittest
+
+from settling import board_topology
+
+
+class Test_BoardTopology_counts(unittest.TestCase):
+    def setUp(self):
+        self.topology = board_topology.BoardTopology(36)
+
+    def test_vertex_count(self):
+        """A hexagon of radius 3 has 6 * 4 ** 2 vertices.
+        """
+        self.assertEqual(self.topology.vertex_count, 96)
+
+    def test_edge_count(self):
+        self.assertEqual(self.topology.edge_count, 132)
+
+    def test_every_alias_has_an_id(self):
+        self.assertEqual(len(self.topology.tile_vertices), 37 * 6)
+        self.assertEqual(len(self.topology.tile_edges), 37 * 6)
+
+
+class Test_BoardTopology_ids(unittest.TestCase):
+    def setUp(self):
+        self.topology = board_topology.BoardTopology(36)
+
+    def test_vertex_synonyms_share_id(self):
+        """All three names of the center's vertex 0 are one vertex.
+        """
+        ids = {self.topology.vertex_id((0, 0, 0), 0),
+               self.topology.vertex_id((1, -1, 0), 2),
+               self.topology.vertex_id((1, 0, -1), 4)}
+        self.assertEqual(len(ids), 1)
+
+    def test_edge_synonyms_share_id(self):
+        self.assertEqual(self.topology.edge_id((0, 0, 0), 0),
+                         self.topology.edge_id((1, 0, -1), 3))
+
+    def test_off_board_raises(self):
+        with self.assertRaises(ValueError):
+            self.topology.vertex_id((4, 0, -4), 0)
+
+    def test_vertex_tiles(self):
+        vertex_id = self.topology.vertex_id((0, 0, 0), 0)
+        self.assertEqual(sorted(self.topology.vertex_tiles[vertex_id]),
+                         [0, 1, 6])
+
+    def test_outer_vertex_has_one_tile(self):
+        vertex_id = self.topology.vertex_id((3, 0, -3), 0)
+        self.assertEqual(self.topology.vertex_tiles[vertex_id], (19,))
+
+
+class Test_BoardTopology_adjacency(unittest.TestCase):
+    def setUp(self):
+        self.topology = board_topology.BoardTopology(36)
+
+    def test_edge_endpoints(self):
+        """Edge 0 of the center runs from its vertex 0 to its vertex 1.
+        """
+        t = self.topology
+        edge_id = t.edge_id((0, 0, 0), 0)
+        expected = {t.vertex_id((0, 0, 0), 0), t.vertex_id((0, 0, 0), 1)}
+        self.assertEqual(set(t.edge_vertices[edge_id]), expected)
+
+    def test_inner_vertex_has_three_edges(self):
+        t = self.topology
+        vertex_id = t.vertex_id((0, 0, 0), 3)
+        self.assertEqual(len(t.vertex_edges[vertex_id]), 3)
+        self.assertEqual(len(t.vertex_neighbors[vertex_id]), 3)
+
+    def test_adjacency_is_symmetric(self):
+        t = self.topology
+        for vertex_id, others in enumerate(t.vertex_neighbors):
+            for other in others:
+                self.assertIn(vertex_id, t.vertex_neighbors[other])
+
+
+class Test_shared_topology(unittest.TestCase):
+    def test_same_object(self):
+        self.assertIs(board_topology.shared_topology(36),
+                      board_topology.shared_topology(36))
+
+
+class Test_BoardTopology_pickle(unittest.TestCase):
+    def test_unpickles_to_shared(self):
+        topology = board_topology.shared_topology(36)
+        self.assertIs(pickle.loads(pickle.dumps(topology)), topology)
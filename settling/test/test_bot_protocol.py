@@ -0,0 +1,249 @@
+import asyncio
+import io
+import json
+import random
+import sys
+import unittest
+
+from settling import bot_protocol
+from settling import player_action
+from settling.board import BoardView, random_standard_board
+from settling.bot_protocol import (BotProcess, DeltaDecoder, DeltaEncoder,
+                                   RemotePlayer)
+from settling.exceptions import BotError
+from settling.game import Game
+from settling.game_server import AsyncGame, GameServer
+from settling.hand import Hand
+from settling.player import RandomPlayer
+
+BOT = [sys.executable, '-m', 'settling', 'bot']
+
+
+def new_game(seed, players, game_class=Game, max_turns=150):
+    rng = random.Random(seed)
+    return game_class(random_standard_board(rng), players,
+                      lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                      max_turns=max_turns)
+
+
+def local_players(seed):
+    return [RandomPlayer('player{0}'.format(i), random.Random(seed + i))
+            for i in range(3)]
+
+
+def remote_players(seed, bot, asynchronous=False):
+    return [RemotePlayer('player{0}'.format(i), bot, asynchronous,
+                         options={'seed': seed + i})
+            for i in range(3)]
+
+
+class Test_actions(unittest.TestCase):
+    def test_round_trip(self):
+        for action in [player_action.EndTurn(),
+                       player_action.BuildRoad((1, -1, 0), 2),
+                       player_action.UpgradeTown((0, 0, 0), 5),
+                       player_action.BankTrade('wood', 'ore')]:
+            move = bot_protocol.encode_action(action)
+            decoded = bot_protocol.decode_action(move)
+            self.assertIs(type(decoded), type(action))
+            self.assertEqual(vars(decoded), vars(action))
+        self.assertEqual(
+            bot_protocol.encode_action(player_action.BuildTown((0, 1, -1),
+                                                               3)),
+            ['build_town', [0, 1, -1], 3])
+
+    def test_bad_action(self):
+        with self.assertRaises(ValueError):
+            bot_protocol.decode_action(['fly_away'])
+
+    def test_hand(self):
+        hand = Hand(['ore', 'wood', 'ore'])
+        decoded = bot_protocol.decode_hand(bot_protocol.encode_hand(hand))
+        self.assertEqual(sorted(decoded.cards), sorted(hand.cards))
+
+
+class DeltaCheckingPlayer(RandomPlayer):
+    """Checks that a board rebuilt from deltas matches the game's.
+    """
+    def __init__(self, name, rng, test):
+        super().__init__(name, rng)
+        self.test = test
+        self.encoder = DeltaEncoder()
+        self.decoder = DeltaDecoder()
+        self.messages = []
+
+    def check(self, board):
+        message = self.encoder.encode(board)
+        self.messages.append(message)
+        decoded = self.decoder.apply(message)
+        self.test.assertEqual(decoded.position_key(), board.position_key())
+        self.test.assertEqual(decoded.longest_road_holder(),
+                              board.longest_road_holder())
+
+    def starting_town(self, board):
+        self.check(board)
+        return super().starting_town(board)
+
+    def act(self, board, hand):
+        self.check(board)
+        return super().act(board, hand)
+
+
+class Test_deltas(unittest.TestCase):
+    def test_game(self):
+        players = [DeltaCheckingPlayer('player{0}'.format(i),
+                                       random.Random(i), self)
+                   for i in range(3)]
+        new_game(4, players, max_turns=300).game_loop()
+        messages = players[0].messages
+        self.assertIn('board', messages[0])
+        self.assertFalse(any('board' in m for m in messages[1:]))
+        self.assertTrue(any('holder' in m.get('delta', {})
+                            for m in messages))
+
+    def test_nothing_changed(self):
+        board = random_standard_board(random.Random(0))
+        encoder = DeltaEncoder()
+        encoder.encode(board)
+        self.assertEqual(encoder.encode(board), {})
+
+    def test_resend_after_undo(self):
+        board = random_standard_board(random.Random(0))
+        mark = board.undo_mark()
+        board.add_town((0, 0, 0), 0, 'player0')
+        encoder = DeltaEncoder()
+        decoder = DeltaDecoder()
+        decoder.apply(encoder.encode(board))
+        board.undo_to(mark)
+        board.add_town((0, 0, 0), 3, 'player0')
+        message = encoder.encode(board)
+        self.assertIn('board', message)
+        self.assertEqual(decoder.apply(message).position_key(),
+                         board.position_key())
+
+    def test_view(self):
+        board = random_standard_board(random.Random(0))
+        view = BoardView(board)
+        encoder = DeltaEncoder()
+        decoder = DeltaDecoder()
+        decoder.apply(encoder.encode(view))
+        board.add_town((0, 0, 0), 0, 'player0')
+        board.move_robber((0, 0, 0))
+        message = encoder.encode(view)
+        self.assertIn('delta', message)
+        self.assertEqual(decoder.apply(message).position_key(),
+                         board.position_key())
+
+    def test_new_board(self):
+        encoder = DeltaEncoder()
+        encoder.encode(random_standard_board(random.Random(0)))
+        self.assertIn('board', encoder.encode(
+            random_standard_board(random.Random(1))))
+
+
+def make_player(name, options):
+    return RandomPlayer(name, random.Random(options.get('seed')))
+
+
+class Test_serve(unittest.TestCase):
+    def test_errors(self):
+        sessions = {}
+        reply = bot_protocol._answer(sessions, make_player,
+                                     {'id': 1, 'session': 1, 'hook': 'act',
+                                      'player': 'player0', 'hand': []})
+        self.assertEqual(reply['id'], 1)
+        self.assertIn('No board', reply['error'])
+        board = random_standard_board(random.Random(0))
+        request = {'id': 2, 'session': 1, 'hook': 'fork'}
+        request.update(DeltaEncoder().encode(board))
+        reply = bot_protocol._answer(sessions, make_player, request)
+        self.assertIn('Unknown hook', reply['error'])
+
+    def test_bad_lines(self):
+        """Lines that are not requests are answered with errors, and
+        the bot carries on.
+        """
+        board = random_standard_board(random.Random(0))
+        request = {'id': 1, 'session': 1, 'hook': 'starting_town',
+                   'player': 'player0'}
+        request.update(DeltaEncoder().encode(board))
+        stdin = io.BytesIO(b'{"id": 2\n\n[1]\n' +
+                           json.dumps(request).encode() + b'\n')
+        stdout = io.BytesIO()
+        bot_protocol.serve(make_player, stdin, stdout)
+        replies = [json.loads(line)
+                   for line in stdout.getvalue().splitlines()]
+        self.assertEqual([reply['id'] for reply in replies], [None, None, 1])
+        self.assertIn('JSONDecodeError', replies[0]['error'])
+        self.assertIn('JSON object', replies[1]['error'])
+        self.assertIn('move', replies[2])
+
+    def test_close(self):
+        sessions = {}
+        board = random_standard_board(random.Random(0))
+        request = {'id': 1, 'session': 1, 'hook': 'starting_town',
+                   'player': 'player0'}
+        request.update(DeltaEncoder().encode(board))
+        reply = bot_protocol._answer(sessions, make_player, request)
+        self.assertIn(tuple(reply['move'][0]), board._topology.ordinals)
+        self.assertIsNone(bot_protocol._answer(
+            sessions, make_player, {'session': 1, 'hook': 'act'}))
+        self.assertIsNone(bot_protocol._answer(
+            sessions, make_player, {'session': 1, 'hook': 'close'}))
+        self.assertEqual(sessions, {})
+
+
+class Test_RemotePlayer(unittest.TestCase):
+    def test_plays_same_game(self):
+        game = new_game(1, local_players(10))
+        winner = game.game_loop()
+        with BotProcess(BOT) as bot:
+            remote = new_game(1, remote_players(10, bot))
+            self.assertEqual(remote.game_loop(), winner)
+        self.assertEqual(remote.turns, game.turns)
+        self.assertEqual(remote.board.position_key(),
+                         game.board.position_key())
+
+    def test_pipelined_games(self):
+        """Games in an AsyncGame server share one bot.
+        """
+        expected = []
+        for seed in range(4):
+            game = new_game(seed, local_players(seed), max_turns=60)
+            expected.append((game.game_loop(), game.turns))
+        with BotProcess(BOT) as bot:
+            server = GameServer()
+            results = asyncio.run(server.run(
+                new_game(seed, remote_players(seed, bot, True), AsyncGame,
+                         max_turns=60)
+                for seed in range(4)))
+        self.assertEqual([(r.winner, r.turns) for r in results], expected)
+
+    def test_bot_exits(self):
+        command = [sys.executable, '-c', 'import sys; sys.stdin.readline()']
+        with BotProcess(command) as bot:
+            player = RemotePlayer('player0', bot)
+            board = random_standard_board(random.Random(0))
+            with self.assertRaises(BotError):
+                player.starting_town(board)
+            with self.assertRaises(BotError):
+                player.starting_town(board)
+
+    def test_bot_cannot_read(self):
+        """An error that is not a reply to any request is logged, and
+        the bot's other replies still arrive.
+        """
+        command = [sys.executable, '-c',
+                   'import json, sys; '
+                   'request = json.loads(sys.stdin.readline()); '
+                   'print(\'{"id": null, "error": "ValueError: bad"}\'); '
+                   'print(json.dumps({"id": request["id"], '
+                   '"move": [[0, 0, 0], 0]}), flush=True); '
+                   'sys.stdin.readline()']
+        with BotProcess(command) as bot:
+            player = RemotePlayer('player0', bot)
+            board = random_standard_board(random.Random(0))
+            with self.assertLogs('settling.bot_protocol', 'WARNING') as logs:
+                self.assertEqual(player.starting_town(board),
+                                 ((0, 0, 0), 0))
+        self.assertIn('ValueError: bad', logs.output[0])
@@ -0,0 +1,167 @@
+import random
+import unittest
+
+from mock import patch
+
+from settling import board
+from settling import game
+from settling import game_constants
+from settling import player_action
+from settling.board_geometry import StandardBoard
+from settling.exceptions import GameRuleViolation
+from settling.player import Player, RandomPlayer
+
+
+class Test_Game_player_board(unittest.TestCase):
+    def setUp(self):
+        self.board = board.random_standard_board()
+        self.players = [Player('player1'), Player('player2')]
+
+    def test_view_by_default(self):
+        g = game.Game(self.board, self.players, roll=lambda: 8)
+        self.assertIsInstance(g._player_board(), board.BoardView)
+
+    def test_private_boards(self):
+        g = game.Game(self.board, self.players, roll=lambda: 8,
+                      private_boards=True)
+        player_board = g._player_board()
+        self.assertIsInstance(player_board, board.Board)
+        self.assertIsNot(player_board, self.board)
+
+
+class Test_resources(unittest.TestCase):
+    """The center's vertex 0 touches wheat 9, wood 10 and brick 3.
+    """
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.upgrade_town((0, 0, 0), 0, 'player1')
+
+    def test_draw_player_resources(self):
+        resources = game.draw_player_resources(self.board, 'player1', 9)
+        self.assertEqual(resources, ['wheat', 'wheat'])
+        self.assertEqual(
+            game.draw_player_resources(self.board, 'player2', 9), []
+        )
+
+    def test_initial_resources(self):
+        resources = game.initial_resources(self.board, (0, 0, 0), 0)
+        self.assertEqual(sorted(resources), ['brick', 'wheat', 'wood'])
+
+    def test_initial_resources_skip_desert(self):
+        desert = self.board._topology.hexagons[13]
+        resources = game.initial_resources(self.board, desert, 0)
+        self.assertNotIn('desert', resources)
+        self.assertEqual(len(resources), 2)
+
+    def test_distribute_resources(self):
+        players = [Player('player1'), Player('player2')]
+        g = game.Game(self.board, players, roll=lambda: 9)
+        g._distribute_resources(9)
+        self.assertEqual(g.hands['player1'].cards, ['wheat', 'wheat'])
+        self.assertEqual(g.hands['player2'].cards, [])
+
+
+class Test_Game_apply_action(unittest.TestCase):
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.player = Player('player1')
+        self.game = game.Game(self.board, [self.player], roll=lambda: 8)
+        self.hand = self.game.hands['player1']
+
+    def test_build_road_charges_cost(self):
+        self.hand.add_resources(['brick', 'wood', 'ore'])
+        self.game._apply_action(self.player,
+                                player_action.BuildRoad((0, 0, 0), 0))
+        self.assertTrue(self.board.has_road((0, 0, 0), 0, 'player1'))
+        self.assertEqual(self.hand.cards, ['ore'])
+
+    def test_cannot_afford(self):
+        self.hand.add_resources(['brick'])
+        with self.assertRaises(GameRuleViolation):
+            self.game._apply_action(self.player,
+                                    player_action.BuildRoad((0, 0, 0), 0))
+        self.assertFalse(self.board.has_road((0, 0, 0), 0))
+        self.assertEqual(self.hand.cards, ['brick'])
+
+    def test_road_must_connect(self):
+        self.hand.add_resources(['brick', 'wood'])
+        with self.assertRaises(GameRuleViolation):
+            self.game._apply_action(self.player,
+                                    player_action.BuildRoad((0, 0, 0), 2))
+        self.assertEqual(len(self.hand.cards), 2)
+
+    def test_town_must_be_reached(self):
+        self.hand.add_resources(game_constants.TOWN_COST)
+        with self.assertRaises(GameRuleViolation):
+            self.game._apply_action(self.player,
+                                    player_action.BuildTown((0, 0, 0), 2))
+
+    def test_upgrade_town(self):
+        self.hand.add_resources(game_constants.CITY_COST)
+        self.game._apply_action(self.player,
+                                player_action.UpgradeTown((0, 0, 0), 0))
+        self.assertTrue(self.board.has_city((0, 0, 0), 0, 'player1'))
+        self.assertEqual(self.hand.cards, [])
+
+    def test_piece_limit(self):
+        self.hand.add_resources(game_constants.ROAD_COST)
+        no_roads = {player_action.BuildRoad: (
+            'road', game_constants.ROAD_COST, 0)}
+        with patch.dict(game._BUILDS, no_roads):
+            with self.assertRaises(GameRuleViolation):
+                self.game._apply_action(
+                    self.player, player_action.BuildRoad((0, 0, 0), 0))
+
+    def test_bank_trade(self):
+        self.hand.add_resources(['sheep'] * 5)
+        self.game._apply_action(self.player,
+                                player_action.BankTrade('sheep', 'ore'))
+        self.assertEqual(sorted(self.hand.cards), ['ore', 'sheep'])
+        with self.assertRaises(GameRuleViolation):
+            self.game._apply_action(self.player,
+                                    player_action.BankTrade('sheep', 'ore'))
+
+
+class Test_who_won(unittest.TestCase):
+    def test_ten_points(self):
+        b = board.Board(game_constants.STANDARD_TILE_ORDER,
+                        game_constants.STANDARD_NUMBER_ORDER,
+                        game_constants.STANDARD_PORT_MAP,
+                        StandardBoard())
+        self.assertIsNone(game.who_won(b))
+        for ordinal in range(1, 6):
+            hexagon = b._topology.hexagons[ordinal]
+            b.add_town(hexagon, 0, 'player1')
+            if ordinal < 5:
+                b.upgrade_town(hexagon, 0, 'player1')
+        self.assertEqual(b.victory_points(), {'player1': 9})
+        self.assertIsNone(game.who_won(b))
+        b.upgrade_town(b._topology.hexagons[5], 0, 'player1')
+        self.assertEqual(game.who_won(b), 'player1')
+
+
+class Test_Game_game_loop(unittest.TestCase):
+    def test_random_players_finish(self):
+        rng = random.Random(3)
+        players = [RandomPlayer('player1', rng), RandomPlayer('player2', rng)]
+        g = game.Game(board.random_standard_board(rng), players,
+                      roll=lambda: rng.randint(1, 6) + rng.randint(1, 6))
+        winner = g.game_loop()
+        self.assertIn(winner, ['player1', 'player2'])
+        self.assertGreater(g.turns, 0)
+
+    def test_max_turns(self):
+        rng = random.Random(3)
+        players = [RandomPlayer('player1', rng), RandomPlayer('player2', rng)]
+        g = game.Game(board.random_standard_board(rng), players,
+                      roll=lambda: 7, max_turns=5)
+        self.assertIsNone(g.game_loop())
+        self.assertEqual(g.turns, 5)
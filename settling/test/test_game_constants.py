@@ -24,3 +24,9 @@ class Test_Standards(unittest.TestCase):
         """18 numbers, to correspond with resource tiles.
         """
         self.assertEqual(len(game_constants.STANDARD_NUMBER_ORDER), 18)
+
+    def test_port_types_known(self):
+        """Every port on the standard board is a known port type.
+        """
+        for _, port_type, _, _ in game_constants.STANDARD_PORT_MAP:
+            self.assertIn(port_type, game_constants.PORT_TYPES)
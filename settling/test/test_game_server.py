@@ -0,0 +1,219 @@
+import asyncio
+import random
+import time
+import unittest
+
+from settling import player_action
+from settling.board import random_standard_board
+from settling.game import Game
+from settling.game_server import AsyncGame, GameServer, ServerMetrics
+from settling.player import RandomPlayer
+
+
+class DelayedPlayer(RandomPlayer):
+    """A stand-in for a remote bot, answering after delay seconds.
+    """
+    def __init__(self, name, rng, delay=0):
+        super().__init__(name, rng)
+        self.delay = delay
+
+    async def starting_town(self, board):
+        await asyncio.sleep(self.delay)
+        return super().starting_town(board)
+
+    async def act(self, board, hand):
+        await asyncio.sleep(self.delay)
+        return super().act(board, hand)
+
+
+class StuckPlayer(RandomPlayer):
+    """A bot that never answers.
+    """
+    async def starting_town(self, board):
+        await asyncio.Event().wait()
+
+    async def act(self, board, hand):
+        await asyncio.Event().wait()
+
+
+class SlowPlayer(RandomPlayer):
+    """A bot that blocks for a while on every action.
+    """
+    def act(self, board, hand):
+        time.sleep(0.3)
+        return super().act(board, hand)
+
+
+class CheatingPlayer(RandomPlayer):
+    def act(self, board, hand):
+        return player_action.BuildTown((0, 0, 0), 0)
+
+
+class ClosedPlayer(RandomPlayer):
+    def __init__(self, name, rng):
+        super().__init__(name, rng)
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+class BadClosePlayer(ClosedPlayer):
+    def close(self):
+        super().close()
+        raise OSError("cannot close")
+
+
+def new_game(seed, game_class=AsyncGame, player_class=RandomPlayer,
+             max_turns=200, **kwargs):
+    rng = random.Random(seed)
+    players = [player_class('player{0}'.format(i), random.Random(seed + i))
+               for i in range(3)]
+    return game_class(random_standard_board(rng), players,
+                      lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                      max_turns=max_turns, **kwargs)
+
+
+class Test_AsyncGame(unittest.TestCase):
+    def assertSameGame(self, async_game, game):
+        self.assertEqual(async_game.turns, game.turns)
+        self.assertEqual(async_game.board.position_key(),
+                         game.board.position_key())
+        self.assertEqual(
+            {name: sorted(hand.cards) for name, hand in game.hands.items()},
+            {name: sorted(hand.cards)
+             for name, hand in async_game.hands.items()})
+
+    def test_plays_same_game(self):
+        game = new_game(1, Game)
+        winner = game.game_loop()
+        async_game = new_game(1)
+        self.assertEqual(asyncio.run(async_game.game_loop()), winner)
+        self.assertSameGame(async_game, game)
+
+    def test_coroutine_players(self):
+        game = new_game(2, Game)
+        game.game_loop()
+        async_game = new_game(2, player_class=DelayedPlayer)
+        asyncio.run(async_game.game_loop())
+        self.assertSameGame(async_game, game)
+
+    def test_timeouts(self):
+        """A player who never answers is given default moves.
+        """
+        game = new_game(3, player_class=StuckPlayer, max_turns=6,
+                        decision_timeout=0.001)
+        self.assertIsNone(asyncio.run(game.game_loop()))
+        self.assertEqual(game.turns, 6)
+        self.assertEqual(sum(game.board.pieces(p)['town']
+                             for p in game.hands), 6)
+        # two starting towns and two turns each
+        self.assertEqual(game.timeouts,
+                         {'player0': 4, 'player1': 4, 'player2': 4})
+
+    def test_slow_plain_functions(self):
+        """Plain functions that miss the timeout do not block the loop.
+        """
+        async def play(games):
+            start = time.perf_counter()
+            await asyncio.gather(*(game.game_loop() for game in games))
+            return time.perf_counter() - start
+
+        games = [new_game(seed, player_class=SlowPlayer, max_turns=2,
+                          decision_timeout=0.02) for seed in range(2)]
+        self.assertLess(asyncio.run(play(games)), 0.3)
+        for game in games:
+            self.assertEqual(game.turns, 2)
+            self.assertEqual(sum(game.timeouts.values()), 2)
+
+
+class Test_GameServer(unittest.TestCase):
+    def test_results_in_order(self):
+        server = GameServer(concurrency=4)
+        results = asyncio.run(server.run(new_game(seed, max_turns=40)
+                                         for seed in range(10)))
+        self.assertEqual([r.index for r in results], list(range(10)))
+        game = new_game(7, Game, max_turns=40)
+        winner = game.game_loop()
+        self.assertEqual(results[7][1:3], (winner, game.turns))
+        metrics = server.metrics
+        self.assertEqual(metrics.finished, 10)
+        self.assertEqual(metrics.peak_active, 4)
+        self.assertEqual(metrics.active, 0)
+        self.assertEqual(metrics.turns, sum(r.turns for r in results))
+
+    def test_slow_game_does_not_stall_others(self):
+        """Every quick game finishes while a stuck one is still waiting.
+        """
+        async def first_results(server, count):
+            games = [new_game(0, player_class=StuckPlayer)]
+            games += [new_game(seed, max_turns=20) for seed in range(1, 9)]
+            served = server.serve(games)
+            results = [await served.__anext__() for _ in range(count)]
+            await served.aclose()
+            return results
+
+        server = GameServer(concurrency=3)
+        results = asyncio.run(asyncio.wait_for(first_results(server, 8), 10))
+        self.assertEqual(sorted(r.index for r in results), list(range(1, 9)))
+        # The stuck game was cancelled, and counts as failed.
+        self.assertEqual(server.metrics.active, 0)
+        self.assertEqual(server.metrics.failed, 1)
+
+    def test_failed_game(self):
+        server = GameServer()
+        games = [new_game(0, max_turns=20),
+                 new_game(1, player_class=CheatingPlayer)]
+        results = asyncio.run(server.run(games))
+        self.assertIsNone(results[0].error)
+        self.assertIsNotNone(results[1].error)
+        self.assertIsNone(results[1].winner)
+        self.assertEqual(server.metrics.failed, 1)
+
+    def test_closes_players(self):
+        games = [new_game(seed, player_class=ClosedPlayer, max_turns=20)
+                 for seed in range(2)]
+        asyncio.run(GameServer().run(games))
+        self.assertEqual([p.closed for game in games for p in game.players],
+                         [1] * 6)
+
+    def test_failed_close(self):
+        """A player that fails to close fails its game, and no other.
+        """
+        server = GameServer()
+        games = [new_game(0, player_class=BadClosePlayer, max_turns=20),
+                 new_game(1, max_turns=20)]
+        results = asyncio.run(server.run(games))
+        self.assertIsInstance(results[0].error, OSError)
+        self.assertEqual([p.closed for p in games[0].players], [1] * 3)
+        self.assertIsNone(results[1].error)
+        self.assertEqual(server.metrics.failed, 1)
+        self.assertEqual(server.metrics.active, 0)
+
+    def test_cancelled_games_finish(self):
+        async def cancel(server):
+            task = asyncio.ensure_future(
+                server.play(new_game(0, player_class=StuckPlayer)))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        server = GameServer()
+        asyncio.run(cancel(server))
+        self.assertEqual(server.metrics.active, 0)
+        self.assertEqual(server.metrics.failed, 1)
+
+    def test_metrics(self):
+        metrics = ServerMetrics()
+        server = GameServer(metrics=metrics)
+        games = [new_game(seed, player_class=StuckPlayer, max_turns=3,
+                          decision_timeout=0.001) for seed in range(2)]
+        asyncio.run(server.run(games))
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['games']['finished'], 2)
+        self.assertEqual(snapshot['timeouts'], 2 * (6 + 3))
+        self.assertEqual(snapshot['decision_latency']['count'], 2 * (6 + 6))
+        self.assertGreater(snapshot['throughput']['games_per_second'], 0)
+        self.assertGreaterEqual(snapshot['game_latency']['max'], 0.003)
+        self.assertIn('"peak_active": 2', metrics.to_json())
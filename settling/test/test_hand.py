@@ -0,0 +1,28 @@
+import unittest
+
+from settling.exceptions import GameRuleViolation
+from settling.hand import Hand
+
+
+class Test_Hand_resources(unittest.TestCase):
+    def setUp(self):
+        self.hand = Hand(['brick', 'wood', 'wood'])
+
+    def test_has_resources(self):
+        self.assertTrue(self.hand.has_resources(['wood', 'wood']))
+        self.assertFalse(self.hand.has_resources(['wood', 'wood', 'wood']))
+        self.assertFalse(self.hand.has_resources(['ore']))
+
+    def test_remove_resources(self):
+        self.hand.remove_resources(['wood', 'brick'])
+        self.assertEqual(self.hand.cards, ['wood'])
+
+    def test_remove_missing_leaves_hand(self):
+        with self.assertRaises(GameRuleViolation):
+            self.hand.remove_resources(['wood', 'ore'])
+        self.assertEqual(self.hand.cards, ['brick', 'wood', 'wood'])
+
+    def test_copy_is_independent(self):
+        other = self.hand.copy()
+        other.remove_resources(['brick'])
+        self.assertEqual(self.hand.cards, ['brick', 'wood', 'wood'])
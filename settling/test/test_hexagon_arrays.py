@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from settling import hexagon_arrays as hxa
+from settling import hexagon_utils as hx
+
+
+class Test_neighbors(unittest.TestCase):
+    def test_matches_scalar(self):
+        """Each row should match the scalar neighbors, in order.
+        """
+        hexagons = [hx.hexagon_from_ordinal(o) for o in range(50)]
+        result = hxa.neighbors(hexagons)
+        self.assertEqual(result.shape, (50, 6, 3))
+        for hexagon, row in zip(hexagons, result):
+            self.assertEqual([tuple(n) for n in row], hx.neighbors(hexagon))
+
+    def test_bad_shape_raises(self):
+        with self.assertRaises(ValueError):
+            hxa.neighbors([0, 0, 0])
+
+
+class Test_ordinal_conversions(unittest.TestCase):
+    def setUp(self):
+        self.ordinals = np.arange(2000)
+
+    def test_hexagons_from_ordinals(self):
+        result = hxa.hexagons_from_ordinals(self.ordinals)
+        expected = [hx.hexagon_from_ordinal(o) for o in self.ordinals]
+        self.assertEqual([tuple(h) for h in result], expected)
+
+    def test_rsos_from_ordinals(self):
+        result = hxa.rsos_from_ordinals(self.ordinals)
+        expected = [hx.rso_from_ordinal(o) for o in self.ordinals]
+        self.assertEqual([tuple(r) for r in result], expected)
+
+    def test_ordinals_from_hexagons(self):
+        hexagons = [hx.hexagon_from_ordinal(o) for o in self.ordinals]
+        result = hxa.ordinals_from_hexagons(hexagons)
+        self.assertEqual(list(result), list(self.ordinals))
+
+    def test_ordinals_from_rsos(self):
+        rsos = [hx.rso_from_ordinal(o) for o in self.ordinals]
+        result = hxa.ordinals_from_rsos(rsos)
+        self.assertEqual(list(result), list(self.ordinals))
+
+    def test_negative_ordinal_raises(self):
+        with self.assertRaises(ValueError):
+            hxa.hexagons_from_ordinals([3, -1])
+
+
+class Test_rso_conversions(unittest.TestCase):
+    def setUp(self):
+        self.rsos = [hx.rso_from_ordinal(o) for o in range(2000)]
+
+    def test_hexagons_from_rsos(self):
+        result = hxa.hexagons_from_rsos(self.rsos)
+        expected = [hx.hexagon_from_rso(r) for r in self.rsos]
+        self.assertEqual([tuple(h) for h in result], expected)
+
+    def test_rsos_from_hexagons(self):
+        hexagons = [hx.hexagon_from_rso(r) for r in self.rsos]
+        result = hxa.rsos_from_hexagons(hexagons)
+        self.assertEqual([tuple(r) for r in result], self.rsos)
+
+    def test_invalid_rso_raises(self):
+        with self.assertRaises(ValueError):
+            hxa.hexagons_from_rsos([(2, 0, 2)])
+
+    def test_invalid_hexagon_raises(self):
+        with self.assertRaises(ValueError):
+            hxa.rsos_from_hexagons([(1, 1, 1)])
+
+
+class Test_large_ordinals(unittest.TestCase):
+    def test_round_trip(self):
+        """Large ordinals, where float square roots are inexact, still
+        round trip and agree with the scalar functions.
+        """
+        ordinals = np.array([10 ** 15 + i for i in range(-50, 50)]
+                            + [10 ** 16 + 123, 99999999999999999])
+        hexagons = hxa.hexagons_from_ordinals(ordinals)
+        self.assertEqual(list(hxa.ordinals_from_hexagons(hexagons)),
+                         list(ordinals))
+        self.assertEqual(tuple(hexagons[-1]),
+                         hx.hexagon_from_ordinal(int(ordinals[-1])))
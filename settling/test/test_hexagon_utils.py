@@ -139,7 +139,7 @@ class Test_rso_from_ordinal(unittest.TestCase):
 
 
 class Test__find_ring(unittest.TestCase):
-    """Test the recursive traversal of the triangular numbers.
+    """Test the inversion of the triangular numbers.
     """
     def test_ring_zero(self):
         """Ordinal 0 -> ring 0.
@@ -212,3 +212,79 @@ class Test__tiles_in_ring(unittest.TestCase):
     def test_ring_five(self):
         tiles = hx._tiles_in_ring(5)
         self.assertEqual(tiles, 30)
+
+
+class Test_closed_form_matches_reference(unittest.TestCase):
+    """The closed form conversions should agree with the original search
+    based reference implementations.
+    """
+    def test_hexagon_from_ordinal(self):
+        for ordinal in range(400):
+            self.assertEqual(hx.hexagon_from_ordinal(ordinal),
+                             hx._reference_hexagon_from_ordinal(ordinal))
+
+    def test_rso_from_ordinal(self):
+        for ordinal in range(400):
+            self.assertEqual(hx.rso_from_ordinal(ordinal),
+                             hx._reference_rso_from_ordinal(ordinal))
+
+    def test_ordinal_from_hexagon(self):
+        for ordinal in range(0, 400, 7):
+            hexagon = hx._reference_hexagon_from_ordinal(ordinal)
+            self.assertEqual(hx.ordinal_from_hexagon(hexagon),
+                             hx._reference_ordinal_from_hexagon(hexagon))
+
+    def test_rso_from_hexagon(self):
+        for ordinal in range(0, 400, 7):
+            hexagon = hx._reference_hexagon_from_ordinal(ordinal)
+            self.assertEqual(hx.rso_from_hexagon(hexagon),
+                             hx._reference_rso_from_hexagon(hexagon))
+
+    def test_hexagon_and_ordinal_from_rso(self):
+        for ordinal in range(0, 400, 7):
+            rso = hx._reference_rso_from_ordinal(ordinal)
+            self.assertEqual(hx.hexagon_from_rso(rso),
+                             hx._reference_hexagon_from_rso(rso))
+            self.assertEqual(hx.ordinal_from_rso(rso),
+                             hx._reference_ordinal_from_rso(rso))
+
+    def test_ring_boundaries(self):
+        """First and last ordinals of each ring agree with the recursion.
+        """
+        for ring in range(1, 60):
+            first = 1 + 3 * ring * (ring - 1)
+            last = 3 * ring * (ring + 1)
+            self.assertEqual(hx._find_ring(first),
+                             hx._reference_find_ring(first))
+            self.assertEqual(hx._find_ring(last),
+                             hx._reference_find_ring(last))
+
+
+class Test_large_coordinates(unittest.TestCase):
+    def test_round_trip_past_search_limit(self):
+        """Ordinals far past the old 1000 tile search limit round trip.
+        """
+        for ordinal in (1000, 123456, 10 ** 12 + 7, 10 ** 30 + 3):
+            hexagon = hx.hexagon_from_ordinal(ordinal)
+            self.assertEqual(hx.ordinal_from_hexagon(hexagon), ordinal)
+
+    def test_every_hexagon_in_ring(self):
+        """Every coordinate of a large ring maps to a distinct ordinal.
+        """
+        ring = 250
+        first = 1 + 3 * ring * (ring - 1)
+        ordinals = range(first, first + 6 * ring)
+        hexagons = [hx.hexagon_from_ordinal(o) for o in ordinals]
+        self.assertEqual(len(set(hexagons)), 6 * ring)
+        self.assertEqual([hx.ordinal_from_hexagon(h) for h in hexagons],
+                         list(ordinals))
+
+    def test_invalid_rso_raises(self):
+        with self.assertRaises(ValueError):
+            hx.ordinal_from_rso((2, 0, 2))
+        with self.assertRaises(ValueError):
+            hx.hexagon_from_rso((1, 6, 0))
+
+    def test_invalid_hexagon_raises(self):
+        with self.assertRaises(ValueError):
+            hx.ordinal_from_hexagon((1, 1, 1))
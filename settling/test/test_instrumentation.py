@@ -0,0 +1,156 @@
+import asyncio
+import json
+import pickle
+import random
+import unittest
+
+from settling import simulation
+from settling.board import Board, BoardView, random_standard_board
+from settling.game import Game
+from settling.game_server import AsyncGame
+from settling.instrumentation import Histogram, Instrumentation, TimedProxy
+from settling.player import RandomPlayer
+
+
+class Test_Histogram(unittest.TestCase):
+    def test_summary(self):
+        histogram = Histogram()
+        for seconds in [1e-6] * 9 + [1e-3]:
+            histogram.add(seconds)
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 10)
+        self.assertAlmostEqual(summary['total'], 1.009e-3)
+        self.assertEqual(summary['max'], 1e-3)
+        # 1us falls in the bucket up to 1024ns.
+        self.assertEqual(summary['p50'], 1.024e-6)
+        self.assertEqual(summary['p90'], 1.024e-6)
+        self.assertEqual(summary['p99'], 1e-3)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().summary()['p99'], 0.0)
+
+
+class Test_Instrumentation(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.instrumentation = Instrumentation(clock=lambda: self.now)
+
+    def tick(self, seconds):
+        self.now += seconds
+
+    def test_timed(self):
+        timed = self.instrumentation.timed(self.tick, 'phase', 'player1')
+        timed(2.0)
+        timed(3.0)
+        phase = self.instrumentation.snapshot()['phases']['phase']
+        self.assertEqual(phase['count'], 2)
+        self.assertEqual(phase['total'], 5.0)
+        self.assertEqual(phase['players']['player1']['max'], 3.0)
+
+    def test_timed_records_exceptions(self):
+        def fail():
+            self.tick(1.0)
+            raise ValueError()
+        timed = self.instrumentation.timed(fail, 'phase')
+        with self.assertRaises(ValueError):
+            timed()
+        phases = self.instrumentation.snapshot()['phases']
+        self.assertEqual(phases['phase']['total'], 1.0)
+        self.assertEqual(phases['phase']['players'], {})
+
+    def test_count(self):
+        self.instrumentation.count('built', 'player1')
+        self.instrumentation.count('built', 'player2', 2)
+        self.instrumentation.count('built')
+        self.assertEqual(self.instrumentation.snapshot()['counters'], {
+            'built': {'total': 4, 'players': {'player1': 1, 'player2': 2}},
+        })
+
+    def test_reset(self):
+        self.instrumentation.count('built')
+        self.instrumentation.reset()
+        self.assertEqual(self.instrumentation.snapshot(),
+                         {'phases': {}, 'counters': {}})
+
+
+class Test_TimedProxy(unittest.TestCase):
+    def test_passes_through(self):
+        instrumentation = Instrumentation()
+        board = random_standard_board()
+        proxy = TimedProxy(board, instrumentation, ['victory_points'],
+                           'board.')
+        self.assertEqual(proxy.victory_points(), {})
+        self.assertEqual(proxy.tile, board.tile)
+        proxy.anything = 1
+        self.assertEqual(board.anything, 1)
+        self.assertIn('board.victory_points',
+                      instrumentation.snapshot()['phases'])
+
+
+class Test_instrumented_game(unittest.TestCase):
+    def test_same_game(self):
+        """Instrumentation only watches; the game plays out the same.
+        """
+        instrumentation = Instrumentation()
+        instrumented = simulation.play_game(
+            3, max_turns=200, instrumentation=instrumentation)
+        plain = simulation.play_game(3, max_turns=200)
+        self.assertEqual(instrumented[:3], plain[:3])
+
+    def test_phases_and_players(self):
+        instrumentation = Instrumentation()
+        result = simulation.play_game(
+            3, players=3, max_turns=50, instrumentation=instrumentation)
+        snapshot = json.loads(instrumentation.to_json())
+        phases = snapshot['phases']
+        for phase in ['setup', 'turn', 'roll', 'copy', 'apply_action',
+                      'decide.act', 'decide.starting_town',
+                      'board.add_town', 'board.victory_points']:
+            self.assertIn(phase, phases)
+        self.assertEqual(phases['setup']['count'], 1)
+        self.assertEqual(phases['turn']['count'], result.turns)
+        self.assertEqual(sorted(phases['turn']['players']),
+                         ['player1', 'player2', 'player3'])
+        self.assertEqual(phases['decide.starting_town']['count'], 6)
+        self.assertEqual(snapshot['counters']['action.StartTurn']['total'],
+                         result.turns)
+
+    def test_views_reach_the_board(self):
+        """Players are handed views of the instrumented board.
+        """
+        instrumentation = Instrumentation()
+        game = Game(random_standard_board(), [], None,
+                    instrumentation=instrumentation)
+        view = game._player_board()
+        self.assertIsInstance(view, BoardView)
+        self.assertEqual(view.victory_points(), {})
+        self.assertEqual(view.fork().victory_points(), {})
+        phases = instrumentation.snapshot()['phases']
+        self.assertEqual(phases['board.victory_points']['count'], 1)
+        self.assertEqual(phases['board.snapshot']['count'], 1)
+
+    def test_board_is_not_replaced(self):
+        """The game keeps its board, which only gains timed methods.
+        """
+        board = random_standard_board()
+        game = Game(board, [], None, instrumentation=Instrumentation())
+        self.assertIs(game.board, board)
+        self.assertIsInstance(board, Board)
+        self.assertIs(BoardView(board).fork().__class__, Board)
+        self.assertIs(pickle.loads(pickle.dumps(board)).__class__, Board)
+
+    def test_async_game(self):
+        instrumentation = Instrumentation()
+        rng = random.Random(5)
+        players = [RandomPlayer('player{0}'.format(i), random.Random(i))
+                   for i in range(3)]
+        game = AsyncGame(random_standard_board(rng), players,
+                         lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                         max_turns=30, instrumentation=instrumentation)
+        asyncio.run(game.game_loop())
+        phases = instrumentation.snapshot()['phases']
+        self.assertEqual(phases['setup']['count'], 1)
+        self.assertEqual(phases['turn']['count'], game.turns)
+        self.assertEqual(phases['decide.starting_town']['count'], 6)
+        self.assertGreater(phases['setup']['total'],
+                           phases['decide.starting_town']['total'])
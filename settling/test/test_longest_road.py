@@ -0,0 +1,136 @@
+import random
+import unittest
+
+from settling import board
+from settling import game_constants
+from settling.board_geometry import StandardBoard
+
+
+def new_board():
+    return board.Board(game_constants.STANDARD_TILE_ORDER,
+                       game_constants.STANDARD_NUMBER_ORDER,
+                       game_constants.STANDARD_PORT_MAP,
+                       StandardBoard())
+
+
+def brute_force_length(b, player):
+    """Try every trail through the player's roads from every vertex.
+    """
+    topology = b._topology
+    roads = [e for e, owner in b._edges.items() if owner == player]
+
+    def blocked(vertex_id):
+        return b._vertex_owner(vertex_id) not in (None, player)
+
+    def walk(vertex_id, used):
+        best = 0
+        for edge_id in roads:
+            ends = topology.edge_vertices[edge_id]
+            if edge_id in used or vertex_id not in ends:
+                continue
+            other = ends[1] if ends[0] == vertex_id else ends[0]
+            length = 1
+            if not blocked(other):
+                length += walk(other, used | {edge_id})
+            best = max(best, length)
+        return best
+
+    starts = {v for e in roads for v in topology.edge_vertices[e]}
+    return max([walk(v, frozenset()) for v in starts], default=0)
+
+
+class Test_Board_longest_road(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+
+    def test_no_roads(self):
+        self.assertEqual(self.board.longest_road('player1'), 0)
+        self.assertIsNone(self.board.longest_road_holder())
+
+    def test_chain(self):
+        for edge in range(4):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 4)
+        self.assertIsNone(self.board.longest_road_holder())
+        self.board.add_road((0, 0, 0), 4, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 5)
+        self.assertEqual(self.board.longest_road_holder(), 'player1')
+
+    def test_loop(self):
+        for edge in range(6):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 6)
+
+    def test_town_breaks_road(self):
+        """An opponent's town between edges 1 and 2 splits the chain.
+        """
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        self.board.add_town((0, 0, 0), 2, 'player2')
+        self.assertEqual(self.board.longest_road('player1'), 3)
+        self.assertIsNone(self.board.longest_road_holder())
+
+    def test_own_town_does_not_break(self):
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        self.board.add_town((0, 0, 0), 2, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 5)
+
+    def test_holder_keeps_title_on_tie(self):
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        for edge in range(5):
+            self.board.add_road((-2, 1, 1), edge, 'player2')
+        self.assertEqual(self.board.longest_road('player2'), 5)
+        self.assertEqual(self.board.longest_road_holder(), 'player1')
+        self.board.add_road((-2, 1, 1), 5, 'player2')
+        self.assertEqual(self.board.longest_road_holder(), 'player2')
+
+    def test_rebuilt_roads_are_measured(self):
+        """Roads loaded in bulk are measured when first asked about.
+        """
+        for edge in range(5):
+            self.board.add_road((0, 0, 0), edge, 'player1')
+        self.board.add_town((0, 0, 0), 2, 'player2')
+        self.board._rebuild_indexes()
+        snapshot = self.board.snapshot()
+        snapshot.add_road((0, 0, 0), 5, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 3)
+        self.assertEqual(snapshot.longest_road('player1'), 6)
+        self.assertIsNone(self.board.longest_road_holder())
+
+    def test_snapshot_is_independent(self):
+        snapshot = self.board.snapshot()
+        for edge in range(5):
+            snapshot.add_road((0, 0, 0), edge, 'player1')
+        self.assertEqual(self.board.longest_road('player1'), 0)
+        self.assertIsNone(self.board.longest_road_holder())
+
+
+class Test_longest_road_random_layouts(unittest.TestCase):
+    def test_matches_brute_force(self):
+        """Random road networks, broken up by random towns, measure the
+        same as an exhaustive search.
+        """
+        rng = random.Random(7)
+        for trial in range(40):
+            b = new_board()
+            topology = b._topology
+            land_edges = [e for e, tiles in enumerate(topology.edge_tiles)
+                          if any(b._tile_types[o] != board._WATER
+                                 for o in tiles)]
+            center = topology.edge_vertices[rng.choice(land_edges)][0]
+            nearby = sorted(land_edges, key=lambda e: min(
+                abs(v - center) for v in topology.edge_vertices[e]))[:30]
+            for edge_id in rng.sample(nearby, 14):
+                player = rng.choice(['player1', 'player1', 'player2'])
+                hexagon, edge = topology.edge_aliases[edge_id][0]
+                b.add_road(hexagon, edge, player)
+            for vertex_id in rng.sample(range(topology.vertex_count), 6):
+                hexagon, vertex = topology.vertex_aliases[vertex_id][0]
+                if b._placements.open_vertices[vertex_id]:
+                    b.add_town(hexagon, vertex, rng.choice(
+                        ['player1', 'player2', 'player3']))
+            for player in ('player1', 'player2'):
+                self.assertEqual(b.longest_road(player),
+                                 brute_force_length(b, player))
@@ -0,0 +1,118 @@
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from settling import board
+from settling import game
+from settling import game_constants
+from settling import mcts
+from settling import player_action
+from settling.board_geometry import StandardBoard
+from settling.hand import Hand
+from settling.player import RandomPlayer
+
+
+def new_board():
+    b = board.Board(game_constants.STANDARD_TILE_ORDER,
+                    game_constants.STANDARD_NUMBER_ORDER,
+                    game_constants.STANDARD_PORT_MAP,
+                    StandardBoard())
+    b.add_town((0, 0, 0), 0, 'player1')
+    b.add_town((0, -2, 2), 0, 'player2')
+    return b
+
+
+class Test_Node(unittest.TestCase):
+    def test_unvisited_first(self):
+        node = mcts.Node(['a', 'b', 'c'])
+        node.visits = [1, 0, 1]
+        node.total = 2
+        self.assertEqual(node.select(), 1)
+
+    def test_best_breaks_ties_by_value(self):
+        node = mcts.Node(['a', 'b'])
+        node.visits = [3, 3]
+        node.values = [1.0, 2.0]
+        self.assertEqual(node.best(), 1)
+
+
+class Test_candidate_actions(unittest.TestCase):
+    def test_end_turn_only(self):
+        actions = mcts.candidate_actions(new_board(), Hand(), 'player1')
+        self.assertEqual(len(actions), 1)
+        self.assertIsInstance(actions[0], player_action.EndTurn)
+
+    def test_builds_and_useful_trades(self):
+        hand = Hand(list(game_constants.ROAD_COST) + ['sheep'] * 4)
+        actions = mcts.candidate_actions(new_board(), hand, 'player1')
+        roads = [a for a in actions if isinstance(a, player_action.BuildRoad)]
+        trades = [a for a in actions
+                  if isinstance(a, player_action.BankTrade)]
+        self.assertEqual(len(roads), 3)
+        # Sheep can be traded for what a city or town still needs.
+        self.assertEqual(sorted(a.receive for a in trades),
+                         ['ore', 'wheat'])
+
+
+class Test_rollout(unittest.TestCase):
+    def test_value_in_range_and_reproducible(self):
+        b = new_board()
+        hands = {'player1': Hand(), 'player2': Hand()}
+        args = (['player1', 'player2'], 0, False, 7, 20, 'player1')
+        value = mcts.rollout(b.snapshot(), dict(hands), *args)
+        self.assertGreaterEqual(value, 0.0)
+        self.assertLessEqual(value, 1.0)
+        again = mcts.rollout(b.snapshot(), {'player1': Hand(),
+                                            'player2': Hand()}, *args)
+        self.assertEqual(value, again)
+
+
+class Test_MCTSPlayer(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+        self.player = mcts.MCTSPlayer('player1', budget=0.01,
+                                      rng=random.Random(0),
+                                      rollout_turns=10)
+
+    def test_act_returns_candidate(self):
+        hand = Hand(list(game_constants.ROAD_COST))
+        action = self.player.act(board.BoardView(self.board), hand)
+        self.assertIsInstance(action, (player_action.BuildRoad,
+                                       player_action.EndTurn))
+        self.assertGreater(self.player.rollouts, 0)
+        self.assertEqual(self.player.decisions, 1)
+
+    def test_board_untouched(self):
+        key = self.board.position_key()
+        hand = Hand(list(game_constants.TOWN_COST) * 2)
+        self.player.act(self.board, hand)
+        self.assertEqual(self.board.position_key(), key)
+        self.assertEqual(len(hand.cards), 8)
+
+    def test_tree_reused(self):
+        hand = Hand(list(game_constants.ROAD_COST))
+        self.player.act(self.board, hand)
+        root = self.player.table.get(mcts.position_key(self.board, hand))
+        visits = root.total
+        self.player.act(self.board, hand)
+        self.assertGreater(root.total, visits)
+
+    def test_executor(self):
+        with ThreadPoolExecutor(2) as executor:
+            player = mcts.MCTSPlayer('player1', budget=0.01, workers=2,
+                                     executor=executor,
+                                     rng=random.Random(0), rollout_turns=10)
+            player.act(self.board, Hand(list(game_constants.ROAD_COST)))
+        self.assertEqual(player.rollouts % 2, 0)
+        self.assertGreater(player.stats()['rollouts_per_second'], 0)
+
+    def test_plays_a_game(self):
+        rng = random.Random(1)
+        players = [mcts.MCTSPlayer('player1', budget=0.002, rng=rng,
+                                   rollout_turns=10),
+                   RandomPlayer('player2', rng)]
+        g = game.Game(board.random_standard_board(rng), players,
+                      roll=lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                      max_turns=60)
+        g.game_loop()
+        self.assertGreater(players[0].decisions, 0)
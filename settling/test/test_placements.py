@@ -0,0 +1,240 @@
+import random
+import unittest
+
+from settling import board
+from settling import game_constants
+from settling.board_geometry import StandardBoard
+from settling.exceptions import GameRuleViolation, ReadOnlyBoardError
+
+
+def new_board():
+    return board.Board(game_constants.STANDARD_TILE_ORDER,
+                       game_constants.STANDARD_NUMBER_ORDER,
+                       game_constants.STANDARD_PORT_MAP,
+                       StandardBoard())
+
+
+def succeeds(b, method, *args):
+    """Return True if the placement is accepted on a snapshot of b.
+    """
+    try:
+        getattr(b.snapshot(), method)(*args)
+    except GameRuleViolation:
+        return False
+    return True
+
+
+def brute_force_towns(b, player, setup):
+    topology = b._topology
+    sites = []
+    for vertex_id, aliases in enumerate(topology.vertex_aliases):
+        reached = any(b.has_road(h, e, player) for h, e in
+                      (topology.edge_aliases[edge_id][0] for edge_id in
+                       topology.vertex_edges[vertex_id]))
+        if (setup or reached) and succeeds(b, 'add_town', aliases[0][0],
+                                           aliases[0][1], player):
+            sites.append(aliases[0])
+    return sites
+
+
+def brute_force_roads(b, player):
+    topology = b._topology
+    roads = []
+    for edge_id, aliases in enumerate(topology.edge_aliases):
+        connected = False
+        for vertex_id in topology.edge_vertices[edge_id]:
+            owner = b._vertex_owner(vertex_id)
+            if owner == player:
+                connected = True
+            elif owner is None:
+                connected |= any(b._edge_state[e] and
+                                 b._player_names[b._edge_state[e]] == player
+                                 for e in topology.vertex_edges[vertex_id])
+        if connected and succeeds(b, 'add_road', aliases[0][0],
+                                  aliases[0][1], player):
+            roads.append(aliases[0])
+    return roads
+
+
+class Test_Board_distance_rule(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+        self.board.add_town((0, 0, 0), 0, 'player1')
+
+    def test_neighbor_rejected(self):
+        """Vertex 1 of the center shares an edge with vertex 0.
+        """
+        with self.assertRaises(GameRuleViolation):
+            self.board.add_town((0, 0, 0), 1, 'player2')
+
+    def test_neighbor_alias_rejected(self):
+        with self.assertRaises(GameRuleViolation):
+            self.board.add_town((1, 0, -1), 3, 'player1')
+
+    def test_two_away_allowed(self):
+        self.board.add_town((0, 0, 0), 2, 'player2')
+        self.assertTrue(self.board.has_town((0, 0, 0), 2, 'player2'))
+
+
+class Test_Board_legal_town_sites(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+
+    def test_setup_on_empty_board(self):
+        """Every vertex touching land is open, and canonically named.
+        """
+        sites = self.board.legal_town_sites('player1', setup=True)
+        self.assertEqual(len(sites), 54)
+        topology = self.board._topology
+        for hexagon, vertex in sites:
+            vertex_id = topology.vertex_id(hexagon, vertex)
+            self.assertEqual(topology.vertex_aliases[vertex_id][0],
+                             (hexagon, vertex))
+
+    def test_setup_excludes_distance_rule(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        sites = self.board.legal_town_sites('player2', setup=True)
+        self.assertEqual(len(sites), 50)
+        self.assertNotIn(((0, 0, 0), 1), sites)
+
+    def test_needs_road_outside_setup(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.legal_town_sites('player1'), [])
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        self.board.add_road((0, 0, 0), 1, 'player1')
+        self.assertEqual(self.board.legal_town_sites('player1'),
+                         [((0, 0, 0), 2)])
+        self.assertEqual(self.board.legal_town_sites('player2'), [])
+
+
+class Test_Board_legal_roads(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+        self.board.add_town((0, 0, 0), 0, 'player1')
+
+    def test_from_town(self):
+        roads = self.board.legal_roads('player1')
+        self.assertEqual(len(roads), 3)
+        self.assertIn(((0, 0, 0), 0), roads)
+        self.assertIn(((0, 0, 0), 5), roads)
+        self.assertEqual(self.board.legal_roads('player2'), [])
+
+    def test_from_vertex(self):
+        self.board.add_town((0, 0, 0), 3, 'player1')
+        roads = self.board.legal_roads('player1', ((1, -1, 0), 2))
+        self.assertEqual(len(roads), 3)
+        self.assertNotIn(((0, 0, 0), 3), roads)
+        self.assertEqual(self.board.legal_roads('player2', ((0, 0, 0), 0)),
+                         [])
+
+    def test_blocked_by_opponent_town(self):
+        """Roads cannot be continued through another player's town.
+        """
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        self.board.add_town((0, 0, 0), 2, 'player2')
+        self.board.add_road((0, 0, 0), 1, 'player1')
+        roads = self.board.legal_roads('player1')
+        self.assertNotIn(((0, 0, 0), 2), roads)
+        self.assertIn(((0, 0, 0), 5), roads)
+
+    def test_land_only(self):
+        """Roads along the outer coast stay on the board, but never
+        run between two water tiles.
+        """
+        b = new_board()
+        b.add_town((0, 3, -3), 4, 'player1')
+        roads = b.legal_roads('player1')
+        self.assertEqual(len(roads), 2)
+        for hexagon, edge in roads:
+            b.snapshot().add_road(hexagon, edge, 'player1')
+
+
+class Test_Board_legal_city_upgrades(unittest.TestCase):
+    def test_towns_only(self):
+        b = new_board()
+        b.add_town((0, 0, 0), 0, 'player1')
+        b.add_town((0, 0, 0), 3, 'player1')
+        b.add_town((2, 0, -2), 0, 'player2')
+        b.upgrade_town((0, 0, 0), 3, 'player1')
+        self.assertEqual(b.legal_city_upgrades('player1'), [((0, 0, 0), 0)])
+        self.assertEqual(b.legal_city_upgrades('player3'), [])
+
+
+class Test_Board_placements_copy_on_write(unittest.TestCase):
+    def test_snapshot_is_independent(self):
+        b = new_board()
+        snapshot = b.snapshot()
+        snapshot.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(len(b.legal_town_sites('player1', setup=True)), 54)
+        self.assertEqual(b.legal_city_upgrades('player1'), [])
+
+    def test_view_reads_but_cannot_write(self):
+        b = new_board()
+        view = board.BoardView(b)
+        self.assertEqual(view.legal_town_sites('player1', setup=True),
+                         b.legal_town_sites('player1', setup=True))
+        with self.assertRaises(ReadOnlyBoardError):
+            view.add_town((0, 0, 0), 0, 'player1')
+
+    def test_rebuilt_on_load(self):
+        b = new_board()
+        b.add_town((0, 0, 0), 0, 'player1')
+        b.add_road((0, 0, 0), 0, 'player1')
+        b.upgrade_town((0, 0, 0), 0, 'player1')
+        rebuilt = b.snapshot()
+        rebuilt._rebuild_indexes()
+        self.assertEqual(rebuilt._placements.open_vertices,
+                         b._placements.open_vertices)
+        self.assertEqual(rebuilt.legal_city_upgrades('player1'), [])
+
+
+class Test_Board_legal_moves_random(unittest.TestCase):
+    def test_matches_trial_and_error(self):
+        """Legal moves match trying every placement on random games.
+        """
+        rng = random.Random(12)
+        players = ['player1', 'player2', 'player3']
+        for trial in range(10):
+            b = new_board()
+            for player in players + players[::-1]:
+                hexagon, vertex = rng.choice(
+                    b.legal_town_sites(player, setup=True))
+                b.add_town(hexagon, vertex, player)
+                b.add_road(*rng.choice(
+                    b.legal_roads(player, (hexagon, vertex))) + (player,))
+            for turn in range(30):
+                player = players[turn % 3]
+                moves = b.legal_roads(player)
+                towns = b.legal_town_sites(player)
+                if towns and rng.random() < 0.3:
+                    b.add_town(*rng.choice(towns) + (player,))
+                elif moves:
+                    b.add_road(*rng.choice(moves) + (player,))
+            for player in players:
+                self.assertEqual(b.legal_town_sites(player),
+                                 brute_force_towns(b, player, False))
+                self.assertEqual(b.legal_town_sites(player, setup=True),
+                                 brute_force_towns(b, player, True))
+                self.assertEqual(b.legal_roads(player),
+                                 brute_force_roads(b, player))
+
+
+class Test_Board_can_build(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.add_road((0, 0, 0), 0, 'player1')
+        self.board.add_road((0, 0, 0), 1, 'player1')
+
+    def test_can_build_road(self):
+        self.assertTrue(self.board.can_build_road((0, 0, 0), 2, 'player1'))
+        self.assertFalse(self.board.can_build_road((0, 0, 0), 1, 'player1'))
+        self.assertFalse(self.board.can_build_road((0, 0, 0), 3, 'player1'))
+        self.assertFalse(self.board.can_build_road((0, 0, 0), 2, 'player2'))
+
+    def test_can_build_town(self):
+        self.assertTrue(self.board.can_build_town((0, 0, 0), 2, 'player1'))
+        self.assertFalse(self.board.can_build_town((0, 0, 0), 1, 'player1'))
+        self.assertFalse(self.board.can_build_town((0, 0, 0), 2, 'player2'))
+        self.assertTrue(self.board.can_build_town((0, 0, 0), 2, 'player2',
+                                                  setup=True))
@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from settling import board
+from settling import game_constants
+from settling import player_action
+from settling.board_geometry import StandardBoard
+from settling.hand import Hand
+from settling.player import RandomPlayer
+
+
+class Test_RandomPlayer(unittest.TestCase):
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.player = RandomPlayer('player1', random.Random(0))
+
+    def test_starting_town_is_legal(self):
+        site = self.player.starting_town(self.board)
+        self.assertIn(site, self.board.legal_town_sites('player1',
+                                                        setup=True))
+
+    def test_prefers_city(self):
+        hand = Hand(list(game_constants.CITY_COST + game_constants.ROAD_COST))
+        action = self.player.act(self.board, hand)
+        self.assertIsInstance(action, player_action.UpgradeTown)
+        self.assertEqual((action.hexagon_coord, action.vertex),
+                         ((0, 0, 0), 0))
+
+    def test_builds_legal_road(self):
+        hand = Hand(list(game_constants.ROAD_COST))
+        action = self.player.act(self.board, hand)
+        self.assertIsInstance(action, player_action.BuildRoad)
+        self.assertTrue(self.board.can_build_road(
+            action.hexagon_coord, action.edge, 'player1'))
+
+    def test_trades_for_missing_card(self):
+        hand = Hand(['sheep'] * 4 + ['brick'])
+        action = self.player.act(self.board, hand)
+        self.assertIsInstance(action, player_action.BankTrade)
+        self.assertEqual(action.give, 'sheep')
+        self.assertEqual(action.receive, 'wood')
+
+    def test_ends_turn(self):
+        action = self.player.act(self.board, Hand(['sheep']))
+        self.assertIsInstance(action, player_action.EndTurn)
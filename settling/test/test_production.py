@@ -0,0 +1,107 @@
+import unittest
+from copy import copy
+
+from settling import board
+from settling import game_constants
+from settling.board_geometry import StandardBoard
+from settling.production import ProductionIndex
+
+
+class Test_ProductionIndex(unittest.TestCase):
+    """Resource code 4 is ore.
+    """
+    names = [None, 'player1', 'player2']
+
+    def test_add_and_entries(self):
+        index = ProductionIndex()
+        index.add(8, 1, 4, 1)
+        index.add(8, 1, 4, 2)
+        self.assertEqual(index.entries(8, self.names),
+                         [('player1', 'ore', 3)])
+        self.assertEqual(index.entries(6, self.names), [])
+
+    def test_zero_entries_dropped(self):
+        index = ProductionIndex()
+        index.add(8, 1, 4, 1)
+        index.add(8, 1, 4, -1)
+        self.assertEqual(index.entries(8, self.names), [])
+
+    def test_players_by_slot(self):
+        index = ProductionIndex()
+        index.add(12, 2, 0, 2)
+        index.add(12, 1, 4, 1)
+        self.assertEqual(index.entries(12, self.names),
+                         [('player1', 'ore', 1), ('player2', 'brick', 2)])
+
+    def test_unallocated_slots_are_equal(self):
+        index = ProductionIndex()
+        index.add(8, 1, 4, 1)
+        other = copy(index)
+        other.add(8, 2, 4, 1)
+        other.add(8, 2, 4, -1)
+        self.assertEqual(index, other)
+        other.add(8, 1, 4, 1)
+        self.assertNotEqual(index, other)
+
+    def test_copy_is_independent(self):
+        index = ProductionIndex()
+        index.add(8, 1, 4, 1)
+        other = copy(index)
+        other.add(8, 1, 4, 1)
+        self.assertEqual(index.entries(8, self.names),
+                         [('player1', 'ore', 1)])
+
+
+class Test_Board_production(unittest.TestCase):
+    """The center's vertex 0 touches wheat 9, wood 10 and brick 3.
+    """
+    def setUp(self):
+        self.board = board.Board(game_constants.STANDARD_TILE_ORDER,
+                                 game_constants.STANDARD_NUMBER_ORDER,
+                                 game_constants.STANDARD_PORT_MAP,
+                                 StandardBoard())
+
+    def test_town_produces(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.production(9),
+                         [('player1', 'wheat', 1)])
+        self.assertEqual(self.board.production(10),
+                         [('player1', 'wood', 1)])
+        self.assertEqual(self.board.production(3),
+                         [('player1', 'brick', 1)])
+
+    def test_city_produces_double(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.upgrade_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.production(9),
+                         [('player1', 'wheat', 2)])
+
+    def test_robber_blocks_and_unblocks(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.upgrade_town((0, 0, 0), 0, 'player1')
+        self.board.move_robber((0, 0, 0))
+        self.assertEqual(self.board.production(9), [])
+        self.board.move_robber((1, 0, -1))
+        self.assertEqual(self.board.production(9),
+                         [('player1', 'wheat', 2)])
+        self.assertEqual(self.board.production(10), [])
+
+    def test_town_next_to_robber(self):
+        self.board.move_robber((0, 0, 0))
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.production(9), [])
+
+    def test_matches_rebuild(self):
+        self.board.add_town((0, 0, 0), 0, 'player1')
+        self.board.add_town((0, 0, 0), 3, 'player2')
+        self.board.move_robber((0, 0, 0))
+        self.board.upgrade_town((0, 0, 0), 3, 'player2')
+        self.board.move_robber((-1, 0, 1))
+        incremental = copy(self.board._production)
+        self.board._rebuild_indexes()
+        self.assertEqual(incremental, self.board._production)
+
+    def test_snapshot_is_independent(self):
+        snapshot = self.board.snapshot()
+        snapshot.add_town((0, 0, 0), 0, 'player1')
+        self.assertEqual(self.board.production(9), [])
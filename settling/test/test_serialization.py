@@ -0,0 +1,195 @@
+import mmap
+import pickle
+import random
+import struct
+import tempfile
+import unittest
+
+from settling import serialization
+from settling.board import random_hexagonal_board, random_standard_board
+from settling.game import Game
+from settling.hand import Hand
+from settling.player import RandomPlayer
+
+
+def played_game(seed, turns=60):
+    rng = random.Random(seed)
+    players = [RandomPlayer('player{0}'.format(i), random.Random(i))
+               for i in range(3)]
+    game = Game(random_standard_board(rng), players,
+                lambda: rng.randint(1, 6) + rng.randint(1, 6),
+                max_turns=turns)
+    game.game_loop()
+    game.board.move_robber(game.board.robber_candidates()[4])
+    return game
+
+
+class Test_board_records(unittest.TestCase):
+    def setUp(self):
+        self.board = played_game(1).board
+
+    def assertSameBoard(self, decoded, board):
+        self.assertEqual(decoded.position_key(), board.position_key())
+        self.assertEqual(decoded.robber_position(), board.robber_position())
+        self.assertEqual(decoded.victory_points(), board.victory_points())
+        for number in range(2, 13):
+            self.assertEqual(sorted(decoded.production(number)),
+                             sorted(board.production(number)))
+        for player in board.victory_points():
+            self.assertEqual(decoded.pieces(player), board.pieces(player))
+            self.assertEqual(decoded.longest_road(player),
+                             board.longest_road(player))
+            self.assertEqual(decoded.legal_roads(player),
+                             board.legal_roads(player))
+            self.assertEqual(decoded.legal_town_sites(player),
+                             board.legal_town_sites(player))
+        for hexagon in board.robber_candidates():
+            self.assertEqual(decoded.tile(hexagon), board.tile(hexagon))
+        self.assertEqual(decoded.port((2, 0, -2), 0),
+                         board.port((2, 0, -2), 0))
+
+    def test_round_trip(self):
+        record = serialization.encode_board(self.board)
+        self.assertSameBoard(serialization.decode_board(record), self.board)
+
+    def test_empty_board(self):
+        board = random_standard_board(random.Random(2))
+        record = serialization.encode_board(board)
+        self.assertSameBoard(serialization.decode_board(record), board)
+
+    def test_memoryview_at_offset(self):
+        record = serialization.encode_board(self.board)
+        buffer = memoryview(b'xyz' + record + b'tail')
+        board, end = serialization.read_board(buffer, 3)
+        self.assertSameBoard(board, self.board)
+        self.assertEqual(end, 3 + len(record))
+
+    def test_decoded_boards_are_independent(self):
+        """Boards decoded from one layout share nothing they can modify.
+        """
+        record = serialization.encode_board(self.board)
+        first = serialization.decode_board(record)
+        second = serialization.decode_board(record)
+        player = 'player0'
+        road = first.legal_roads(player)[0]
+        first.add_road(road[0], road[1], player)
+        self.assertSameBoard(second, self.board)
+        self.assertNotEqual(first.position_key(), self.board.position_key())
+
+    def test_tied_longest_road_keeps_holder(self):
+        """The title stays with whoever reached a tied length first,
+        which the roads alone cannot show.
+        """
+        board = random_standard_board(random.Random(4))
+        for edge in range(5):
+            board.add_road((0, 0, 0), edge, 'player2')
+        for edge in range(5):
+            board.add_road((-2, 1, 1), edge, 'player1')
+        decoded = serialization.decode_board(
+            serialization.encode_board(board))
+        self.assertEqual(decoded.longest_road_holder(), 'player2')
+        self.assertEqual(decoded.longest_road('player1'), 5)
+        decoded.add_road((-2, 1, 1), 5, 'player1')
+        self.assertEqual(decoded.longest_road_holder(), 'player1')
+
+    def test_large_board(self):
+        board = random_hexagonal_board(8, random.Random(5))
+        board.add_town((5, -1, -4), 0, 'player1')
+        board.add_road((5, -1, -4), 0, 'player1')
+        board.move_robber((-6, 2, 4))
+        decoded = serialization.decode_board(
+            serialization.encode_board(board))
+        self.assertEqual(decoded._board_geometry.radius, 8)
+        self.assertSameBoard(decoded, board)
+
+    def test_smaller_than_pickle(self):
+        record = serialization.encode_board(self.board)
+        self.assertLess(len(record) * 4, len(pickle.dumps(self.board, -1)))
+
+    def test_bad_magic(self):
+        record = serialization.encode_board(self.board)
+        with self.assertRaises(ValueError):
+            serialization.decode_board(b'XXXX' + record[4:])
+
+    def test_bad_version(self):
+        record = bytearray(serialization.encode_board(self.board))
+        record[4] = serialization.VERSION + 1
+        with self.assertRaises(ValueError):
+            serialization.decode_board(record)
+
+    def test_truncated(self):
+        record = serialization.encode_board(self.board)
+        for end in [3, serialization.BOARD_HEADER.size, 100,
+                    len(record) - 1]:
+            with self.assertRaises(ValueError):
+                serialization.decode_board(record[:end])
+
+    def test_missing_player(self):
+        record = bytearray(serialization.encode_board(self.board))
+        fields = list(serialization.BOARD_HEADER.unpack_from(record))
+        fields[7] -= 1
+        serialization.BOARD_HEADER.pack_into(record, 0, *fields)
+        with self.assertRaises(ValueError):
+            serialization.decode_board(record)
+
+    def test_unknown_tile_or_port(self):
+        record = serialization.encode_board(self.board)
+        start = serialization.BOARD_HEADER.size
+        fields = serialization.BOARD_HEADER.unpack_from(record)
+        ports_start = start + fields[2] + 1 + fields[5]
+        for index in [start, ports_start, ports_start + 2]:
+            bad = bytearray(record)
+            bad[index] = 255
+            with self.assertRaises(ValueError):
+                serialization.decode_board(bad)
+
+
+class Test_position_records(unittest.TestCase):
+    def setUp(self):
+        self.game = played_game(3)
+
+    def test_round_trip(self):
+        game = self.game
+        record = serialization.encode_position(game.board, game.hands,
+                                               game.turns, 2)
+        position = serialization.decode_position(record)
+        self.assertEqual(position.board.position_key(),
+                         game.board.position_key())
+        self.assertEqual(position.turns, game.turns)
+        self.assertEqual(position.current, 2)
+        self.assertEqual(list(position.hands), list(game.hands))
+        for name, hand in game.hands.items():
+            self.assertEqual(sorted(position.hands[name].cards),
+                             sorted(hand.cards))
+
+    def test_iter_positions_from_mmap(self):
+        records = []
+        for seed in range(4):
+            game = played_game(seed, turns=10 * seed)
+            records.append((game, serialization.encode_position(
+                game.board, game.hands, game.turns)))
+        with tempfile.TemporaryFile() as f:
+            f.write(b''.join(record for _, record in records))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                positions = list(serialization.iter_positions(m))
+        self.assertEqual(len(positions), 4)
+        for (game, _), position in zip(records, positions):
+            self.assertEqual(position.board.position_key(),
+                             game.board.position_key())
+            self.assertEqual(position.turns, game.turns)
+
+    def test_action_cards_refused(self):
+        hands = {'player0': Hand(action_cards=['knight'])}
+        with self.assertRaises(ValueError):
+            serialization.encode_position(self.game.board, hands)
+
+    def test_board_record_is_not_a_position(self):
+        record = serialization.encode_board(self.game.board)
+        with self.assertRaises(ValueError):
+            serialization.decode_position(record)
+
+    def test_header_layout(self):
+        record = serialization.encode_position(self.game.board, {}, 7, 1)
+        self.assertEqual(struct.unpack_from('<4sBIBB', record),
+                         (b'STLP', serialization.VERSION, 7, 1, 0))
@@ -0,0 +1,49 @@
+import unittest
+
+from settling import simulation
+
+
+class Test_play_game(unittest.TestCase):
+    def test_reproducible(self):
+        """A game is determined by its seed.
+        """
+        first = simulation.play_game(5, players=3)
+        second = simulation.play_game(5, players=3)
+        self.assertEqual(first[:3], second[:3])
+        self.assertEqual(first.seed, 5)
+        self.assertIn(first.winner, ['player1', 'player2', 'player3'])
+
+    def test_max_turns(self):
+        result = simulation.play_game(5, max_turns=3)
+        self.assertIsNone(result.winner)
+        self.assertEqual(result.turns, 3)
+
+
+class Test_simulate(unittest.TestCase):
+    def test_in_process(self):
+        results = list(simulation.simulate(4, seed=10, processes=1))
+        self.assertEqual([r.seed for r in results], [10, 11, 12, 13])
+        self.assertEqual(results[1][:3], simulation.play_game(11)[:3])
+
+    def test_pool_matches_in_process(self):
+        """Games played by workers come back in any order, but are the
+        same games.
+        """
+        pooled = simulation.simulate(6, processes=2, chunksize=2,
+                                     max_turns=50)
+        inline = simulation.simulate(6, processes=1, max_turns=50)
+        self.assertEqual(sorted(r[:3] for r in pooled),
+                         sorted(r[:3] for r in inline))
+
+
+class Test_Summary(unittest.TestCase):
+    def test_totals(self):
+        summary = simulation.Summary()
+        summary.add(simulation.GameResult(0, 'player1', 100, 0.1))
+        summary.add(simulation.GameResult(1, None, 300, 0.2))
+        summary.add(simulation.GameResult(2, 'player1', 200, 0.1))
+        self.assertEqual(summary.games, 3)
+        self.assertEqual(summary.turns, 600)
+        self.assertEqual(summary.wins['player1'], 2)
+        self.assertEqual(summary.unfinished, 1)
+        self.assertIn('player1: 2 wins (66.7%)', summary.report())
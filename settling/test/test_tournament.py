@@ -0,0 +1,217 @@
+import itertools
+import json
+import os
+import random
+import tempfile
+import unittest
+from collections import Counter
+
+from settling import player_action
+from settling import tournament
+from settling.player import Player
+from settling.tournament import Bot, PairingResult, Ratings, Tournament
+
+
+class PassivePlayer(Player):
+    """A bot that places its starting towns and never builds.
+    """
+    def __init__(self, name, rng=random):
+        super().__init__(name)
+        self.rng = rng
+
+    def starting_town(self, board):
+        return self.rng.choice(board.legal_town_sites(self.name, setup=True))
+
+    def play_action_card(self, board, hand):
+        return None
+
+    def act(self, board, hand):
+        return player_action.EndTurn()
+
+
+RANDOM = Bot('random', 'settling.player:RandomPlayer', {})
+PASSIVE = Bot('passive', __name__ + ':PassivePlayer', {})
+TWIN = Bot('twin', 'settling.player:RandomPlayer', {})
+
+
+class Test_parse_bot(unittest.TestCase):
+    def test_options(self):
+        bot = tournament.parse_bot(
+            'mcts=settling.mcts:MCTSPlayer,budget=0.01,workers=2')
+        self.assertEqual(bot, Bot('mcts', 'settling.mcts:MCTSPlayer',
+                                  {'budget': 0.01, 'workers': 2}))
+
+    def test_bad_bot(self):
+        with self.assertRaises(ValueError):
+            tournament.parse_bot('settling.player.RandomPlayer')
+
+
+class Test_schedule(unittest.TestCase):
+    def test_round_robin(self):
+        pairings = list(tournament.schedule('abc', seats=2, rounds=2,
+                                            seed=7))
+        self.assertEqual(len(pairings), 12)
+        self.assertEqual([p.index for p in pairings], list(range(12)))
+        self.assertEqual([p.seed for p in pairings], [7] * 6 + [8] * 6)
+        first_round = Counter(p.seats for p in pairings[:6])
+        self.assertEqual(set(first_round),
+                         set(itertools.permutations('abc', 2)))
+        seats = Counter((name, seat) for p in pairings
+                        for seat, name in enumerate(p.seats))
+        self.assertEqual(set(seats.values()), {4})
+
+    def test_start(self):
+        pairings = list(tournament.schedule('abcd', seats=3, rounds=2))
+        self.assertEqual(list(tournament.schedule('abcd', seats=3,
+                                                  rounds=2, start=5)),
+                         pairings[5:])
+
+
+class Test_play_pairing(unittest.TestCase):
+    def test_reproducible(self):
+        bots = {'random': RANDOM, 'passive': PASSIVE}
+        pairing = tournament.Pairing(3, 0, 11, ('random', 'passive'))
+        first = tournament.play_pairing(pairing, bots, max_turns=200)
+        second = tournament.play_pairing(pairing, bots, max_turns=200)
+        self.assertEqual(first[:5], second[:5])
+        self.assertEqual(first.winner, 'random')
+
+
+class Test_Ratings(unittest.TestCase):
+    def test_win(self):
+        ratings = Ratings(['a', 'b', 'c'])
+        ratings.add(('a', 'b', 'c'), 'b')
+        self.assertGreater(ratings.rating['b'], tournament.INITIAL_RATING)
+        self.assertAlmostEqual(ratings.rating['a'], ratings.rating['c'])
+        self.assertLess(ratings.deviation['a'],
+                        tournament.INITIAL_DEVIATION)
+        self.assertEqual(ratings.wins, {'b': 1})
+        self.assertEqual(ratings.games, {'a': 1, 'b': 1, 'c': 1})
+
+    def test_separated(self):
+        ratings = Ratings(['a', 'b'])
+        for _ in range(5):
+            ratings.add(('a', 'b'), 'a')
+            ratings.add(('b', 'a'), None)
+        self.assertFalse(ratings.separated())
+        for _ in range(40):
+            ratings.add(('a', 'b'), 'a')
+        self.assertTrue(ratings.separated())
+        self.assertEqual([s.name for s in ratings.standings()], ['a', 'b'])
+
+    def test_end_period(self):
+        ratings = Ratings(['a', 'b'], drift=30.0)
+        ratings.add(('a', 'b'), 'a')
+        deviation = ratings.deviation['a']
+        ratings.end_period()
+        self.assertAlmostEqual(ratings.deviation['a'],
+                               (deviation ** 2 + 30.0 ** 2) ** 0.5)
+        self.assertLessEqual(ratings.deviation['b'],
+                             tournament.INITIAL_DEVIATION)
+        for _ in range(200):
+            ratings.end_period()
+        self.assertEqual(ratings.deviation['a'],
+                         tournament.INITIAL_DEVIATION)
+
+    def test_state(self):
+        ratings = Ratings(['a', 'b'])
+        ratings.add(('a', 'b'), 'a')
+        copy = Ratings(['a', 'b'])
+        copy.load_state(json.loads(json.dumps(ratings.state())))
+        self.assertEqual(copy.standings(), ratings.standings())
+
+
+def new_tournament(**kwargs):
+    kwargs.setdefault('processes', 1)
+    kwargs.setdefault('max_turns', 150)
+    return Tournament([RANDOM, PASSIVE], **kwargs)
+
+
+class Test_Tournament(unittest.TestCase):
+    def test_early_stop(self):
+        t = new_tournament(rounds=50, max_turns=500)
+        results = list(t.run())
+        self.assertTrue(t.settled)
+        self.assertLess(len(results), t.total)
+        self.assertEqual(len(results) % t.per_round, 0)
+        self.assertEqual(t.standings()[0].name, 'random')
+        self.assertIn('settled', t.report())
+
+    def test_equal_bots_do_not_settle(self):
+        """Bots that win half their games each are never told apart,
+        however many rounds are checked.
+        """
+        t = Tournament([RANDOM, TWIN], rounds=200, processes=1)
+        rng = random.Random(81)
+        results = [PairingResult(p.index, p.round, p.seats,
+                                 rng.choice(p.seats), 10, 0.001)
+                   for p in tournament.schedule(t.names, rounds=200)]
+        list(t._record(results))
+        self.assertFalse(t.settled)
+        self.assertEqual(t.played, t.total)
+
+    def test_holds_later_rounds(self):
+        """Results are only counted once every earlier round has been.
+        """
+        t = new_tournament(rounds=2, early_stop=False)
+        results = [PairingResult(p.index, p.round, p.seats, 'random', 10,
+                                 0.001)
+                   for p in tournament.schedule(t.names, rounds=2)]
+        self.assertEqual(list(t._record(results[3:])), [])
+        self.assertEqual(list(t._record(results[:1])), results[:1])
+        self.assertEqual(t.ratings.games, {'random': 1, 'passive': 1})
+        self.assertEqual(list(t._record(results[1:3])), results[1:])
+        self.assertEqual(t.played, 4)
+
+    def test_play_all(self):
+        t = new_tournament(rounds=3, early_stop=False)
+        results = list(t.run())
+        self.assertEqual(sorted(r.index for r in results), list(range(6)))
+        self.assertEqual(t.played, 6)
+
+    def test_pool_matches_in_process(self):
+        pooled = list(new_tournament(rounds=3, early_stop=False,
+                                     processes=2).run())
+        inline = list(new_tournament(rounds=3, early_stop=False).run())
+        self.assertEqual(sorted(r[:5] for r in pooled),
+                         sorted(r[:5] for r in inline))
+
+    def test_batches(self):
+        """Fast bots' games are batched once they have been timed.
+        """
+        t = new_tournament(rounds=10, batch_seconds=1.0, max_batch=4)
+        batches = t._batches()
+        self.assertEqual(len(next(batches)), 1)
+        list(t._record(tournament.play_batch(next(batches), t.bots, 150)))
+        self.assertEqual(len(next(batches)), 4)
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'tournament.json')
+            t = new_tournament(rounds=4, early_stop=False,
+                               checkpoint=checkpoint)
+            results = t.run()
+            first = [next(results) for _ in range(3)]
+            results.close()
+            resumed = new_tournament(rounds=4, early_stop=False,
+                                     checkpoint=checkpoint)
+            self.assertEqual(resumed.played, 3)
+            self.assertEqual(resumed.ratings.state(), t.ratings.state())
+            rest = list(resumed.run())
+            self.assertEqual(sorted(r.index for r in first + rest),
+                             list(range(8)))
+            self.assertEqual(resumed.ratings.games,
+                             {'random': 8, 'passive': 8})
+
+    def test_different_tournament(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'tournament.json')
+            list(new_tournament(rounds=1, checkpoint=checkpoint).run())
+            with self.assertRaises(ValueError):
+                new_tournament(rounds=1, seed=5, checkpoint=checkpoint)
+
+    def test_bad_bots(self):
+        with self.assertRaises(ValueError):
+            Tournament([RANDOM, RANDOM])
+        with self.assertRaises(ValueError):
+            Tournament([RANDOM, PASSIVE], seats=3)
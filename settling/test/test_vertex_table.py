@@ -0,0 +1,99 @@
+import pickle
+import random
+import unittest
+
+import numpy as np
+
+from settling import board
+from settling import game_constants
+from settling import vertex_table
+from settling.board_geometry import StandardBoard
+
+
+def new_board():
+    return board.Board(game_constants.STANDARD_TILE_ORDER,
+                       game_constants.STANDARD_NUMBER_ORDER,
+                       game_constants.STANDARD_PORT_MAP,
+                       StandardBoard())
+
+
+class Test_build(unittest.TestCase):
+    """The center's vertex 0 touches wheat 9, wood 10 and brick 3.
+    """
+    def setUp(self):
+        self.board = new_board()
+        self.table = self.board.vertex_table
+
+    def test_center_vertex(self):
+        row = self.table[self.board._topology.vertex_id((0, 0, 0), 0)]
+        self.assertEqual(row['pips'], 4 + 3 + 2)
+        self.assertEqual(row['production'].tolist(), [2, 3, 4, 0, 0])
+        self.assertEqual(row['resources'], 3)
+        self.assertEqual(sorted(row['numbers'].tolist()), [3, 9, 10])
+        self.assertEqual(row['port'], 0)
+
+    def test_port(self):
+        vertex_id = self.board._topology.vertex_id((2, 0, -2), 1)
+        self.assertEqual(self.table['port'][vertex_id],
+                         game_constants.PORT_TYPES.index('3:1 port') + 1)
+
+    def test_read_only(self):
+        with self.assertRaises(ValueError):
+            self.table['pips'][0] = 0
+
+    def test_matches_tiles(self):
+        """Every row agrees with walking the board's tiles.
+        """
+        b = board.random_standard_board(random.Random(4))
+        topology = b._topology
+        for vertex_id, aliases in enumerate(topology.vertex_aliases):
+            tiles = b.vertex_tiles(*aliases[0])
+            pips = sum(int(vertex_table.PIPS[t.number or 0]) for t in tiles)
+            self.assertEqual(b.vertex_table['pips'][vertex_id], pips)
+            resources = set(t.tile_type for t in tiles if t.number)
+            self.assertEqual(b.vertex_table['resources'][vertex_id],
+                             len(resources))
+
+    def test_rebuilt_on_unpickle(self):
+        loaded = pickle.loads(pickle.dumps(self.board))
+        self.assertTrue(np.array_equal(loaded.vertex_table, self.table))
+
+    def test_shared_by_layout(self):
+        self.assertIs(new_board().vertex_table, self.table)
+        other = board.random_standard_board(random.Random(4))
+        self.assertIsNot(other.vertex_table, self.table)
+
+
+class Test_Board_rank_openings(unittest.TestCase):
+    def setUp(self):
+        self.board = new_board()
+
+    def test_best_first(self):
+        ranked = self.board.rank_openings('player1')
+        self.assertEqual(set(ranked),
+                         set(self.board.legal_town_sites('player1',
+                                                         setup=True)))
+        topology = self.board._topology
+        ids = [topology.vertex_id(*site) for site in ranked]
+        scores = vertex_table.scores(self.board.vertex_table, ids)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_weights(self):
+        ore_only = [0, 0, 0, 0, 1]
+        best = self.board.rank_openings('player1', weights=ore_only)[0]
+        vertex_id = self.board._topology.vertex_id(*best)
+        ore = self.board.vertex_table['production'][:, 4]
+        self.assertEqual(ore[vertex_id], ore.max())
+
+    def test_skips_taken_sites(self):
+        best = self.board.rank_openings('player1')[0]
+        self.board.add_town(best[0], best[1], 'player1')
+        self.assertNotIn(best, self.board.rank_openings('player2'))
+
+    def test_outside_setup(self):
+        self.assertEqual(self.board.rank_openings('player1', setup=False), [])
+
+    def test_view(self):
+        view = board.BoardView(self.board)
+        self.assertEqual(view.rank_openings('player1'),
+                         self.board.rank_openings('player1'))
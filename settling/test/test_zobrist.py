@@ -0,0 +1,109 @@
+import unittest
+
+from settling import board
+from settling import game_constants
+from settling import zobrist
+from settling.board_geometry import StandardBoard
+
+
+class Test_key(unittest.TestCase):
+    def test_deterministic(self):
+        self.assertEqual(zobrist.key(zobrist.ROAD, 3, 'player1'),
+                         zobrist.key(zobrist.ROAD, 3, 'player1'))
+
+    def test_distinct(self):
+        keys = {zobrist.key(zobrist.ROAD, 3, 'player1'),
+                zobrist.key(zobrist.ROAD, 3, 'player2'),
+                zobrist.key(zobrist.ROAD, 4, 'player1'),
+                zobrist.key(zobrist.TOWN, 3, 'player1')}
+        self.assertEqual(len(keys), 4)
+
+    def test_fits_64_bits(self):
+        self.assertLessEqual(zobrist.key(zobrist.CITY, 95, 'p'), zobrist.MASK)
+
+
+class Test_Board_position_key(unittest.TestCase):
+    def new_board(self):
+        return board.Board(game_constants.STANDARD_TILE_ORDER,
+                           game_constants.STANDARD_NUMBER_ORDER,
+                           game_constants.STANDARD_PORT_MAP,
+                           StandardBoard())
+
+    def test_move_order_independent(self):
+        """Transpositions reach the same key.
+        """
+        b1, b2 = self.new_board(), self.new_board()
+        b1.add_town((0, 0, 0), 0, 'player1')
+        b1.add_road((0, 0, 0), 0, 'player2')
+        b2.add_road((1, 0, -1), 3, 'player2')
+        b2.add_town((1, -1, 0), 2, 'player1')
+        self.assertEqual(b1.position_key(), b2.position_key())
+
+    def test_changes_on_every_mutation(self):
+        b = self.new_board()
+        keys = [b.position_key()]
+        b.add_town((0, 0, 0), 0, 'player1')
+        keys.append(b.position_key())
+        b.upgrade_town((0, 0, 0), 0, 'player1')
+        keys.append(b.position_key())
+        b.add_road((0, 0, 0), 0, 'player1')
+        keys.append(b.position_key())
+        b.move_robber((0, 0, 0))
+        keys.append(b.position_key())
+        self.assertEqual(len(set(keys)), 5)
+
+    def test_incremental_matches_full(self):
+        b = self.new_board()
+        b.add_town((0, 0, 0), 0, 'player1')
+        b.upgrade_town((0, 0, 0), 0, 'player1')
+        b.add_road((0, 0, 0), 2, 'player2')
+        b.move_robber((0, 0, 0))
+        incremental = b.position_key()
+        b._rehash()
+        self.assertEqual(b.position_key(), incremental)
+
+    def test_robber_returns(self):
+        """Moving the robber away and back restores the key.
+        """
+        b = self.new_board()
+        start = b.position_key()
+        b.move_robber((0, 0, 0))
+        b.move_robber(b._topology.hexagons[13])
+        self.assertEqual(b.position_key(), start)
+
+    def test_snapshot_keys_diverge(self):
+        b = self.new_board()
+        snapshot = b.snapshot()
+        snapshot.add_town((0, 0, 0), 0, 'player1')
+        self.assertNotEqual(b.position_key(), snapshot.position_key())
+
+    def test_layout_matters(self):
+        b = self.new_board()
+        numbers = tuple(reversed(game_constants.STANDARD_NUMBER_ORDER))
+        other = board.Board(game_constants.STANDARD_TILE_ORDER, numbers,
+                            game_constants.STANDARD_PORT_MAP,
+                            StandardBoard())
+        self.assertNotEqual(b.position_key(), other.position_key())
+
+
+class Test_TranspositionTable(unittest.TestCase):
+    def test_store_and_get(self):
+        table = zobrist.TranspositionTable(4)
+        table.store(1, 'a')
+        self.assertEqual(table.get(1), 'a')
+        self.assertIsNone(table.get(2))
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        table = zobrist.TranspositionTable(2)
+        table.store(1, 'a')
+        table.store(2, 'b')
+        table.get(1)
+        table.store(3, 'c')
+        self.assertIn(1, table)
+        self.assertNotIn(2, table)
+        self.assertEqual(len(table), 2)
+
+    def test_zero_capacity_raises(self):
+        with self.assertRaises(ValueError):
+            zobrist.TranspositionTable(0)
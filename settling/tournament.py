@@ -0,0 +1,473 @@
+"""Rate a pool of bots by playing them against each other.
+
+A tournament is a round robin: every round, each group of seats bots
+plays once from every rotation of its seats, so no bot gains from
+where it sits. Every game in a round is played on the same board with
+the same dice, from the round's seed, and every seat's player draws
+its own random numbers from it too, so any game can be replayed from
+its Pairing alone.
+
+Games are handed to a pool of processes in batches. A batch holds a
+single game of slow bots, or as many games of fast ones as make up
+about batch_seconds of play, judged from how long each bot's games
+have taken so far. Only a few batches per process are in flight at
+a time.
+
+Bots are rated with Glicko as results stream in, a round at a time:
+results from a round are held back until every earlier round has been
+counted. Each rating has a deviation that narrows as the bot plays,
+and widens a little after every round, Glicko's rating period, so it
+never narrows so far that chance alone can separate equal bots. Once
+no two bots' confidence intervals have overlapped at the end of
+SETTLE_ROUNDS rounds in a row, the order of the bots is settled, and
+the tournament stops early.
+
+With a checkpoint file, what has been played and the ratings so far
+are saved every checkpoint_every seconds, and when the tournament
+stops for any reason. Running the same tournament again carries on
+from where it left off.
+
+    python -m settling tournament --bot random=settling.player:RandomPlayer \\
+        --bot mcts=settling.mcts:MCTSPlayer,budget=0.01 --checkpoint t.json
+"""
+
+import functools
+import importlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import statistics
+import time
+from collections import Counter, namedtuple
+
+from settling import board
+from settling.game import Game
+
+CHECKPOINT_VERSION = 1
+DEFAULT_MAX_TURNS = 1000
+
+# factory is a 'module:attribute' path to a callable taking a name and
+# an rng keyword, plus any options, and returning a Player.
+Bot = namedtuple('Bot', ['name', 'factory', 'options'])
+
+# seats are the names of the bots, in the order they sit.
+Pairing = namedtuple('Pairing', ['index', 'round', 'seed', 'seats'])
+
+# winner is None if nobody won within max_turns turns.
+PairingResult = namedtuple('PairingResult',
+                           ['index', 'round', 'seats', 'winner', 'turns',
+                            'seconds'])
+
+Standing = namedtuple('Standing', ['name', 'rating', 'low', 'high',
+                                   'games', 'wins'])
+
+# Glicko's scale factor, and the rating and deviation of a new bot.
+_Q = math.log(10) / 400
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+
+# Glicko's c: how far a rating is assumed to drift in a rating period.
+DEVIATION_DRIFT = 5.0
+
+# How many rounds in a row the standings must end separated to settle.
+SETTLE_ROUNDS = 3
+
+
+def parse_bot(text):
+    """Return the Bot described by 'name=module:attribute[,key=value...]'.
+
+    Option values are read as JSON where they can be, and are strings
+    otherwise.
+    """
+    name, _, spec = text.partition('=')
+    factory, *options = spec.split(',')
+    if not name or ':' not in factory:
+        msg = "Bots look like name=module:attribute, not {0!r}."
+        raise ValueError(msg.format(text))
+    parsed = {}
+    for option in options:
+        key, _, value = option.partition('=')
+        try:
+            parsed[key] = json.loads(value)
+        except ValueError:
+            parsed[key] = value
+    return Bot(name, factory, parsed)
+
+
+def make_player(bot, rng):
+    """Return a Player for bot, drawing on rng.
+    """
+    module, _, attribute = bot.factory.partition(':')
+    factory = getattr(importlib.import_module(module), attribute)
+    return factory(bot.name, rng=rng, **bot.options)
+
+
+def schedule(names, seats=2, rounds=1, seed=0, start=0):
+    """Yield the Pairings of a round robin between names, from the
+    Pairing numbered start.
+    """
+    groups = list(itertools.combinations(names, seats))
+    per_round = len(groups) * seats
+    for index in itertools.count(start):
+        round_number, within = divmod(index, per_round)
+        if round_number >= rounds:
+            return
+        group, shift = divmod(within, seats)
+        group = groups[group]
+        yield Pairing(index, round_number, seed + round_number,
+                      group[shift:] + group[:shift])
+
+
+def play_pairing(pairing, bots, max_turns=DEFAULT_MAX_TURNS):
+    """Play one Pairing between the Bots in bots, by name, and return
+    its PairingResult.
+    """
+    start = time.perf_counter()
+    rng = random.Random(pairing.seed)
+    game_board = board.random_standard_board(rng)
+    dice = random.Random(rng.getrandbits(64))
+    players = [make_player(bots[name], random.Random(rng.getrandbits(64)))
+               for name in pairing.seats]
+
+    def roll():
+        return dice.randint(1, 6) + dice.randint(1, 6)
+
+    try:
+        game = Game(game_board, players, roll, max_turns=max_turns)
+        winner = game.game_loop()
+    finally:
+        for player in players:
+            if hasattr(player, 'close'):
+                player.close()
+    return PairingResult(pairing.index, pairing.round, pairing.seats,
+                         winner, game.turns, time.perf_counter() - start)
+
+
+def play_batch(pairings, bots, max_turns=DEFAULT_MAX_TURNS):
+    return [play_pairing(pairing, bots, max_turns) for pairing in pairings]
+
+
+class Ratings:
+    """Glicko ratings, updated one game at a time.
+
+    A game counts as a win for its winner against each other bot in
+    it, and a draw between every other pair, or between everyone if
+    nobody won. Every deviation widens by drift at the end of each
+    rating period.
+    """
+    def __init__(self, names, drift=DEVIATION_DRIFT):
+        self.rating = dict.fromkeys(names, INITIAL_RATING)
+        self.deviation = dict.fromkeys(names, INITIAL_DEVIATION)
+        self.drift = drift
+        self.games = Counter()
+        self.wins = Counter()
+
+    def add(self, seats, winner):
+        updates = [(name, self._update(name, seats, winner))
+                   for name in seats]
+        for name, (rating, deviation) in updates:
+            self.rating[name] = rating
+            self.deviation[name] = deviation
+            self.games[name] += 1
+        if winner is not None:
+            self.wins[winner] += 1
+
+    def end_period(self):
+        """Widen every deviation, as Glicko does between rating periods.
+        """
+        for name, deviation in self.deviation.items():
+            self.deviation[name] = min(
+                math.sqrt(deviation ** 2 + self.drift ** 2),
+                INITIAL_DEVIATION)
+
+    def _update(self, name, seats, winner):
+        """Return name's rating and deviation after a game against the
+        rest of seats.
+        """
+        rating = self.rating[name]
+        information = 0.0
+        surprise = 0.0
+        for other in seats:
+            if other == name:
+                continue
+            g = _g(self.deviation[other])
+            expected = 1 / (1 + 10 ** (-g * (rating - self.rating[other]) /
+                                       400))
+            score = 1.0 if name == winner else 0.0 if other == winner \
+                else 0.5
+            information += g * g * expected * (1 - expected)
+            surprise += g * (score - expected)
+        variance = 1 / (1 / self.deviation[name] ** 2 +
+                        _Q * _Q * information)
+        return rating + _Q * variance * surprise, math.sqrt(variance)
+
+    def standings(self, confidence=0.95):
+        """Return a Standing for each bot, best first, with the interval
+        its rating lies in with the given confidence.
+        """
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        return sorted(
+            (Standing(name, rating, rating - z * self.deviation[name],
+                      rating + z * self.deviation[name], self.games[name],
+                      self.wins[name])
+             for name, rating in self.rating.items()),
+            key=lambda standing: -standing.rating)
+
+    def separated(self, confidence=0.95):
+        """Return True if no two bots' intervals overlap.
+        """
+        standings = self.standings(confidence)
+        return all(better.low > worse.high
+                   for better, worse in zip(standings, standings[1:]))
+
+    def state(self):
+        return {name: [self.rating[name], self.deviation[name],
+                       self.games[name], self.wins[name]]
+                for name in self.rating}
+
+    def load_state(self, state):
+        for name, (rating, deviation, games, wins) in state.items():
+            self.rating[name] = rating
+            self.deviation[name] = deviation
+            self.games[name] = games
+            self.wins[name] = wins
+
+
+def _g(deviation):
+    return 1 / math.sqrt(1 + 3 * (_Q * deviation / math.pi) ** 2)
+
+
+class Tournament:
+    """A round robin between bots, a list of Bots.
+
+    With processes=1, or by default on a single core, games are played
+    in this process. With early_stop=False every round is played.
+    """
+    def __init__(self, bots, seats=2, rounds=100, seed=0,
+                 max_turns=DEFAULT_MAX_TURNS, processes=None,
+                 checkpoint=None, checkpoint_every=10.0, confidence=0.95,
+                 early_stop=True, batch_seconds=0.1, max_batch=64):
+        names = [bot.name for bot in bots]
+        if len(set(names)) != len(names):
+            raise ValueError("Bots must have different names.")
+        if len(bots) < seats:
+            msg = "{0} seats need at least {0} bots."
+            raise ValueError(msg.format(seats))
+        self.bots = {bot.name: bot for bot in bots}
+        self.names = names
+        self.seats = seats
+        self.rounds = rounds
+        self.seed = seed
+        self.max_turns = max_turns
+        self.processes = processes or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.confidence = confidence
+        self.early_stop = early_stop
+        self.batch_seconds = batch_seconds
+        self.max_batch = max_batch
+        self.per_round = math.comb(len(names), seats) * seats
+        self.ratings = Ratings(names)
+        self.settled = False
+        # Every pairing below _done_below has been played, as have
+        # those in _done_above. Results from rounds after the first
+        # unfinished one wait in _held, by index.
+        self._done_below = 0
+        self._done_above = set()
+        self._held = {}
+        # Rounds in a row that have ended with the standings separated.
+        self._separated_rounds = 0
+        # Seconds each bot's games have taken, and how many.
+        self._seconds = Counter()
+        self._timed = Counter()
+        self._saved_at = time.perf_counter()
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._load()
+
+    @property
+    def played(self):
+        return self._done_below + len(self._done_above)
+
+    @property
+    def total(self):
+        return self.rounds * self.per_round
+
+    def run(self):
+        """Yield each PairingResult as it comes in, until every round
+        has been played or the standings are settled.
+        """
+        batches = self._batches()
+        try:
+            if self.settled:
+                return
+            elif self.processes == 1:
+                for batch in batches:
+                    yield from self._record(play_batch(batch, self.bots,
+                                                       self.max_turns))
+                    if self.settled:
+                        return
+            else:
+                yield from self._run_pool(batches)
+        finally:
+            self._save()
+
+    def _run_pool(self, batches):
+        play = functools.partial(play_batch, bots=self.bots,
+                                 max_turns=self.max_turns)
+        finished = queue.Queue()
+        in_flight = 0
+        with multiprocessing.Pool(self.processes) as pool:
+            while not self.settled:
+                for batch in itertools.islice(
+                        batches, 2 * self.processes - in_flight):
+                    pool.apply_async(play, (batch,),
+                                     callback=finished.put,
+                                     error_callback=finished.put)
+                    in_flight += 1
+                if not in_flight:
+                    return
+                results = finished.get()
+                in_flight -= 1
+                if isinstance(results, BaseException):
+                    raise results
+                yield from self._record(results)
+
+    def _batches(self):
+        """Yield lists of the Pairings still to play, each expected to
+        take about batch_seconds, working the estimate out afresh for
+        each batch.
+        """
+        pending = (pairing for pairing in schedule(
+            self.names, self.seats, self.rounds, self.seed,
+            self._done_below) if pairing.index not in self._done_above)
+        batch = []
+        seconds = 0.0
+        for pairing in pending:
+            batch.append(pairing)
+            seconds += self._estimate(pairing)
+            if seconds >= self.batch_seconds or \
+                    len(batch) >= self.max_batch:
+                yield batch
+                batch = []
+                seconds = 0.0
+        if batch:
+            yield batch
+
+    def _estimate(self, pairing):
+        """Return how long pairing's game should take: as long as the
+        slowest of its bots' games have, or forever if one has yet to
+        play.
+        """
+        return max(self._seconds[name] / self._timed[name]
+                   if self._timed[name] else float('inf')
+                   for name in pairing.seats)
+
+    def _record(self, results):
+        """Count results, yielding each as it is counted.
+
+        Results are held back until every earlier round has been
+        counted, so only whole rounds are counted. Once the standings
+        settle, nothing more is counted, and any results still held
+        are played again should the tournament be resumed.
+        """
+        for result in results:
+            self._held[result.index] = result
+        while not self.settled:
+            current = self._done_below // self.per_round
+            ready = sorted(index for index, result in self._held.items()
+                           if result.round <= current)
+            if not ready:
+                break
+            for index in ready:
+                yield self._count(self._held.pop(index))
+        if time.perf_counter() - self._saved_at >= self.checkpoint_every:
+            self._save()
+
+    def _count(self, result):
+        self.ratings.add(result.seats, result.winner)
+        for name in result.seats:
+            self._seconds[name] += result.seconds
+            self._timed[name] += 1
+        self._mark_done(result.index)
+        return result
+
+    def _mark_done(self, index):
+        rounds_done = self._done_below // self.per_round
+        self._done_above.add(index)
+        while self._done_below in self._done_above:
+            self._done_above.remove(self._done_below)
+            self._done_below += 1
+        for _ in range(self._done_below // self.per_round - rounds_done):
+            self._end_round()
+
+    def _end_round(self):
+        if self.ratings.separated(self.confidence):
+            self._separated_rounds += 1
+        else:
+            self._separated_rounds = 0
+        self.ratings.end_period()
+        if self.early_stop and self._separated_rounds >= SETTLE_ROUNDS:
+            self.settled = True
+
+    def standings(self):
+        return self.ratings.standings(self.confidence)
+
+    def report(self):
+        """Return a few lines of standings.
+        """
+        lines = ['{0:,} of {1:,} games played{2}'.format(
+            self.played, self.total, ', settled' if self.settled else '')]
+        for standing in self.standings():
+            lines.append(
+                '{0}: {1:.0f} ({2:.0f} to {3:.0f}), {4:,} wins in {5:,} '
+                'games'.format(standing.name, standing.rating, standing.low,
+                               standing.high, standing.wins,
+                               standing.games))
+        return '\n'.join(lines)
+
+    def _settings(self):
+        return {'bots': [list(self.bots[name]) for name in self.names],
+                'seats': self.seats, 'seed': self.seed,
+                'max_turns': self.max_turns}
+
+    def _save(self):
+        """Write the checkpoint, if there is one, all at once.
+        """
+        self._saved_at = time.perf_counter()
+        if self.checkpoint is None:
+            return
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'settings': self._settings(),
+            'done_below': self._done_below,
+            'done_above': sorted(self._done_above),
+            'ratings': self.ratings.state(),
+            'separated_rounds': self._separated_rounds,
+            'seconds': [self._seconds, self._timed],
+            'settled': self.settled,
+        }
+        partial = self.checkpoint + '.partial'
+        with open(partial, 'w') as f:
+            json.dump(state, f)
+        os.replace(partial, self.checkpoint)
+
+    def _load(self):
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if state.get('version') != CHECKPOINT_VERSION:
+            msg = "Unsupported checkpoint version {0}."
+            raise ValueError(msg.format(state.get('version')))
+        if state['settings'] != self._settings():
+            msg = "Checkpoint {0} is for a different tournament."
+            raise ValueError(msg.format(self.checkpoint))
+        self._done_below = state['done_below']
+        self._done_above = set(state['done_above'])
+        self.ratings.load_state(state['ratings'])
+        self._separated_rounds = state.get('separated_rounds', 0)
+        self._seconds.update(state['seconds'][0])
+        self._timed.update(state['seconds'][1])
+        self.settled = state['settled'] and self.early_stop
@@ -0,0 +1,119 @@
+"""Per-vertex scoring tables for choosing where to build.
+
+A board's vertex table is built once, from its tiles, numbers and ports,
+as a NumPy structured array indexed by canonical vertex id. Its fields
+are:
+
+  |------------+---------+-----------------------------------------------|
+  | Field      | Shape   | Contents                                      |
+  |------------+---------+-----------------------------------------------|
+  | pips       | ()      | Dots on the numbers of the touching tiles     |
+  | production | (5,)    | Pips per resource, in RESOURCE_TILE_TYPES     |
+  |            |         | order                                         |
+  | resources  | ()      | How many different resources the vertex gets  |
+  | port       | ()      | 1 + index of its port in PORT_TYPES, or 0     |
+  | numbers    | (3,)    | Numbers of the touching tiles, 0 for none     |
+  |------------+---------+-----------------------------------------------|
+
+The robber is ignored, since tables describe the layout rather than
+the state of play.
+"""
+
+import functools
+
+import numpy as np
+
+from settling import game_constants
+
+# Pips, the number of ways to roll each number with two dice.
+PIPS = np.array([0, 0, 1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1], dtype=np.int16)
+
+DTYPE = np.dtype([
+    ('pips', np.int16),
+    ('production', np.int16, (len(game_constants.RESOURCE_TILE_TYPES),)),
+    ('resources', np.int8),
+    ('port', np.int8),
+    ('numbers', np.int8, (3,)),
+])
+
+# Default weights for ranking openings: one point per pip of each
+# resource, and a bonus for each different resource and for a port.
+RESOURCE_WEIGHTS = np.ones(len(game_constants.RESOURCE_TILE_TYPES))
+DIVERSITY_BONUS = 1.0
+PORT_BONUS = 1.0
+
+
+def build(topology, tile_types, tile_numbers, ports):
+    """Return the table for a board's layout.
+
+    tile_types are indexes into TILE_TYPES and tile_numbers the dice
+    numbers, both by ordinal. ports maps vertex ids to port types.
+    """
+    vertex_count = topology.vertex_count
+    corner_tiles = _corner_tiles(topology)
+    on_board = corner_tiles >= 0
+    ordinals = np.where(on_board, corner_tiles, 0)
+
+    types = np.frombuffer(bytes(tile_types), dtype=np.uint8)[ordinals]
+    numbers = np.frombuffer(bytes(tile_numbers), dtype=np.uint8)[ordinals]
+    numbers = np.where(on_board, numbers, 0)
+    # Resource tiles come first in TILE_TYPES, and only they have
+    # numbers, so a tile with a number produces types[...].
+    producing = numbers > 0
+    pips = PIPS[numbers]
+
+    table = np.zeros(vertex_count, dtype=DTYPE)
+    table['numbers'] = numbers
+    table['pips'] = pips.sum(axis=1)
+    production = table['production']
+    for corner in range(corner_tiles.shape[1]):
+        rows = np.nonzero(producing[:, corner])[0]
+        np.add.at(production, (rows, types[rows, corner]),
+                  pips[rows, corner])
+    table['resources'] = (production > 0).sum(axis=1)
+    for vertex_id, port_type in ports.items():
+        table['port'][vertex_id] = (
+            game_constants.PORT_TYPES.index(port_type) + 1
+        )
+    table.flags.writeable = False
+    return table
+
+
+def scores(table, vertex_ids, weights=None):
+    """Return the opening score of each vertex in vertex_ids.
+
+    weights gives the value of a pip of each resource, in
+    RESOURCE_TILE_TYPES order, and defaults to RESOURCE_WEIGHTS.
+    """
+    if weights is None:
+        weights = RESOURCE_WEIGHTS
+    rows = table[vertex_ids]
+    return (rows['production'].dot(np.asarray(weights, dtype=np.float64))
+            + DIVERSITY_BONUS * rows['resources']
+            + PORT_BONUS * (rows['port'] > 0))
+
+
+def rank(table, vertex_ids, weights=None):
+    """Return vertex_ids as a list, from the best score to the worst.
+
+    Ties keep the order they were given in.
+    """
+    vertex_ids = np.asarray(vertex_ids, dtype=np.int64)
+    if not len(vertex_ids):
+        return []
+    order = np.argsort(-scores(table, vertex_ids, weights), kind='stable')
+    return vertex_ids[order].tolist()
+
+
+@functools.lru_cache(maxsize=None)
+def _corner_tiles(topology):
+    """Return a (vertex_count, 3) array of the ordinals around each
+    vertex, padded with -1.
+
+    Topologies are shared, so this is only worked out once for each.
+    """
+    corner_tiles = np.full((topology.vertex_count, 3), -1, dtype=np.int64)
+    for vertex_id, tiles in enumerate(topology.vertex_tiles):
+        corner_tiles[vertex_id, :len(tiles)] = tiles
+    corner_tiles.flags.writeable = False
+    return corner_tiles
@@ -0,0 +1,100 @@
+"""Zobrist hashing of board positions.
+
+Every feature a position can have -- a given player's road on a given
+edge, their town or city on a given vertex, the robber on a given tile
+-- is assigned a fixed pseudo-random 64 bit key. A position's hash is
+the XOR of the keys of all its features, so adding or removing a
+feature updates the hash with a single XOR, and two boards reached by
+different move orders end up with the same hash.
+
+Keys are derived from the feature and player name with a hash
+function rather than drawn from a random generator, so they are the
+same in every process.
+"""
+
+import hashlib
+from collections import OrderedDict
+
+MASK = 0xFFFFFFFFFFFFFFFF
+
+# Feature kinds
+ROAD = 1
+TOWN = 2
+CITY = 3
+ROBBER = 4
+
+_keys = {}
+
+
+def _digest(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(),
+                          'little')
+
+
+def key(kind, index, player=None):
+    """Return the key for a feature, owned by player if it has one.
+    """
+    feature = (kind, index, player)
+    try:
+        return _keys[feature]
+    except KeyError:
+        data = '{0}:{1}:{2!r}'.format(kind, index, player).encode('utf-8')
+        _keys[feature] = _digest(data)
+        return _keys[feature]
+
+
+def layout_key(tile_order, number_order, port_map):
+    """Return a key identifying a board's layout.
+
+    Including the layout in the hash keeps positions on different
+    boards from colliding.
+    """
+    data = repr((tuple(tile_order), tuple(number_order), tuple(port_map)))
+    return _digest(data.encode('utf-8'))
+
+
+class TranspositionTable:
+    """A bounded map from position keys to search results.
+
+    When the table is full, the least recently used entry is evicted.
+    """
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, position_key):
+        return position_key in self._entries
+
+    def get(self, position_key, default=None):
+        """Return the stored value, marking it as recently used.
+        """
+        try:
+            value = self._entries[position_key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(position_key)
+        self.hits += 1
+        return value
+
+    def store(self, position_key, value):
+        """Store a value, evicting the oldest entry if the table is full.
+        """
+        entries = self._entries
+        if position_key in entries:
+            entries.move_to_end(position_key)
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+        entries[position_key] = value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0